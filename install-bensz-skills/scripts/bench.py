@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""Benchmark harness for install-bensz-skills.
+
+生成合成的 skills 仓库（N 个 skill × M 个文件，可选文件大小分布，包含嵌套的 test/ 目录、
+测试技能与隐藏目录），在隔离的 HOME 中依次运行以下场景：
+
+- cold：全新目标目录与空缓存；
+- warm：再次运行（无变化，no-op）；
+- change：修改一个 skill 中的一个文件后运行；
+- force：`--force` 全部重装。
+
+每个场景以子进程运行真实的 ``install.py --timings``，不调用安装器的内部函数。
+耗时取自运行 manifest 中的 --timings 结果：discovery / classification / install / manifest / report
+为主线程阶段的墙钟时间；hashing 与 copy 为各 skill 的 hash / copy 步骤之和（并发执行时为累计时间，
+不计入 total）。结果以 JSON 输出，可用 --compare 与其他提交的结果对比。
+
+用法：
+    python3 bench.py --skills 50 --files 40 --sizes mixed --repeat 3 -o bench.json
+    python3 bench.py -o new.json --compare bench.json
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+SCENARIOS = ("cold", "warm", "change", "force")
+# 主线程阶段（之和为 total）与逐 skill 步骤（hashing / copy，各 skill 累计）
+MAIN_PHASES = ("discovery", "classification", "install", "manifest", "report")
+SKILL_STEPS = {"hashing": "hash", "copy": "copy"}
+PHASES = ("discovery", "classification", "hashing", "copy", "install", "manifest", "report")
+RESULT_VERSION = 3
+
+# 文件大小分布（字节）：(最小值, 最大值)，在对数尺度上均匀取样
+SIZE_DISTRIBUTIONS: dict[str, tuple[int, int]] = {
+    "small": (200, 4 * 1024),
+    "mixed": (200, 1024 * 1024),
+    "large": (64 * 1024, 4 * 1024 * 1024),
+}
+
+
+def _sample_size(rng: random.Random, dist: str) -> int:
+    low, high = SIZE_DISTRIBUTIONS[dist]
+    return int(low * (high / low) ** rng.random())
+
+
+def generate_repo(root: Path, skills: int, files: int, sizes: str, seed: int) -> dict:
+    """生成合成 skills 仓库，返回统计信息。
+
+    每个 skill 含 SKILL.md、scripts/ 与 templates/ 下的文件、嵌套 test/ 目录（不会被安装）；
+    另外生成 tests/ 下的测试技能、辅助技能，以及不应被遍历的 .git/ 与 node_modules/。
+    """
+    rng = random.Random(seed)
+    total_bytes = 0
+    total_files = 0
+
+    def _write(path: Path, size: int) -> None:
+        nonlocal total_bytes, total_files
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(rng.randbytes(size))
+        total_bytes += size
+        total_files += 1
+
+    for i in range(skills):
+        skill = root / f"skill-{i:04d}"
+        skill.mkdir(parents=True)
+        (skill / "SKILL.md").write_text(
+            f"---\nname: skill-{i:04d}\ndescription: synthetic skill {i}\nversion: 1.0.{i}\n"
+            f"tags: [bench, synthetic]\n---\n# skill {i}\n",
+            encoding="utf-8",
+        )
+        for j in range(files):
+            subdir = ("scripts", "templates", "references/deep/nested")[j % 3]
+            _write(skill / subdir / f"file-{j:04d}.bin", _sample_size(rng, sizes))
+        _write(skill / "test" / "20260101_120000" / "output.log", 1024)
+
+    for i in range(max(1, skills // 10)):
+        test_skill = root / "tests" / f"bench-test-{i:03d}"
+        test_skill.mkdir(parents=True)
+        (test_skill / "SKILL.md").write_text(f"---\nname: bench-test-{i}\n---\n", encoding="utf-8")
+    helper = root / "bench-helper"
+    helper.mkdir()
+    (helper / "SKILL.md").write_text("---\nname: helper\ncategory: auxiliary\n---\n", encoding="utf-8")
+
+    for junk in (".git/objects/ab", "node_modules/pkg/lib"):
+        for j in range(50):
+            path = root / junk / f"junk-{j}"
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(b"x" * 64)
+    (root / "node_modules" / "pkg" / "SKILL.md").write_text("---\nname: not-a-skill\n---\n", encoding="utf-8")
+
+    # 把 mtime 设为过去，使 stat 缓存与发现缓存可以写入（刚修改的文件不会被缓存）
+    past = time.time() - 3600
+    for dirpath, _, filenames in os.walk(root):
+        for name in filenames:
+            os.utime(os.path.join(dirpath, name), (past, past))
+        os.utime(dirpath, (past, past))
+    return {"skills": skills, "files": total_files, "bytes": total_bytes}
+
+
+def _mutate_one_file(root: Path) -> None:
+    """修改一个 skill 中的一个文件（single-change 场景）。"""
+    target = sorted((root / "skill-0000" / "scripts").iterdir())[0]
+    with open(target, "ab") as f:
+        f.write(b"bench-change\n")
+    past = time.time() - 3600
+    os.utime(target, (past, past))
+
+
+def _run_scenario(source: Path, home: Path, force: bool, jobs: int) -> dict:
+    """在隔离的 HOME 中以子进程运行一次安装，从运行 manifest 中读取 --timings 的耗时。
+
+    以文本模式运行，report 阶段包含真实的报告输出。
+    """
+    env = {**os.environ, "HOME": str(home)}
+    cmd = [
+        sys.executable, str(Path(__file__).resolve().with_name("install.py")),
+        "--source", str(source), "--claude", "--jobs", str(jobs), "--timings",
+    ]
+    if force:
+        cmd.append("--force")
+    start = time.perf_counter()
+    subprocess.run(cmd, env=env, check=True, capture_output=True, text=True)
+    wall = time.perf_counter() - start
+    manifest = max(home.glob(".bensz-skills-install-manifest.*.json"), key=lambda p: p.stat().st_mtime_ns)
+    runs = json.loads(manifest.read_text(encoding="utf-8"))["runs"]
+    timings = runs[-1]["timings"]
+    phases = {phase: timings["phases"].get(phase, {}).get("wall_ms", 0.0) / 1000 for phase in MAIN_PHASES}
+    for phase, step in SKILL_STEPS.items():
+        phases[phase] = sum(skill.get(step, {}).get("wall_ms", 0.0) for skill in timings["skills"]) / 1000
+    return {
+        "phases": {phase: phases[phase] for phase in PHASES},
+        "total": sum(phases[phase] for phase in MAIN_PHASES),
+        "wall": wall,
+        "installed": runs[0]["installed_count"],
+        "skipped": runs[0]["skipped_count"],
+    }
+
+
+def _summarize(runs: list[dict]) -> dict:
+    """多次运行取中位数。"""
+    return {
+        "phases": {phase: statistics.median(r["phases"][phase] for r in runs) for phase in PHASES},
+        "total": statistics.median(r["total"] for r in runs),
+        "wall": statistics.median(r["wall"] for r in runs),
+        "installed": runs[-1]["installed"],
+        "skipped": runs[-1]["skipped"],
+        "runs": runs,
+    }
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=Path(__file__).resolve().parent,
+            check=True, capture_output=True, text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmark(args: argparse.Namespace) -> dict:
+    workdir = Path(args.workdir) if args.workdir else Path(tempfile.mkdtemp(prefix="bensz-bench-"))
+    workdir.mkdir(parents=True, exist_ok=True)
+    source = workdir / "src"
+    if source.exists():
+        shutil.rmtree(source)
+    print(f"🧪 生成合成仓库: {args.skills} 个 skill × {args.files} 个文件（{args.sizes}）-> {source}")
+    dataset = generate_repo(source, args.skills, args.files, args.sizes, args.seed)
+
+    runs: dict[str, list[dict]] = {scenario: [] for scenario in SCENARIOS}
+    try:
+        for round_no in range(args.repeat):
+            home = workdir / f"home-{round_no}"
+            if home.exists():
+                shutil.rmtree(home)
+            home.mkdir()
+            runs["cold"].append(_run_scenario(source, home, force=False, jobs=args.jobs))
+            runs["warm"].append(_run_scenario(source, home, force=False, jobs=args.jobs))
+            _mutate_one_file(source)
+            runs["change"].append(_run_scenario(source, home, force=False, jobs=args.jobs))
+            runs["force"].append(_run_scenario(source, home, force=True, jobs=args.jobs))
+            print(f"   第 {round_no + 1}/{args.repeat} 轮完成")
+    finally:
+        if not args.keep and not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    return {
+        "version": RESULT_VERSION,
+        "created_at": time.strftime("%Y%m%d-%H%M%S", time.localtime()),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "config": {
+            "skills": args.skills,
+            "files": args.files,
+            "sizes": args.sizes,
+            "seed": args.seed,
+            "repeat": args.repeat,
+            "jobs": args.jobs,
+        },
+        "dataset": dataset,
+        "scenarios": {scenario: _summarize(r) for scenario, r in runs.items()},
+    }
+
+
+def print_results(results: dict, baseline: dict | None = None) -> None:
+    """打印各场景各阶段的耗时（毫秒）；提供 baseline 时附带相对变化。"""
+    header = f"{'场景':<8}{'阶段':<16}{'耗时(ms)':>12}"
+    if baseline is not None:
+        header += f"{'基线(ms)':>12}{'变化':>10}"
+    print(header)
+    for scenario in SCENARIOS:
+        current = results["scenarios"][scenario]
+        rows = [(phase, current["phases"][phase]) for phase in PHASES]
+        rows += [("total", current["total"]), ("wall", current["wall"])]
+        for phase, value in rows:
+            line = f"{scenario:<8}{phase:<16}{value * 1000:>12.1f}"
+            if baseline is not None:
+                base = baseline["scenarios"].get(scenario, {})
+                base_value = base.get(phase) if phase in ("total", "wall") else base.get("phases", {}).get(phase)
+                if base_value:
+                    line += f"{base_value * 1000:>12.1f}{(value / base_value - 1) * 100:>+9.1f}%"
+            print(line)
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(description="install-bensz-skills 性能基准")
+    parser.add_argument("--skills", type=int, default=50, help="skill 数量（默认 %(default)s）")
+    parser.add_argument("--files", type=int, default=40, help="每个 skill 的文件数（默认 %(default)s）")
+    parser.add_argument("--sizes", choices=sorted(SIZE_DISTRIBUTIONS), default="small",
+                        help="文件大小分布（默认 %(default)s）")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子（默认 %(default)s）")
+    parser.add_argument("--repeat", type=int, default=3, help="重复轮数，结果取中位数（默认 %(default)s）")
+    parser.add_argument("--jobs", "-j", type=int, default=min(32, (os.cpu_count() or 1) + 4),
+                        help="安装并发数（默认 %(default)s）")
+    parser.add_argument("--workdir", type=str, default=None, help="工作目录（默认使用临时目录并在结束后删除）")
+    parser.add_argument("--keep", action="store_true", help="保留临时工作目录")
+    parser.add_argument("-o", "--output", type=str, default=None, help="把 JSON 结果写入文件")
+    parser.add_argument("--compare", type=str, default=None, metavar="BASELINE",
+                        help="与之前保存的 JSON 结果对比")
+    args = parser.parse_args(argv)
+
+    results = run_benchmark(args)
+    baseline = json.loads(Path(args.compare).read_text(encoding="utf-8")) if args.compare else None
+    print_results(results, baseline)
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+        print(f"📝 结果已保存: {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
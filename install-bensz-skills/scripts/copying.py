@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""Pluggable file copy backends for install-bensz-skills.
+
+可选的复制后端（逐文件自动回退）：
+
+- reflink：btrfs/xfs 等文件系统上的 FICLONE 写时复制克隆，不产生数据 I/O；
+- copy_file_range：内核态复制，数据不经过用户态缓冲区；
+- hardlink：硬链接到共享只读对象库（~/.bensz-skills/objects），
+  同一文件安装到多个目标时只占用一份磁盘空间；所有目标与对象共享同一 inode，
+  原地修改任一已安装文件会同时改动对象与其他目标，不适合会被手工编辑的目标；
+- copy：普通的 shutil 复制。
+"""
+from __future__ import annotations
+
+import errno
+import os
+import shutil
+import stat
+import threading
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+
+from fingerprint import default_algorithm, get_stat_cache, hash_file, state_dir
+from timings import count_io
+
+try:  # fcntl 仅在类 Unix 系统可用
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+# linux/fs.h: #define FICLONE _IOW(0x94, 9, int)
+_FICLONE = 0x40049409
+
+# 表示“该设备组合不支持此方式”的 errno，命中后不再对同一组合重试
+_UNSUPPORTED_ERRNOS = {
+    errno.EOPNOTSUPP,
+    errno.ENOTTY,
+    errno.EXDEV,
+    errno.EINVAL,
+    errno.ENOSYS,
+    errno.EPERM,
+    errno.EMLINK,
+}
+
+
+@dataclass
+class CopyMode:
+    """复制后端选择。"""
+    COPY: str = "copy"          # 普通复制
+    REFLINK: str = "reflink"    # 优先 reflink，失败回退
+    HARDLINK: str = "hardlink"  # 硬链接到共享对象库，失败回退
+    AUTO: str = "auto"          # reflink → copy_file_range → copy（默认）
+
+
+COPY_MODES = [CopyMode.AUTO, CopyMode.COPY, CopyMode.REFLINK, CopyMode.HARDLINK]
+
+# (src_dev, dst_dev, 方式) → 不支持；避免对每个文件重复尝试失败的系统调用
+_unsupported: set[tuple[int, int, str]] = set()
+_stats: Counter = Counter()
+_lock = threading.Lock()
+
+
+def copy_stats() -> dict[str, int]:
+    """返回本次运行中各复制方式实际使用的文件数。"""
+    with _lock:
+        return dict(_stats)
+
+
+def reset_copy_stats() -> None:
+    with _lock:
+        _stats.clear()
+
+
+def _record(method: str) -> None:
+    with _lock:
+        _stats[method] += 1
+
+
+def _is_supported(src_dev: int, dst_dev: int, method: str) -> bool:
+    return (src_dev, dst_dev, method) not in _unsupported
+
+
+def _mark_unsupported(src_dev: int, dst_dev: int, method: str) -> None:
+    with _lock:
+        _unsupported.add((src_dev, dst_dev, method))
+
+
+def _try_reflink(src: Path, dst: Path) -> bool:
+    """尝试 FICLONE 克隆；不支持时返回 False 且不留下目标文件。"""
+    if fcntl is None:
+        return False
+    dst_dev = os.stat(dst.parent).st_dev
+    src_dev = os.stat(src).st_dev
+    if not _is_supported(src_dev, dst_dev, "reflink"):
+        return False
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        try:
+            fcntl.ioctl(fdst.fileno(), _FICLONE, fsrc.fileno())
+            return True
+        except OSError as exc:
+            if exc.errno not in _UNSUPPORTED_ERRNOS:
+                raise
+            _mark_unsupported(src_dev, dst_dev, "reflink")
+    dst.unlink()
+    return False
+
+
+def _try_copy_file_range(src: Path, dst: Path) -> bool:
+    """尝试内核态 copy_file_range 复制；不支持时返回 False 且不留下目标文件。"""
+    if not hasattr(os, "copy_file_range"):
+        return False
+    dst_dev = os.stat(dst.parent).st_dev
+    src_dev = os.stat(src).st_dev
+    if not _is_supported(src_dev, dst_dev, "copy_file_range"):
+        return False
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        remaining = os.fstat(fsrc.fileno()).st_size
+        try:
+            while remaining > 0:
+                copied = os.copy_file_range(fsrc.fileno(), fdst.fileno(), remaining)
+                if copied == 0:
+                    break
+                remaining -= copied
+            return True
+        except OSError as exc:
+            if exc.errno not in _UNSUPPORTED_ERRNOS:
+                raise
+            _mark_unsupported(src_dev, dst_dev, "copy_file_range")
+    dst.unlink()
+    return False
+
+
+def _copy_data(src: Path, dst: Path, mode: str) -> str:
+    """复制文件数据（不含元数据），返回实际使用的方式。"""
+    if mode in (CopyMode.AUTO, CopyMode.REFLINK, CopyMode.HARDLINK) and _try_reflink(src, dst):
+        return "reflink"
+    if mode != CopyMode.COPY and _try_copy_file_range(src, dst):
+        method = "copy_file_range"
+    else:
+        shutil.copyfile(src, dst)
+        method = "copy"
+    # reflink 共享数据块不搬运数据；其余方式读写各一次
+    size = os.stat(dst).st_size
+    count_io(read=size, written=size)
+    return method
+
+
+def objects_dir() -> Path:
+    """共享只读对象库目录（~/.bensz-skills/objects）。"""
+    return state_dir() / "objects"
+
+
+def store_object_path(digest: str, executable: bool) -> Path:
+    """共享对象库中内容对应的只读对象路径（可执行位不同的内容分开存放）。"""
+    suffix = "x" if executable else ""
+    return objects_dir() / digest[:2] / f"{digest[2:]}{suffix}"
+
+
+def object_intact(obj: Path, digest: str, algo: str | None = None, rehash: bool = False) -> bool:
+    """校验对象库中的对象内容是否仍与其摘要一致。
+
+    hardlink 模式下已安装文件与对象共享 inode，原地修改任一已安装文件（只读权限挡不住 root）
+    会同时改动对象，因此对象存在不代表内容正确。摘要经由 stat 缓存：mtime 等未变化时只需 stat，
+    rehash 时逐字节重新读取。
+    """
+    algo = algo or default_algorithm()
+    try:
+        st = os.stat(obj)
+    except OSError:
+        return False
+    cache = get_stat_cache(algo)
+    actual = None if rehash else cache.lookup(str(obj), st)
+    if actual is None:
+        actual = hash_file(obj, algo)
+        cache.store(str(obj), st, actual)
+    return actual == digest
+
+
+def ensure_object(
+    src: Path, digest: str, executable: bool, algo: str | None = None, rehash: bool = False
+) -> Path:
+    """确保内容已存在于对象库中（不存在或内容已被改动时由 src 写入并设为只读）。
+
+    Args:
+        algo: digest 的哈希算法（缺省为当前默认算法）
+        rehash: 校验已有对象时不信任 stat 缓存（--verify 修复时使用）
+    """
+    obj = store_object_path(digest, executable)
+    exists = obj.exists()
+    if exists and object_intact(obj, digest, algo, rehash):
+        return obj
+    obj.parent.mkdir(parents=True, exist_ok=True)
+    tmp = obj.with_name(f"{obj.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    _copy_data(src, tmp, CopyMode.AUTO)
+    os.chmod(tmp, 0o555 if executable else 0o444)
+    try:
+        if exists:
+            # 已损坏的对象整体替换为新 inode；仍链接到旧 inode 的目标由 --verify 修复
+            os.replace(tmp, obj)
+        else:
+            # link 在目标已存在时失败：并发写入同一对象时保留先到者，保证所有引用共享同一 inode
+            os.link(tmp, obj)
+    except FileExistsError:
+        pass
+    finally:
+        if tmp.exists():
+            tmp.unlink()
+    return obj
+
+
+def _try_hardlink(src: Path, dst: Path, digest: str | None) -> bool:
+    """尝试把目标硬链接到共享对象库；跨设备等不支持的情况返回 False。"""
+    src_st = os.stat(src)
+    dst_dev = os.stat(dst.parent).st_dev
+    state_dir().mkdir(parents=True, exist_ok=True)
+    store_dev = os.stat(state_dir()).st_dev
+    if store_dev != dst_dev or not _is_supported(store_dev, dst_dev, "hardlink"):
+        return False
+    executable = bool(src_st.st_mode & stat.S_IXUSR)
+    try:
+        obj = ensure_object(src, digest or hash_file(src), executable)
+        os.link(obj, dst)
+        return True
+    except OSError as exc:
+        if exc.errno not in _UNSUPPORTED_ERRNOS:
+            raise
+        _mark_unsupported(store_dev, dst_dev, "hardlink")
+        return False
+
+
+def copy_file(src: Path, dst: Path, mode: str = CopyMode.AUTO, digest: str | None = None) -> str:
+    """按所选后端复制单个文件（dst 不得已存在），失败时逐级回退。
+
+    Args:
+        src: 源文件
+        dst: 目标文件路径
+        mode: 复制后端（见 CopyMode）
+        digest: 源文件内容摘要（hardlink 模式用作对象库键；缺省时现场计算）
+
+    Returns:
+        实际使用的方式：reflink / copy_file_range / hardlink / copy
+    """
+    src, dst = Path(src), Path(dst)
+    if mode == CopyMode.HARDLINK and _try_hardlink(src, dst, digest):
+        method = "hardlink"
+    else:
+        method = _copy_data(src, dst, mode)
+        # 硬链接共享对象库的 inode 与元数据，不能改写；其余方式与 copy2 一样保留元数据
+        shutil.copystat(src, dst)
+        if objects_dir() in src.parents:
+            # 从只读对象复制出的文件恢复属主写权限，与直接从源目录复制的结果一致
+            os.chmod(dst, stat.S_IMODE(os.stat(dst).st_mode) | stat.S_IWUSR)
+    _record(method)
+    return method
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""Pruned skill discovery for install-bensz-skills.
+
+用迭代式 os.scandir 遍历代替 rglob("SKILL.md")：
+
+- 在深入之前剪掉隐藏目录（含 .git）、node_modules 与 __pycache__，以及各层 .skillignore 忽略的目录
+  （build/、venv/ 等其他目录名可能属于真实的 skill，是否剪掉交给 .skillignore 决定）；
+- 发现 skill 根目录（含 SKILL.md）后不再深入其子目录；不跟随目录软链接；
+- 结果按源目录缓存在 ~/.bensz-skills/discovery-cache.json，
+  以所有访问过的目录（及其中 .skillignore）的 mtime 作为失效依据：未变化时只需 stat，不再列目录。
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+
+from fingerprint import state_dir
+from ignore import IGNORE_FILENAME, IgnoreMatcher
+
+SKILL_FILENAME = "SKILL.md"
+
+# 永远不会包含 skill 的目录（在深入之前剪掉；隐藏目录同样不深入）
+PRUNED_DIR_NAMES = frozenset({
+    ".git",
+    "node_modules",
+    "__pycache__",
+})
+
+CACHE_VERSION = 4
+
+logger = logging.getLogger(__name__)
+
+# 目录 mtime 距今小于该值时不写缓存（同一时间粒度内的后续修改可能无法反映到 mtime）
+_RACY_WINDOW_NS = 2_000_000_000
+
+
+def is_pruned_dir(name: str) -> bool:
+    """发现与监听时不深入的目录名。"""
+    return name.startswith(".") or name in PRUNED_DIR_NAMES
+
+
+def _log_pruned_skill(path: str, reason: str) -> None:
+    """被剪掉的目录中含有 SKILL.md 时输出调试日志（--debug），便于排查“技能没有被发现”。
+
+    只在启用调试日志时才遍历被剪掉的目录，正常运行不产生额外 I/O。
+    """
+    if not logger.isEnabledFor(logging.DEBUG):
+        return
+    for dirpath, dirnames, filenames in os.walk(path):
+        if SKILL_FILENAME in filenames:
+            logger.debug("跳过含 %s 的目录（%s）: %s", SKILL_FILENAME, reason, dirpath)
+            dirnames[:] = []
+
+
+def walk_skill_roots(root: Path) -> tuple[list[str], dict[str, int]]:
+    """遍历 root，返回 skill 根目录（相对路径）以及所有访问过的目录与 .skillignore 的 mtime。
+
+    只应用 .skillignore 中的规则（默认忽略规则针对 skill 内部文件，如 tests/，不用于发现）。
+
+    Returns:
+        (排序后的 skill 根目录相对路径列表, 相对路径 → mtime_ns)
+    """
+    skills: list[str] = []
+    visited: dict[str, int] = {}
+    stack: list[tuple[str, IgnoreMatcher]] = [(".", IgnoreMatcher())]
+    root_str = str(root)
+    while stack:
+        rel, matcher = stack.pop()
+        path = root_str if rel == "." else os.path.join(root_str, rel)
+        try:
+            visited[rel] = os.stat(path).st_mtime_ns
+            with os.scandir(path) as it:
+                entries = list(it)
+        except OSError:
+            continue
+        names = {entry.name for entry in entries}
+        if SKILL_FILENAME in names:
+            # skill 根目录：记录后不再深入
+            skills.append(rel)
+            continue
+        prefix = "" if rel == "." else f"{rel}/"
+        if IGNORE_FILENAME in names:
+            ignore_path = os.path.join(path, IGNORE_FILENAME)
+            try:
+                # 编辑 .skillignore 不改变目录 mtime，单独记录以使缓存失效
+                visited[prefix + IGNORE_FILENAME] = os.stat(ignore_path).st_mtime_ns
+            except OSError:
+                pass
+            matcher = matcher.extend_file(Path(ignore_path), prefix)
+        for entry in entries:
+            try:
+                # 不跟随目录软链接（与 rglob 一致）：指向上级目录的软链接会形成环，别名也会造成同名冲突
+                if not entry.is_dir(follow_symlinks=False):
+                    continue
+            except OSError:
+                continue
+            if is_pruned_dir(entry.name):
+                _log_pruned_skill(entry.path, f"剪掉的目录 {entry.name}")
+                continue
+            if matcher.is_ignored(prefix + entry.name, is_dir=True):
+                _log_pruned_skill(entry.path, f"{IGNORE_FILENAME} 规则")
+                continue
+            stack.append((prefix + entry.name, matcher))
+    return sorted(skills), visited
+
+
+def skill_roots_in_listing(paths, read_ignore=None) -> list[str]:
+    """在文件清单（POSIX 相对路径，如 git ls-tree 的输出）中按与 walk_skill_roots 相同的规则查找 skill 根目录。
+
+    Args:
+        read_ignore: 读取清单中 .skillignore 内容的回调（参数为相对路径）；缺省时不应用 .skillignore
+    """
+    children: dict[str, set[str]] = {}
+    for path in paths:
+        parts = path.split("/")
+        for depth in range(len(parts)):
+            parent = "/".join(parts[:depth]) or "."
+            children.setdefault(parent, set()).add(parts[depth])
+
+    skills: list[str] = []
+    stack: list[tuple[str, IgnoreMatcher]] = [(".", IgnoreMatcher())]
+    while stack:
+        rel, matcher = stack.pop()
+        names = children.get(rel, set())
+        prefix = "" if rel == "." else f"{rel}/"
+        if SKILL_FILENAME in names and prefix + SKILL_FILENAME not in children:
+            skills.append(rel)
+            continue
+        if read_ignore is not None and IGNORE_FILENAME in names and prefix + IGNORE_FILENAME not in children:
+            matcher = matcher.extend(read_ignore(prefix + IGNORE_FILENAME), prefix)
+        for name in names:
+            child = prefix + name
+            if not is_pruned_dir(name) and child in children and not matcher.is_ignored(child, is_dir=True):
+                stack.append((child, matcher))
+    return sorted(skills)
+
+
+class DiscoveryCache:
+    """按源目录缓存的 skill 发现结果，以目录 mtime 失效。"""
+
+    def __init__(self, path: Path | None = None) -> None:
+        self._path = path or state_dir() / "discovery-cache.json"
+        self._roots: dict[str, dict] = {}
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._dirty = False
+
+    def _load(self) -> None:
+        if self._loaded:
+            return
+        self._loaded = True
+        try:
+            data = json.loads(self._path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+        if data.get("version") == CACHE_VERSION:
+            self._roots = data.get("roots", {})
+
+    def find_skill_roots(self, root: Path, refresh: bool = False) -> list[Path]:
+        """返回 root 下的 skill 根目录（已排序），缓存有效时只做 stat。
+
+        Args:
+            refresh: 忽略已有缓存，重新遍历（结果仍会写回缓存）
+        """
+        key = str(root)
+        with self._lock:
+            self._load()
+            cached = None if refresh else self._roots.get(key)
+        if cached is not None and self._is_fresh(root, cached["dirs"]):
+            return [root if rel == "." else root / rel for rel in cached["skills"]]
+
+        skills, visited = walk_skill_roots(root)
+        now = time.time_ns()
+        if all(now - mtime >= _RACY_WINDOW_NS for mtime in visited.values()):
+            with self._lock:
+                self._roots[key] = {"skills": skills, "dirs": visited}
+                self._dirty = True
+        return [root if rel == "." else root / rel for rel in skills]
+
+    @staticmethod
+    def _is_fresh(root: Path, dirs: dict[str, int]) -> bool:
+        root_str = str(root)
+        for rel, mtime in dirs.items():
+            path = root_str if rel == "." else os.path.join(root_str, rel)
+            try:
+                if os.stat(path).st_mtime_ns != mtime:
+                    return False
+            except OSError:
+                return False
+        return True
+
+    def save(self) -> None:
+        """原子写回缓存文件（无变化时不写）。"""
+        with self._lock:
+            if not self._dirty:
+                return
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self._path.with_name(f"{self._path.name}.{os.getpid()}.tmp")
+            payload = {"version": CACHE_VERSION, "roots": self._roots}
+            tmp.write_text(json.dumps(payload, ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
+            os.replace(tmp, self._path)
+            self._dirty = False
+
+
+# 全局缓存实例（延迟初始化）
+_global_discovery_cache: DiscoveryCache | None = None
+
+
+def get_discovery_cache() -> DiscoveryCache:
+    """获取全局发现缓存实例（单例模式）。"""
+    global _global_discovery_cache
+    if _global_discovery_cache is None:
+        _global_discovery_cache = DiscoveryCache()
+    return _global_discovery_cache
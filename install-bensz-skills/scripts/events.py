@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""Streaming NDJSON events for install-bensz-skills (--output ndjson).
+
+每个动作发生时立即输出一行 JSON（换行分隔），供 CI 与外部编排工具逐行读取：
+
+- ``discovered``：发现一个 skill（含类型与来源）
+- ``waiting``：目标正被其他安装进程占用，开始等待目标锁
+- ``skipped``：skill 未变化，或为辅助/测试技能
+- ``removed``：删除目标中的目录或旧软链接
+- ``copied``：skill 已安装/同步（含新增、变化、删除的文件数）
+- ``fsck``：--fsck 检查一个已安装 skill 的结果（缺失、被修改、多余的文件）
+- ``manifest-saved``：安装索引或运行 manifest 已写入
+- ``error``：出错
+- ``summary``：运行结束时的汇总（最后一行）
+
+每个事件都带有 ``event`` 与 ``ts``（Unix 时间戳）字段；其余字段随事件类型而定。
+"""
+from __future__ import annotations
+
+import json
+import threading
+import time
+from typing import TextIO
+
+
+class OutputFormat:
+    TEXT = "text"
+    NDJSON = "ndjson"
+
+
+OUTPUT_FORMATS = [OutputFormat.TEXT, OutputFormat.NDJSON]
+
+
+class EventStream:
+    """线程安全的事件输出；未配置输出流时（text 模式）所有事件均为空操作。"""
+
+    def __init__(self, stream: TextIO | None = None) -> None:
+        self._stream = stream
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self._stream is not None
+
+    def emit(self, event: str, **fields) -> None:
+        """输出一个事件（整行写入并立即 flush，多线程输出的行不会交错）。"""
+        if self._stream is None:
+            return
+        with self._lock:
+            record = {"event": event, "ts": round(time.time(), 6), **fields}
+            self._stream.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+            self._stream.flush()
+
+
+# 全局事件流（main 每次运行时重新配置）
+_global_events = EventStream()
+
+
+def get_events() -> EventStream:
+    """获取全局事件流。"""
+    return _global_events
+
+
+def configure_events(stream: TextIO | None) -> EventStream:
+    """配置全局事件流：传入输出流时启用 NDJSON 事件，传入 None 时关闭。"""
+    global _global_events
+    _global_events = EventStream(stream)
+    return _global_events
@@ -0,0 +1,498 @@
+#!/usr/bin/env python3
+"""Content fingerprinting for install-bensz-skills.
+
+为每个 skill 计算“全目录内容指纹”，并用持久化的 stat 缓存避免重复读取：
+
+- 指纹覆盖 skill 目录下所有会被安装的文件（与复制共用同一个 .skillignore 匹配器），
+  因此修改脚本、模板等任意文件都会触发重新安装；
+- 缓存以 (path, size, mtime_ns, inode) 为键，文件未变化时不再读取内容，
+  空跑（no-op）只需要 stat 调用；写回时淘汰本次遍历过的目录中已不存在的文件，
+  条目总数超过上限时只保留本次用到的条目；
+- 哈希算法可选（md5/sha256/blake2b/xxh3），每种算法各有一份 stat 缓存；
+  文件以固定大小的块（大文件经由 mmap）流式哈希，内存占用与文件大小无关；
+- 缓存未命中的文件数或字节数超过阈值时，逐文件哈希分发到进程池，
+  文件摘要仍按相对路径排序组合，结果与串行计算完全一致。
+"""
+from __future__ import annotations
+
+import atexit
+import fnmatch
+import hashlib
+import json
+import mmap
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+
+from ignore import IgnoreMatcher, SymlinkCycleGuard, UnionMatcher, get_ignore_registry
+from timings import count_io
+
+# 安装器写入目标目录的元数据文件（不属于 skill 内容，不参与指纹与同步）
+INSTALLER_METADATA_PATTERNS: tuple[str, ...] = (
+    ".skill-manifest*.json",
+)
+
+# 缓存文件格式版本（格式不兼容时整体丢弃旧缓存）
+CACHE_VERSION = 1
+
+# 缓存条目数上限（超过时只保留本次运行用到的条目）
+MAX_CACHE_ENTRIES = 200_000
+
+# mtime 距今小于该值的文件不写入缓存，避免同一时间粒度内的二次修改被漏检
+_RACY_WINDOW_NS = 2_000_000_000
+
+# 流式读取的块大小
+_CHUNK_SIZE = 1024 * 1024
+
+# 不小于该大小的文件经由 mmap 哈希（省去 read 的内核到用户态复制）
+_MMAP_THRESHOLD = 4 * 1024 * 1024
+
+try:
+    import xxhash
+except ImportError:  # pragma: no cover - xxhash 为可选依赖
+    xxhash = None
+
+# 可选的哈希算法（md5 为默认值，与旧版 manifest/索引兼容；git 为 git blob 对象 ID）
+HASH_ALGORITHMS: tuple[str, ...] = ("md5", "sha256", "blake2b", "xxh3", "git")
+DEFAULT_HASH = "md5"
+
+_default_algorithm = DEFAULT_HASH
+
+
+def new_hasher(algo: str | None = None, size: int | None = None):
+    """创建指定算法的哈希对象（缺省为当前默认算法）。
+
+    git 算法计算 git blob 对象 ID（SHA-1 of ``blob <size>\\0`` + 内容），需要预先给出内容长度；
+    不给出 size 时为普通 SHA-1（用于组合整体摘要）。
+    """
+    algo = algo or _default_algorithm
+    if algo == "md5":
+        return hashlib.md5()
+    if algo == "sha256":
+        return hashlib.sha256()
+    if algo == "blake2b":
+        return hashlib.blake2b(digest_size=32)
+    if algo == "xxh3":
+        if xxhash is None:
+            raise ValueError("哈希算法 xxh3 需要安装 xxhash（pip install xxhash）")
+        return xxhash.xxh3_128()
+    if algo == "git":
+        hasher = hashlib.sha1()
+        if size is not None:
+            hasher.update(b"blob %d\0" % size)
+        return hasher
+    raise ValueError(f"不支持的哈希算法: {algo}")
+
+
+def available_algorithms() -> list[str]:
+    """当前环境可用的哈希算法。"""
+    return [algo for algo in HASH_ALGORITHMS if algo != "xxh3" or xxhash is not None]
+
+
+def set_default_algorithm(algo: str) -> None:
+    """设置本进程的默认哈希算法（指纹、stat 缓存与对象摘要均使用该算法）。"""
+    global _default_algorithm
+    new_hasher(algo)  # 校验算法可用
+    _default_algorithm = algo
+
+
+def default_algorithm() -> str:
+    return _default_algorithm
+
+
+def state_dir() -> Path:
+    """安装器的用户级状态目录（~/.bensz-skills）。"""
+    return Path.home() / ".bensz-skills"
+
+
+def is_installer_metadata(name: str) -> bool:
+    """判断文件名是否为安装器自身写入的元数据文件。"""
+    return any(fnmatch.fnmatch(name, pattern) for pattern in INSTALLER_METADATA_PATTERNS)
+
+
+@dataclass(frozen=True)
+class FileEntry:
+    """指纹中的单个文件条目。"""
+    size: int
+    digest: str
+
+
+@dataclass(frozen=True)
+class TreeFingerprint:
+    """skill 目录的内容指纹。
+
+    Attributes:
+        digest: 按相对路径排序后组合所有文件摘要得到的整体摘要
+        files: 相对路径（POSIX 格式）到文件条目的映射
+        algo: 计算摘要使用的哈希算法
+    """
+    digest: str
+    files: dict[str, FileEntry]
+    algo: str = DEFAULT_HASH
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(entry.size for entry in self.files.values())
+
+
+class StatCache:
+    """以 (path, size, mtime_ns, inode) 为键的文件摘要缓存。
+
+    缓存保存在 ~/.bensz-skills/stat-cache.json（md5）或 stat-cache.<算法>.json，线程安全；
+    只有 stat 信息完全一致时才复用摘要，否则重新读取文件。
+
+    写回时淘汰条目：完整遍历过的目录（见 `mark_walked`）下本次未再出现的路径（已删除、改名或被忽略）
+    会被删除；条目数仍超过 MAX_CACHE_ENTRIES 时，只保留本次运行查询或写入过的条目。
+    """
+
+    def __init__(self, path: Path | None = None, algo: str = DEFAULT_HASH) -> None:
+        self.algo = algo
+        name = "stat-cache.json" if algo == DEFAULT_HASH else f"stat-cache.{algo}.json"
+        self._path = path or state_dir() / name
+        self._entries: dict[str, list] = {}
+        self._seen: set[str] = set()
+        self._walked: set[str] = set()
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._dirty = False
+
+    @property
+    def path(self) -> Path:
+        return self._path
+
+    def load(self) -> None:
+        """从磁盘加载缓存（只加载一次；文件损坏时视为空缓存）。"""
+        with self._lock:
+            if self._loaded:
+                return
+            self._loaded = True
+            try:
+                data = json.loads(self._path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                return
+            if data.get("version") == CACHE_VERSION:
+                self._entries = data.get("entries", {})
+
+    def reload(self) -> None:
+        """合并其他进程写回磁盘的条目（内存中已有的条目优先；等待目标锁之后调用）。"""
+        try:
+            data = json.loads(self._path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+        if data.get("version") != CACHE_VERSION:
+            return
+        with self._lock:
+            self._loaded = True
+            for path, entry in data.get("entries", {}).items():
+                self._entries.setdefault(path, entry)
+
+    def lookup(self, path: str, st: os.stat_result) -> str | None:
+        """返回缓存的摘要；stat 信息不一致时返回 None。"""
+        if not self._loaded:
+            self.load()
+        self._seen.add(path)
+        entry = self._entries.get(path)
+        if entry is None:
+            return None
+        size, mtime_ns, ino, digest = entry
+        if size == st.st_size and mtime_ns == st.st_mtime_ns and ino == st.st_ino:
+            return digest
+        return None
+
+    def store(self, path: str, st: os.stat_result, digest: str) -> None:
+        """记录文件摘要（刚修改过的文件不缓存）。"""
+        if time.time_ns() - st.st_mtime_ns < _RACY_WINDOW_NS:
+            return
+        with self._lock:
+            self._seen.add(path)
+            self._entries[path] = [st.st_size, st.st_mtime_ns, st.st_ino, digest]
+            self._dirty = True
+
+    def mark_walked(self, root: str) -> None:
+        """记录本次完整遍历过的目录（其中未再出现的条目在写回时淘汰）。"""
+        with self._lock:
+            self._walked.add(root)
+
+    def _evict(self) -> None:
+        """淘汰过期条目（调用方持有锁）。"""
+        walked = self._walked
+
+        def _under_walked(path: str) -> bool:
+            parent = os.path.dirname(path)
+            while parent not in walked:
+                grandparent = os.path.dirname(parent)
+                if grandparent == parent:
+                    return False
+                parent = grandparent
+            return True
+
+        stale = [path for path in self._entries if path not in self._seen and _under_walked(path)] if walked else []
+        if len(self._entries) - len(stale) > MAX_CACHE_ENTRIES:
+            stale = [path for path in self._entries if path not in self._seen]
+        for path in stale:
+            del self._entries[path]
+        if stale:
+            self._dirty = True
+
+    def save(self) -> None:
+        """淘汰过期条目后原子写回缓存文件（无变化时不写）。"""
+        with self._lock:
+            self._evict()
+            if not self._dirty:
+                return
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self._path.with_name(f"{self._path.name}.{os.getpid()}.tmp")
+            payload = {"version": CACHE_VERSION, "entries": self._entries}
+            tmp.write_text(json.dumps(payload, ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
+            os.replace(tmp, self._path)
+            self._dirty = False
+
+
+def hash_file(path: Path, algo: str | None = None) -> str:
+    """流式计算单个文件的摘要（内存占用与文件大小无关）。
+
+    小文件复用同一块缓冲区分块读取；大文件经由 mmap 按块送入哈希对象。
+    """
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        hasher = new_hasher(algo, size)
+        if size >= _MMAP_THRESHOLD:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, memoryview(mm) as view:
+                for offset in range(0, size, _CHUNK_SIZE):
+                    hasher.update(view[offset:offset + _CHUNK_SIZE])
+            return hasher.hexdigest()
+        buffer = bytearray(min(_CHUNK_SIZE, max(size, 1)))
+        view = memoryview(buffer)
+        while True:
+            n = f.readinto(buffer)
+            if not n:
+                break
+            hasher.update(view[:n])
+    return hasher.hexdigest()
+
+
+def hash_bytes(data: bytes | memoryview, algo: str | None = None) -> str:
+    """计算内存中数据的摘要（与 hash_file 结果一致）。"""
+    hasher = new_hasher(algo, len(data))
+    hasher.update(data)
+    return hasher.hexdigest()
+
+
+def iter_tree_files(root: Path, matcher: IgnoreMatcher | UnionMatcher | None = None):
+    """遍历 skill 目录下参与指纹/安装的文件。
+
+    与复制时使用同一个忽略匹配器（缺省为该目录的 .skillignore 匹配器；被忽略的目录不会被深入遍历），
+    另外跳过安装器写入的平台 manifest。跟随软链接，但形成环的软链接目录不再深入。
+
+    Yields:
+        (相对路径 POSIX 字符串, 绝对路径字符串)
+    """
+    matcher = matcher if matcher is not None else get_ignore_registry().for_path(root)
+    root_str = str(root)
+    guard = SymlinkCycleGuard(root_str)
+    for dirpath, dirnames, filenames in os.walk(root_str, followlinks=True):
+        rel_dir = os.path.relpath(dirpath, root_str).replace(os.sep, "/")
+        prefix = "" if rel_dir == "." else f"{rel_dir}/"
+        dirnames[:] = [
+            d for d in dirnames
+            if not matcher.is_ignored(prefix + d, is_dir=True) and not guard.is_cycle(dirpath, d)
+        ]
+        for name in filenames:
+            if is_installer_metadata(name) or matcher.is_ignored(prefix + name):
+                continue
+            yield prefix + name, os.path.join(dirpath, name)
+
+
+@dataclass
+class ParallelHashing:
+    """进程池哈希的配置。
+
+    Attributes:
+        processes: 进程数（<= 1 表示不使用进程池）
+        min_files: 单个 skill 中缓存未命中的文件数达到该值时使用进程池
+        min_bytes: 或缓存未命中的总字节数达到该值时使用进程池
+    """
+    processes: int = os.cpu_count() or 1
+    min_files: int = 256
+    min_bytes: int = 64 * 1024 * 1024
+
+    def should_parallelize(self, files: int, total_bytes: int) -> bool:
+        return self.processes > 1 and files > 1 and (files >= self.min_files or total_bytes >= self.min_bytes)
+
+
+_parallel_hashing = ParallelHashing()
+_process_pool: ProcessPoolExecutor | None = None
+_process_pool_lock = threading.Lock()
+
+
+def configure_parallel_hashing(
+    processes: int | None = None, min_files: int | None = None, min_bytes: int | None = None
+) -> ParallelHashing:
+    """调整进程池哈希的进程数与阈值（None 表示保持不变）。"""
+    global _parallel_hashing
+    current = _parallel_hashing
+    _parallel_hashing = ParallelHashing(
+        processes=current.processes if processes is None else processes,
+        min_files=current.min_files if min_files is None else min_files,
+        min_bytes=current.min_bytes if min_bytes is None else min_bytes,
+    )
+    return _parallel_hashing
+
+
+def _get_process_pool() -> ProcessPoolExecutor:
+    """全局共享的哈希进程池（延迟创建，进程退出时关闭）。
+
+    调用方通常是多线程的，因此不用 fork 启动子进程（fork 多线程进程可能继承被占用的锁）。
+    """
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is None:
+            method = "forkserver" if sys.platform.startswith("linux") else "spawn"
+            _process_pool = ProcessPoolExecutor(
+                max_workers=_parallel_hashing.processes, mp_context=multiprocessing.get_context(method)
+            )
+            atexit.register(_process_pool.shutdown)
+        return _process_pool
+
+
+def _hash_file_task(args: tuple[str, str]) -> str:
+    """进程池任务：计算单个文件的摘要。"""
+    path, algo = args
+    return hash_file(Path(path), algo)
+
+
+def _hash_missing(missing: list[tuple[str, str, os.stat_result]], algo: str) -> list[str]:
+    """计算缓存未命中的文件摘要：超过阈值时分发到进程池，否则在当前线程中串行计算。"""
+    total_bytes = sum(st.st_size for _, _, st in missing)
+    count_io(read=total_bytes)
+    if _parallel_hashing.should_parallelize(len(missing), total_bytes):
+        pool = _get_process_pool()
+        chunksize = max(1, len(missing) // (_parallel_hashing.processes * 4))
+        return list(pool.map(_hash_file_task, [(abs_path, algo) for _, abs_path, _ in missing], chunksize=chunksize))
+    return [hash_file(Path(abs_path), algo) for _, abs_path, _ in missing]
+
+
+def fingerprint_tree(
+    root: Path,
+    cache: StatCache | None = None,
+    algo: str | None = None,
+    rehash: bool = False,
+    matcher: IgnoreMatcher | UnionMatcher | None = None,
+) -> TreeFingerprint:
+    """计算目录的全内容指纹。
+
+    每个文件先 stat 并查询缓存，仅在缓存未命中时读取内容（数量或大小超过阈值时由进程池并行计算）；
+    整体摘要按相对路径排序组合，结果与遍历顺序和并行方式无关。
+
+    Args:
+        algo: 哈希算法（缺省为当前默认算法；提供 cache 时以 cache 的算法为准）
+        rehash: 不信任缓存，逐个读取文件内容（结果仍写回缓存；用于 --verify 校验已安装文件）
+        matcher: 忽略匹配器（缺省为该目录的 .skillignore 匹配器；已安装目录应传入源 skill 对应的匹配器）
+    """
+    cache = cache if cache is not None else get_stat_cache(algo)
+    algo = cache.algo
+    files: dict[str, FileEntry] = {}
+    missing: list[tuple[str, str, os.stat_result]] = []
+    for rel, abs_path in iter_tree_files(root, matcher):
+        try:
+            st = os.stat(abs_path)
+        except OSError:
+            continue
+        digest = None if rehash else cache.lookup(abs_path, st)
+        if digest is None:
+            missing.append((rel, abs_path, st))
+        else:
+            files[rel] = FileEntry(size=st.st_size, digest=digest)
+
+    for (rel, abs_path, st), digest in zip(missing, _hash_missing(missing, algo)):
+        cache.store(abs_path, st, digest)
+        files[rel] = FileEntry(size=st.st_size, digest=digest)
+    cache.mark_walked(str(root))
+
+    return TreeFingerprint(digest=combine_digests(files, algo), files=files, algo=algo)
+
+
+def combine_digests(files: dict[str, FileEntry], algo: str | None = None) -> str:
+    """按相对路径排序组合文件摘要，得到整体摘要（与文件来源无关：目录、bundle 索引或 git 树）。"""
+    hasher = new_hasher(algo)
+    for rel in sorted(files):
+        hasher.update(f"{rel}\0{files[rel].digest}\n".encode("utf-8"))
+    return hasher.hexdigest()
+
+
+class FingerprintMemo:
+    """单次运行内的源目录指纹备忘录。
+
+    多个目标/线程并发请求同一 skill 的指纹时只计算一次，其余调用等待结果。
+    """
+
+    def __init__(self, cache: StatCache | None = None, algo: str | None = None) -> None:
+        self._cache = cache
+        self._algo = algo
+        self._futures: dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def put(self, root: Path, fingerprint: TreeFingerprint) -> None:
+        """预先登记已知的指纹（如 skillpack 索引中的指纹），之后 get 不再计算。"""
+        future: Future = Future()
+        future.set_result(fingerprint)
+        with self._lock:
+            self._futures[str(root)] = future
+
+    def get(self, root: Path) -> TreeFingerprint:
+        key = str(root)
+        with self._lock:
+            future = self._futures.get(key)
+            owner = future is None
+            if owner:
+                future = self._futures[key] = Future()
+        if owner:
+            try:
+                future.set_result(fingerprint_tree(root, self._cache, self._algo))
+            except BaseException as exc:
+                future.set_exception(exc)
+                raise
+        return future.result()
+
+
+def empty_fingerprint(algo: str | None = None) -> TreeFingerprint:
+    """空目录（或不存在的目录）的指纹（缺省为当前默认算法；摘要与算法一致）。"""
+    algo = algo or _default_algorithm
+    return TreeFingerprint(digest=combine_digests({}, algo), files={}, algo=algo)
+
+
+# 全局缓存实例（每种算法一个，延迟初始化）
+_global_stat_caches: dict[str, StatCache] = {}
+_global_stat_caches_lock = threading.Lock()
+
+
+def get_stat_cache(algo: str | None = None) -> StatCache:
+    """获取指定算法（缺省为当前默认算法）的全局 stat 缓存实例（单例模式）。"""
+    algo = algo or _default_algorithm
+    with _global_stat_caches_lock:
+        cache = _global_stat_caches.get(algo)
+        if cache is None:
+            cache = _global_stat_caches[algo] = StatCache(algo=algo)
+        return cache
+
+
+def save_stat_caches() -> None:
+    """写回本进程用到的所有 stat 缓存。"""
+    with _global_stat_caches_lock:
+        caches = list(_global_stat_caches.values())
+    for cache in caches:
+        cache.save()
+
+
+def reload_stat_caches() -> None:
+    """合并其他进程写回的 stat 缓存（当前默认算法的缓存总会被合并）。"""
+    get_stat_cache()
+    with _global_stat_caches_lock:
+        caches = list(_global_stat_caches.values())
+    for cache in caches:
+        cache.reload()
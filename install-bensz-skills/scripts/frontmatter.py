@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""SKILL.md frontmatter reader for install-bensz-skills.
+
+每次运行每个 skill 只读取一次 SKILL.md，分类、报告与哈希共用同一份结果：
+
+- 只解析开头的 YAML frontmatter（name、description、version、category、tags）：
+  忽略 UTF-8 BOM，起始分隔线可以出现在前 30 行中的任意一行（与旧版行为一致，允许前导空行或注释）；
+- 小文件整体读取一次，顺便计算摘要并预填 stat 缓存，随后的指纹计算无需再读；
+- 解析结果按文件摘要缓存在 ~/.bensz-skills/frontmatter-cache.json，
+  文件未变化（stat 缓存命中）时完全不读取文件；条目超过上限（与 stat 缓存相同）时只保留本次用到的条目。
+"""
+from __future__ import annotations
+
+import json
+import os
+import threading
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Callable
+
+from fingerprint import MAX_CACHE_ENTRIES, StatCache, get_stat_cache, hash_bytes, state_dir
+from timings import count_io
+
+try:
+    import yaml
+except ImportError:  # pragma: no cover - PyYAML 为可选依赖
+    yaml = None
+
+SKILL_FILENAME = "SKILL.md"
+
+# 不超过该大小的 SKILL.md 整体读取（同时得到摘要）；更大的文件只读取 frontmatter 部分
+_WHOLE_READ_LIMIT = 256 * 1024
+
+# frontmatter 起始分隔线所在行的搜索范围
+_FRONTMATTER_SEARCH_LINES = 30
+
+CACHE_VERSION = 2
+
+
+@dataclass(frozen=True)
+class SkillMetadata:
+    """SKILL.md frontmatter 中的元数据。"""
+    name: str | None = None
+    description: str | None = None
+    version: str | None = None
+    category: str | None = None
+    tags: tuple[str, ...] = field(default_factory=tuple)
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        data["tags"] = list(self.tags)
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict) -> SkillMetadata:
+        return cls(
+            name=data.get("name"),
+            description=data.get("description"),
+            version=data.get("version"),
+            category=data.get("category"),
+            tags=tuple(data.get("tags") or ()),
+        )
+
+
+EMPTY_METADATA = SkillMetadata()
+
+
+def _split_frontmatter(text: str) -> str | None:
+    """返回 frontmatter 文本（不含分隔线）；没有 frontmatter 时返回 None。
+
+    起始分隔线为前 _FRONTMATTER_SEARCH_LINES 行中的第一条 ``---``（忽略 BOM）。
+    """
+    lines = text.removeprefix("\ufeff").splitlines()
+    start = next(
+        (i for i, line in enumerate(lines[:_FRONTMATTER_SEARCH_LINES]) if line.strip() == "---"), None
+    )
+    if start is None:
+        return None
+    for i, line in enumerate(lines[start + 1:], start=start + 1):
+        if line.strip() in {"---", "..."}:
+            return "\n".join(lines[start + 1:i])
+    return None
+
+
+def _strip_quotes(value: str) -> str:
+    value = value.strip()
+    if len(value) >= 2 and value[0] == value[-1] and value[0] in {'"', "'"}:
+        return value[1:-1]
+    return value
+
+
+def _parse_simple_yaml(text: str) -> dict:
+    """未安装 PyYAML 时的简易解析：支持 `key: value`、`[a, b]` 行内列表与 `- item` 块列表。"""
+    data: dict = {}
+    current: str | None = None
+    for line in text.splitlines():
+        if not line.strip() or line.lstrip().startswith("#"):
+            continue
+        stripped = line.strip()
+        if stripped.startswith("- ") and current is not None and line[:1] in {" ", "-"}:
+            if not isinstance(data.get(current), list):
+                data[current] = []
+            data[current].append(_strip_quotes(stripped[2:]))
+            continue
+        if line[:1] in {" ", "\t"} or ":" not in line:
+            continue
+        key, value = line.split(":", 1)
+        current = key.strip()
+        value = value.split(" #", 1)[0].strip()
+        if value.startswith("[") and value.endswith("]"):
+            data[current] = [_strip_quotes(v) for v in value[1:-1].split(",") if v.strip()]
+        else:
+            data[current] = _strip_quotes(value) if value else None
+    return data
+
+
+def parse_frontmatter(text: str) -> SkillMetadata:
+    """解析 SKILL.md 文本开头的 frontmatter（格式错误时返回空元数据）。"""
+    block = _split_frontmatter(text)
+    if block is None:
+        return EMPTY_METADATA
+    data: object
+    if yaml is not None:
+        try:
+            # BaseLoader 保留标量原文（如 version: 1.10 不会变成浮点数 1.1）
+            data = yaml.load(block, Loader=yaml.BaseLoader)
+        except yaml.YAMLError:
+            data = _parse_simple_yaml(block)
+    else:
+        data = _parse_simple_yaml(block)
+    if not isinstance(data, dict):
+        return EMPTY_METADATA
+
+    def _str(key: str) -> str | None:
+        value = data.get(key)
+        return None if value is None else str(value).strip()
+
+    tags = data.get("tags") or ()
+    if isinstance(tags, str):
+        tags = [t for t in (part.strip() for part in tags.split(",")) if t]
+    category = _str("category")
+    return SkillMetadata(
+        name=_str("name"),
+        description=_str("description"),
+        version=_str("version"),
+        category=category.lower() if category else None,
+        tags=tuple(str(tag) for tag in tags) if isinstance(tags, (list, tuple)) else (),
+    )
+
+
+def _read_header(path: Path) -> str:
+    """只读取 frontmatter 部分（大文件使用）。"""
+    lines: list[str] = []
+    opened = False
+    with open(path, encoding="utf-8-sig", errors="replace") as f:
+        for i, line in enumerate(f):
+            lines.append(line)
+            if opened and line.strip() in {"---", "..."}:
+                break
+            if not opened:
+                if line.strip() == "---":
+                    opened = True
+                elif i + 1 >= _FRONTMATTER_SEARCH_LINES:
+                    break
+    return "".join(lines)
+
+
+class FrontmatterCache:
+    """按文件摘要缓存的 frontmatter 解析结果，线程安全。"""
+
+    def __init__(self, path: Path | None = None, stat_cache: StatCache | None = None) -> None:
+        self._path = path or state_dir() / "frontmatter-cache.json"
+        self._stat_cache = stat_cache
+        self._entries: dict[str, dict] = {}
+        self._memo: dict[str, tuple[tuple[int, int, int], SkillMetadata]] = {}
+        self._seen: set[str] = set()
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._dirty = False
+
+    def _load(self) -> None:
+        if self._loaded:
+            return
+        self._loaded = True
+        try:
+            data = json.loads(self._path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+        if data.get("version") == CACHE_VERSION:
+            self._entries = data.get("entries", {})
+
+    def read(self, skill_dir: Path) -> SkillMetadata:
+        """读取 skill 的元数据（文件未变化时同一进程内最多读取一次）。"""
+        skill_md = skill_dir / SKILL_FILENAME
+        key = str(skill_md)
+        try:
+            st = os.stat(skill_md)
+        except OSError:
+            return EMPTY_METADATA
+        signature = (st.st_size, st.st_mtime_ns, st.st_ino)
+        with self._lock:
+            memo = self._memo.get(key)
+        if memo is not None and memo[0] == signature:
+            return memo[1]
+        metadata = self._read_uncached(skill_md, st)
+        with self._lock:
+            self._memo[key] = (signature, metadata)
+        return metadata
+
+    def _read_uncached(self, skill_md: Path, st: os.stat_result) -> SkillMetadata:
+        stat_cache = self._stat_cache if self._stat_cache is not None else get_stat_cache()
+        digest = stat_cache.lookup(str(skill_md), st)
+        if digest is not None:
+            with self._lock:
+                self._load()
+                self._seen.add(digest)
+                cached = self._entries.get(digest)
+            if cached is not None:
+                return SkillMetadata.from_dict(cached)
+
+        try:
+            if st.st_size > _WHOLE_READ_LIMIT:
+                return parse_frontmatter(_read_header(skill_md))
+            raw = skill_md.read_bytes()
+        except OSError:
+            return EMPTY_METADATA
+        count_io(read=len(raw))
+        metadata = parse_frontmatter(raw.decode("utf-8", errors="replace"))
+        if digest is None:
+            # 与 fingerprint.hash_file 相同的摘要：预填 stat 缓存，指纹计算时不再读取该文件
+            digest = hash_bytes(raw, stat_cache.algo)
+            stat_cache.store(str(skill_md), st, digest)
+        with self._lock:
+            self._load()
+            self._seen.add(digest)
+            self._entries[digest] = metadata.to_dict()
+            self._dirty = True
+        return metadata
+
+    def read_digest(self, digest: str, load: Callable[[], bytes]) -> SkillMetadata:
+        """按内容摘要读取元数据（用于不在本地文件系统中的 SKILL.md，如 git blob）；未命中时才调用 load。"""
+        with self._lock:
+            self._load()
+            self._seen.add(digest)
+            cached = self._entries.get(digest)
+        if cached is not None:
+            return SkillMetadata.from_dict(cached)
+        raw = load()
+        count_io(read=len(raw))
+        metadata = parse_frontmatter(raw.decode("utf-8", errors="replace"))
+        with self._lock:
+            self._entries[digest] = metadata.to_dict()
+            self._dirty = True
+        return metadata
+
+    def save(self) -> None:
+        """原子写回缓存文件（无变化时不写；条目超过 MAX_CACHE_ENTRIES 时只保留本次用到的条目）。"""
+        with self._lock:
+            if len(self._entries) > MAX_CACHE_ENTRIES:
+                self._entries = {digest: entry for digest, entry in self._entries.items() if digest in self._seen}
+                self._dirty = True
+            if not self._dirty:
+                return
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self._path.with_name(f"{self._path.name}.{os.getpid()}.tmp")
+            payload = {"version": CACHE_VERSION, "entries": self._entries}
+            tmp.write_text(json.dumps(payload, ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
+            os.replace(tmp, self._path)
+            self._dirty = False
+
+
+# 全局缓存实例（延迟初始化）
+_global_frontmatter_cache: FrontmatterCache | None = None
+
+
+def get_frontmatter_cache() -> FrontmatterCache:
+    """获取全局 frontmatter 缓存实例（单例模式）。"""
+    global _global_frontmatter_cache
+    if _global_frontmatter_cache is None:
+        _global_frontmatter_cache = FrontmatterCache()
+    return _global_frontmatter_cache
+
+
+def read_skill_metadata(skill_dir: Path) -> SkillMetadata:
+    """读取 skill 目录下 SKILL.md 的元数据。"""
+    return get_frontmatter_cache().read(skill_dir)
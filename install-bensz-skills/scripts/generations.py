@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""Generation-based atomic installs for install-bensz-skills.
+
+目标目录布局（启用 generations 后）：
+
+- <root>/.bensz-generations/versions/<name>-<指纹前12位>-<构建号>/：不可变的 skill 版本目录；
+- <root>/.bensz-generations/<N>.json：第 N 代记录（skill 名 → 版本目录名）；
+- <root>/.bensz-generations/current：当前代号；
+- <root>/<name>：指向版本目录的相对软链接。
+
+新版本先在 staging 目录中构建完整，再通过 os.replace 原子替换软链接，
+运行中的 agent 不会看到缺失或写了一半的 skill；回滚只需切换软链接，
+耗时与 skill 大小无关。
+"""
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from fingerprint import is_installer_metadata
+
+GENERATIONS_DIRNAME = ".bensz-generations"
+
+
+@dataclass
+class Generation:
+    """一代安装记录。"""
+    number: int
+    created_at: str
+    skills: dict[str, str] = field(default_factory=dict)  # skill 名 → 版本目录名
+
+
+class GenerationError(RuntimeError):
+    """generation 操作失败（如目标代不存在、版本目录已被清理）。"""
+
+
+def is_enabled(root: Path) -> bool:
+    """目标目录是否已经使用 generations 布局。"""
+    return (root / GENERATIONS_DIRNAME / "current").exists()
+
+
+class GenerationManager:
+    """管理单个目标目录下的版本目录、代记录与软链接切换。"""
+
+    def __init__(self, root: Path) -> None:
+        self.root = root
+        self.base = root / GENERATIONS_DIRNAME
+        self.versions_dir = self.base / "versions"
+        self.staging_dir = self.base / "staging"
+        self._lock = threading.Lock()
+
+    # ---- 版本目录 ----
+
+    def find_version(self, name: str, digest: str) -> Path | None:
+        """查找已构建的同内容版本目录（用于前滚/重装时直接复用）。"""
+        if not self.versions_dir.is_dir():
+            return None
+        matches = sorted(self.versions_dir.glob(f"{name}-{digest[:12]}-*"))
+        return matches[-1] if matches else None
+
+    def active_version(self, name: str) -> Path | None:
+        """返回 <root>/<name> 当前指向的版本目录（不是 generations 软链接时返回 None）。"""
+        link = self.root / name
+        if not link.is_symlink():
+            return None
+        resolved = (self.root / os.readlink(link)).resolve()
+        if resolved.parent != self.versions_dir.resolve() or not resolved.is_dir():
+            return None
+        return self.versions_dir / resolved.name
+
+    def new_staging(self, name: str, base: Path | None = None) -> Path:
+        """创建 staging 目录；提供 base 时以硬链接克隆其内容（版本目录不可变，共享 inode 安全）。
+
+        安装器元数据文件不会被克隆，以免随后重写时改动旧版本。
+        """
+        self.staging_dir.mkdir(parents=True, exist_ok=True)
+        staging = self.staging_dir / f"{name}-{uuid.uuid4().hex[:8]}"
+        if base is None:
+            staging.mkdir()
+            return staging
+
+        def _ignore(_dir: str, names: list[str]) -> set[str]:
+            return {n for n in names if is_installer_metadata(n)}
+
+        shutil.copytree(base, staging, symlinks=True, ignore=_ignore, copy_function=os.link)
+        return staging
+
+    def commit_version(self, staging: Path, name: str, digest: str) -> Path:
+        """把构建完成的 staging 目录转为不可变版本目录。
+
+        每次构建使用独立的构建号，强制重建同一内容时也不会改动正在使用的版本目录。
+        """
+        version = self.versions_dir / f"{name}-{digest[:12]}-{uuid.uuid4().hex[:8]}"
+        self.versions_dir.mkdir(parents=True, exist_ok=True)
+        os.rename(staging, version)
+        return version
+
+    def activate(self, name: str, version: Path) -> None:
+        """原子地把 <root>/<name> 切换到指定版本目录。
+
+        旧的真实目录（非 generations 安装）先移入 staging 再删除，仅迁移时存在极短的缺失窗口。
+        """
+        link = self.root / name
+        tmp_link = self.root / f".{name}.bensz-link-{uuid.uuid4().hex[:8]}"
+        os.symlink(os.path.relpath(version, self.root), tmp_link)
+        legacy: Path | None = None
+        if link.exists() and not link.is_symlink():
+            self.staging_dir.mkdir(parents=True, exist_ok=True)
+            legacy = self.staging_dir / f"{name}-legacy-{uuid.uuid4().hex[:8]}"
+            os.rename(link, legacy)
+        os.replace(tmp_link, link)
+        if legacy is not None:
+            if legacy.is_dir():
+                shutil.rmtree(legacy)
+            else:
+                legacy.unlink()
+
+    def deactivate(self, name: str) -> None:
+        """移除指向版本目录的软链接（版本目录本身保留到被清理）。"""
+        if self.active_version(name) is not None:
+            (self.root / name).unlink()
+
+    def active_skills(self) -> dict[str, str]:
+        """扫描目标目录中所有指向版本目录的软链接（skill 名 → 版本目录名）。"""
+        skills: dict[str, str] = {}
+        if not self.root.is_dir():
+            return skills
+        with os.scandir(self.root) as it:
+            for entry in it:
+                if entry.is_symlink():
+                    version = self.active_version(entry.name)
+                    if version is not None:
+                        skills[entry.name] = version.name
+        return dict(sorted(skills.items()))
+
+    # ---- 代记录 ----
+
+    def _record_path(self, number: int) -> Path:
+        return self.base / f"{number}.json"
+
+    def current(self) -> int | None:
+        try:
+            return int((self.base / "current").read_text(encoding="utf-8").strip())
+        except (OSError, ValueError):
+            return None
+
+    def _set_current(self, number: int) -> None:
+        tmp = self.base / f"current.{os.getpid()}.tmp"
+        tmp.write_text(f"{number}\n", encoding="utf-8")
+        os.replace(tmp, self.base / "current")
+
+    def list_generations(self) -> list[Generation]:
+        """按代号升序列出所有代记录。"""
+        generations: list[Generation] = []
+        if not self.base.is_dir():
+            return generations
+        for record in self.base.glob("*.json"):
+            if not record.stem.isdigit():
+                continue
+            try:
+                data = json.loads(record.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                continue
+            generations.append(Generation(number=int(record.stem), created_at=data.get("created_at", ""),
+                                          skills=data.get("skills", {})))
+        return sorted(generations, key=lambda g: g.number)
+
+    def get(self, number: int) -> Generation:
+        for generation in self.list_generations():
+            if generation.number == number:
+                return generation
+        raise GenerationError(f"generation {number} 不存在: {self.base}")
+
+    def record(self) -> int | None:
+        """把当前软链接状态记录为新的一代；与当前代相同时不新建，返回 None。"""
+        with self._lock:
+            skills = self.active_skills()
+            current = self.current()
+            if current is not None:
+                try:
+                    if self.get(current).skills == skills:
+                        return None
+                except GenerationError:
+                    pass
+            existing = self.list_generations()
+            number = (existing[-1].number + 1) if existing else 1
+            self.base.mkdir(parents=True, exist_ok=True)
+            payload = {"created_at": time.strftime("%Y%m%d-%H%M%S", time.localtime()), "skills": skills}
+            tmp = self.base / f"{number}.json.tmp"
+            tmp.write_text(json.dumps(payload, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+            os.replace(tmp, self._record_path(number))
+            self._set_current(number)
+            return number
+
+    def rollback(self, number: int | None = None, dry_run: bool = False) -> Generation:
+        """把所有 skill 软链接切换到第 number 代（缺省为当前代的上一代）。"""
+        generations = self.list_generations()
+        current = self.current()
+        if number is None:
+            older = [g for g in generations if current is None or g.number < current]
+            if not older:
+                raise GenerationError(f"没有可回滚的更早 generation: {self.base}")
+            target = older[-1]
+        else:
+            target = self.get(number)
+
+        missing = [v for v in target.skills.values() if not (self.versions_dir / v).is_dir()]
+        if missing:
+            raise GenerationError(f"generation {target.number} 的版本目录已被清理: {', '.join(missing)}")
+        if dry_run:
+            return target
+
+        for name, version in target.skills.items():
+            self.activate(name, self.versions_dir / version)
+        for name in self.active_skills():
+            if name not in target.skills:
+                self.deactivate(name)
+        self._set_current(target.number)
+        return target
+
+    def prune(self, keep: int) -> tuple[int, int]:
+        """只保留最近 keep 代（当前代始终保留），并删除不再被引用的版本目录。
+
+        Returns:
+            (删除的代数, 删除的版本目录数)
+        """
+        generations = self.list_generations()
+        current = self.current()
+        kept = {g.number for g in generations[-keep:]} if keep > 0 else set()
+        if current is not None:
+            kept.add(current)
+        removed_generations = 0
+        for generation in generations:
+            if generation.number not in kept:
+                self._record_path(generation.number).unlink()
+                removed_generations += 1
+
+        live = set(self.active_skills().values())
+        for generation in self.list_generations():
+            live.update(generation.skills.values())
+        removed_versions = 0
+        if self.versions_dir.is_dir():
+            for version in self.versions_dir.iterdir():
+                if version.name not in live:
+                    shutil.rmtree(version)
+                    removed_versions += 1
+        if self.staging_dir.is_dir():
+            shutil.rmtree(self.staging_dir, ignore_errors=True)
+        return removed_generations, removed_versions
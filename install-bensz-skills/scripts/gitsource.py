@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""Install skills straight from a git revision (--from-git) for install-bensz-skills.
+
+不需要检出工作区：
+
+- 用 ``git ls-tree -r -l -z`` 一次列出修订中的全部文件（路径、模式、blob ID、大小），
+  按与目录遍历相同的规则（含各层 .skillignore）发现 skill 根目录并过滤文件；
+- 文件摘要直接使用 git blob ID（哈希算法 ``git``），整体指纹由 blob ID 组合而成，
+  未变化的 skill 无需读取任何文件内容即可跳过；
+- 需要写入的文件经由一个常驻的 ``git cat-file --batch`` 进程流式读出。
+
+规格写法：``<repo>@<rev>[:<path>]``，例如 ``~/skills@v1.2.0:pipelines/skills``；省略 rev 时为 HEAD。
+"""
+from __future__ import annotations
+
+import os
+import shutil
+import subprocess
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+
+from discovery import SKILL_FILENAME, skill_roots_in_listing
+from fingerprint import FileEntry, TreeFingerprint, combine_digests, is_installer_metadata, new_hasher
+from frontmatter import get_frontmatter_cache
+from ignore import IGNORE_FILENAME, IgnoreMatcher, chain_matcher
+from timings import count_io
+
+GIT_HASH = "git"
+_CHUNK_SIZE = 1024 * 1024
+
+# ls-tree 中的对象模式：普通文件与可执行文件（软链接与子模块不安装）
+_MODE_FILE = "100644"
+_MODE_EXECUTABLE = "100755"
+
+
+class GitSourceError(ValueError):
+    """git 仓库、修订或路径无效，或 git 不可用。"""
+
+
+@dataclass(frozen=True)
+class GitBlob:
+    """修订中的单个文件。"""
+    oid: str
+    size: int
+    executable: bool
+
+
+@dataclass(frozen=True)
+class GitSkill:
+    """修订中的单个 skill。"""
+    name: str
+    rel: str
+    metadata: dict
+    files: dict[str, GitBlob]
+
+    def fingerprint(self) -> TreeFingerprint:
+        """文件摘要即 blob ID；与 fingerprint_tree(..., algo="git") 对同样内容的目录计算结果一致。"""
+        files = {rel: FileEntry(size=blob.size, digest=blob.oid) for rel, blob in self.files.items()}
+        return TreeFingerprint(digest=combine_digests(files, GIT_HASH), files=files, algo=GIT_HASH)
+
+
+def parse_git_spec(spec: str) -> tuple[Path, str, str]:
+    """解析 ``<repo>@<rev>[:<path>]``，返回 (仓库路径, 修订, 仓库内路径)。"""
+    repo, sep, rest = spec.rpartition("@")
+    if not sep:
+        repo, rest = spec, ""
+    rev, _, subpath = rest.partition(":")
+    return Path(repo).expanduser().resolve(), rev or "HEAD", subpath.strip("/")
+
+
+def _is_skill_file(rel: str, matcher: IgnoreMatcher) -> bool:
+    """与 iter_tree_files 一致：自身或任一上级目录被忽略的文件不参与指纹与安装。"""
+    return not is_installer_metadata(rel.rsplit("/", 1)[-1]) and not matcher.is_path_ignored(rel)
+
+
+class _CatFileBatch:
+    """常驻的 ``git cat-file --batch`` 进程；请求在锁内串行，内容按块流式读出。"""
+
+    def __init__(self, repo: Path) -> None:
+        self._proc = subprocess.Popen(
+            ["git", "-C", str(repo), "cat-file", "--batch"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+        )
+        self._lock = threading.Lock()
+
+    def stream(self, oid: str, sink) -> int:
+        """把对象内容按块传给 sink，返回对象大小。"""
+        with self._lock:
+            self._proc.stdin.write(f"{oid}\n".encode("ascii"))
+            self._proc.stdin.flush()
+            header = self._proc.stdout.readline().decode("ascii").split()
+            if len(header) != 3:
+                raise GitSourceError(f"git 对象不存在: {oid}")
+            remaining = size = int(header[2])
+            while remaining:
+                chunk = self._proc.stdout.read(min(_CHUNK_SIZE, remaining))
+                if not chunk:
+                    raise GitSourceError(f"读取 git 对象中断: {oid}")
+                sink(chunk)
+                remaining -= len(chunk)
+            self._proc.stdout.read(1)  # 内容后的换行
+            return size
+
+    def read(self, oid: str) -> bytes:
+        chunks: list[bytes] = []
+        self.stream(oid, chunks.append)
+        return b"".join(chunks)
+
+    def close(self) -> None:
+        if self._proc.poll() is None:
+            self._proc.stdin.close()
+            self._proc.wait()
+
+
+class GitSource:
+    """git 修订中的 skills（与 SkillPack 相同的接口：skills / path / extract / close）。"""
+
+    def __init__(self, spec: str) -> None:
+        if shutil.which("git") is None:
+            raise GitSourceError("未找到 git 可执行文件")
+        self.repo, self.rev, self.subpath = parse_git_spec(spec)
+        self.commit = self._git("rev-parse", "--verify", f"{self.rev}^{{commit}}").strip()
+        # 虚拟源目录：<仓库>@<修订>/<仓库内路径>（记录在安装索引中，便于追溯来源）
+        self.path = Path(f"{self.repo}@{self.rev}") / self.subpath if self.subpath else Path(f"{self.repo}@{self.rev}")
+        self.hash_algo = GIT_HASH
+        # 真实来源（记录在安装索引中；虚拟源目录并不存在于磁盘上）
+        self.origin = f"git:{self.repo}@{self.rev}" + (f":{self.subpath}" if self.subpath else "")
+
+        treeish = f"{self.commit}:{self.subpath}" if self.subpath else self.commit
+        blobs: dict[str, GitBlob] = {}
+        listing: list[str] = []
+        for record in self._git("ls-tree", "-r", "-l", "-z", treeish).split("\0"):
+            if not record:
+                continue
+            info, _, rel = record.partition("\t")
+            mode, kind, oid, size = info.split()
+            listing.append(rel)
+            if kind == "blob" and mode in (_MODE_FILE, _MODE_EXECUTABLE):
+                blobs[rel] = GitBlob(oid=oid, size=int(size), executable=mode == _MODE_EXECUTABLE)
+        self._blobs = blobs
+
+        self._batch = _CatFileBatch(self.repo)
+        self._ignore_texts: dict[str, str] = {}
+        # 以 skill 在修订中的相对路径为键（不同目录下的同名 skill 交由安装器按来源优先级消解）
+        self.skills: dict[str, GitSkill] = {}
+        frontmatter = get_frontmatter_cache()
+        for skill_rel in skill_roots_in_listing(listing, read_ignore=self._read_ignore):
+            prefix = "" if skill_rel == "." else f"{skill_rel}/"
+            matcher = self.skill_matcher(skill_rel)
+            files = {
+                rel[len(prefix):]: blob
+                for rel, blob in blobs.items()
+                if rel.startswith(prefix) and _is_skill_file(rel[len(prefix):], matcher)
+            }
+            skill_md = files.get(SKILL_FILENAME)
+            if skill_md is None:  # SKILL.md 为软链接等无法安装的情况
+                continue
+            name = self.repo.name if skill_rel == "." else skill_rel.rsplit("/", 1)[-1]
+            # SKILL.md 的元数据按 blob ID 缓存：同一内容只在第一次读取
+            metadata = frontmatter.read_digest(skill_md.oid, lambda oid=skill_md.oid: self._batch.read(oid))
+            key = skill_rel if skill_rel != "." else name
+            self.skills[key] = GitSkill(name=name, rel=skill_rel, metadata=metadata.to_dict(), files=files)
+
+    def _read_ignore(self, rel: str) -> str:
+        """读取修订中的 .skillignore（每个文件只读取一次）。"""
+        text = self._ignore_texts.get(rel)
+        if text is None:
+            blob = self._blobs.get(rel)
+            text = self._batch.read(blob.oid).decode("utf-8", errors="replace") if blob is not None else ""
+            self._ignore_texts[rel] = text
+        return text
+
+    def skill_matcher(self, skill_rel: str) -> IgnoreMatcher:
+        """叠加修订根目录到 skill 根目录路径上每一层的 .skillignore。"""
+        parts = [] if skill_rel == "." else skill_rel.split("/")
+        prefixes = ["/".join(parts[:depth]) + "/" if depth else "" for depth in range(len(parts) + 1)]
+        texts = [(prefix, self._read_ignore(prefix + IGNORE_FILENAME)) for prefix in prefixes]
+        return chain_matcher(texts, origin=prefixes[-1])
+
+    def _git(self, *args: str) -> str:
+        try:
+            result = subprocess.run(
+                ["git", "-C", str(self.repo), *args], capture_output=True, check=True
+            )
+        except subprocess.CalledProcessError as exc:
+            message = exc.stderr.decode("utf-8", errors="replace").strip() or f"git {args[0]} 失败"
+            raise GitSourceError(f"{message}: {self.repo}@{self.rev}") from exc
+        return result.stdout.decode("utf-8", errors="surrogateescape")
+
+    def close(self) -> None:
+        self._batch.close()
+
+    def extract(self, skill: str, rel: str, dest: Path) -> None:
+        """把文件流式写入 dest（dest 应为临时文件，由调用方原子替换），并校验 blob ID。"""
+        blob = self.skills[skill].files[rel]
+        hasher = new_hasher(GIT_HASH, blob.size)
+        with open(dest, "wb") as f:
+            def _write(chunk: bytes) -> None:
+                hasher.update(chunk)
+                f.write(chunk)
+            self._batch.stream(blob.oid, _write)
+        count_io(read=blob.size, written=blob.size)
+        if hasher.hexdigest() != blob.oid:
+            raise GitSourceError(f"git 对象内容校验失败: {skill}/{rel}")
+        os.chmod(dest, 0o755 if blob.executable else 0o644)
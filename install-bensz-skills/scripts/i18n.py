@@ -35,7 +35,12 @@ class Messages:
     removed_legacy_symlink: str
     skip_legacy_path: str
     removed_existing: str
+    pruned: str
     installed: str
+    synced: str
+    drift: str
+    activated: str
+    generation_recorded: str
     dry_run_prefix: str
 
     # 表格相关消息
@@ -46,6 +51,8 @@ class Messages:
     table_status_skipped: str
     table_reason_no_change: str
     table_reason_updated: str
+    table_reason_verified: str
+    table_reason_repaired: str
     table_separator: str
 
     # 安装报告消息（固定格式）
@@ -85,7 +92,12 @@ MESSAGES_EN = Messages(
     removed_legacy_symlink="removed legacy symlink: {path}",
     skip_legacy_path="skip legacy path (not a symlink): {path}",
     removed_existing="removed: {dest}",
+    pruned="pruned (no longer in source): {dest}",
     installed="installed: {dest}",
+    synced="synced: {dest} (+{added} ~{changed} -{removed})",
+    drift="drift: {dest} (missing {missing}, modified {modified}, extra {extra})",
+    activated="activated: {dest} -> {version} (+{added} ~{changed} -{removed})",
+    generation_recorded="recorded generation {number}: {root}",
     dry_run_prefix="[dry-run] ",
     # 表格相关
     table_header_skill="Skill Name",
@@ -94,7 +106,9 @@ MESSAGES_EN = Messages(
     table_status_installed="✅ Installed",
     table_status_skipped="⏭️  Skipped",
     table_reason_no_change="No version change",
-    table_reason_updated="Version updated (MD5: {md5})",
+    table_reason_updated="Version updated (hash: {md5})",
+    table_reason_verified="Verified (no drift)",
+    table_reason_repaired="Repaired {count} file(s)",
     table_separator="├─",
     # 安装报告消息（固定格式）
     report_section_process="\n【Installation Process】",
@@ -130,7 +144,12 @@ MESSAGES_ZH = Messages(
     removed_legacy_symlink="removed legacy symlink: {path}",
     skip_legacy_path="skip legacy path (not a symlink): {path}",
     removed_existing="removed: {dest}",
+    pruned="pruned (no longer in source): {dest}",
     installed="installed: {dest}",
+    synced="synced: {dest} (+{added} ~{changed} -{removed})",
+    drift="drift: {dest} (missing {missing}, modified {modified}, extra {extra})",
+    activated="activated: {dest} -> {version} (+{added} ~{changed} -{removed})",
+    generation_recorded="recorded generation {number}: {root}",
     dry_run_prefix="[dry-run] ",
     # 表格相关
     table_header_skill="Skill 名称",
@@ -139,7 +158,9 @@ MESSAGES_ZH = Messages(
     table_status_installed="✅ 已安装",
     table_status_skipped="⏭️  跳过",
     table_reason_no_change="版本未变化",
-    table_reason_updated="版本已更新 (MD5: {md5})",
+    table_reason_updated="版本已更新 (指纹: {md5})",
+    table_reason_verified="校验一致（无漂移）",
+    table_reason_repaired="已修复 {count} 个文件",
     table_separator="├─",
     # 安装报告消息（固定格式）
     report_section_process="\n【安装过程】",
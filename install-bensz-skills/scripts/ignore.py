@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+"""`.skillignore` support for install-bensz-skills.
+
+忽略规则采用 gitignore 语义，并编译为一个匹配器，供发现、哈希与复制共用：
+
+- 默认规则（``__pycache__``、``tests`` 等）之后，依次叠加源目录（仓库）到 skill 根目录
+  路径上每一层目录中的 ``.skillignore``，后出现的规则优先；
+- 支持注释（``#``）、取反（``!``）、仅匹配目录（结尾 ``/``）、锚定（含 ``/``）与 ``**``；
+- 被忽略的目录不会被深入遍历，其中的文件既不读取、不哈希，也不安装；
+- 匹配器按 skill 根目录缓存，每次运行只编译一次；
+- 已安装的目标目录中没有 .skillignore，对比时使用默认规则与源 skill 匹配器的并集（UnionMatcher）；
+- 遍历跟随软链接，但指向自身或上级目录的软链接（环）不再深入（SymlinkCycleGuard）。
+"""
+from __future__ import annotations
+
+import os
+import re
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+
+IGNORE_FILENAME = ".skillignore"
+
+# 默认忽略规则（与 shutil.ignore_patterns 语义一致：按文件/目录名匹配）；.skillignore 本身不安装
+DEFAULT_IGNORE_PATTERNS: tuple[str, ...] = (
+    ".DS_Store",
+    "__pycache__",
+    "*.pyc",
+    "*.pyo",
+    ".pytest_cache",
+    ".mypy_cache",
+    "test",
+    "tests",
+    IGNORE_FILENAME,
+)
+
+
+@dataclass(frozen=True)
+class IgnoreRule:
+    """一条已编译的忽略规则。
+
+    Attributes:
+        regex: 匹配相对 base 的 POSIX 路径
+        negate: 以 ``!`` 开头的规则（重新包含）
+        dir_only: 以 ``/`` 结尾的规则（只匹配目录）
+        base: 规则所在 .skillignore 的目录（相对匹配器的公共根目录，以 ``/`` 结尾；根目录为空串）
+    """
+    regex: re.Pattern
+    negate: bool
+    dir_only: bool
+    base: str
+
+    def matches(self, path: str, is_dir: bool) -> bool:
+        if self.dir_only and not is_dir:
+            return False
+        if self.base:
+            if not path.startswith(self.base):
+                return False
+            path = path[len(self.base):]
+        return self.regex.fullmatch(path) is not None
+
+
+def _translate(pattern: str) -> str:
+    """把 gitignore 的通配模式（不含取反与结尾 /）翻译为正则表达式。"""
+    anchored = "/" in pattern
+    pattern = pattern.lstrip("/")
+    out: list[str] = [] if anchored else ["(?:.*/)?"]
+    i, n = 0, len(pattern)
+    while i < n:
+        c = pattern[i]
+        if c == "*":
+            if pattern.startswith("**", i) and (i == 0 or pattern[i - 1] == "/"):
+                if pattern.startswith("**/", i):
+                    out.append("(?:.*/)?")
+                    i += 3
+                    continue
+                if i + 2 == n:
+                    out.append(".*")
+                    i += 2
+                    continue
+            out.append("[^/]*")
+            while i < n and pattern[i] == "*":
+                i += 1
+            continue
+        if c == "?":
+            out.append("[^/]")
+        elif c == "[":
+            end = pattern.find("]", i + 2)
+            if end == -1:
+                out.append(re.escape(c))
+            else:
+                body = pattern[i + 1:end].replace("\\", "\\\\")
+                if body.startswith("!"):
+                    body = "^" + body[1:]
+                out.append(f"[{body}]")
+                i = end
+        elif c == "\\" and i + 1 < n:
+            i += 1
+            out.append(re.escape(pattern[i]))
+        else:
+            out.append(re.escape(c))
+        i += 1
+    return "".join(out)
+
+
+def parse_ignore(text: str, base: str = "") -> list[IgnoreRule]:
+    """解析 .skillignore 内容。
+
+    Args:
+        base: 文件所在目录（相对匹配器的公共根目录，以 ``/`` 结尾；根目录为空串）
+    """
+    rules: list[IgnoreRule] = []
+    for raw in text.splitlines():
+        line = raw.rstrip()
+        if raw.endswith("\\ "):
+            line += " "
+        if not line or line.startswith("#"):
+            continue
+        negate = line.startswith("!")
+        if negate or line.startswith("\\!") or line.startswith("\\#"):
+            line = line[1:]
+        dir_only = line.endswith("/")
+        line = line.rstrip("/")
+        if not line:
+            continue
+        rules.append(IgnoreRule(re.compile(_translate(line)), negate, dir_only, base))
+    return rules
+
+
+def dir_key(path: str) -> tuple[int, int] | None:
+    """目录的 (st_dev, st_ino)（跟随软链接；无法 stat 时为 None）。"""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_dev, st.st_ino
+
+
+class SymlinkCycleGuard:
+    """跟随软链接自顶向下遍历时检测环：子目录指向自身或任一上级目录时不再深入。
+
+    只比较当前路径上的祖先目录，经由不同软链接到达同一个（非祖先）目录仍会正常遍历。
+    """
+
+    def __init__(self, root: str) -> None:
+        self._chains: dict[str, frozenset] = {root: frozenset({dir_key(root)})}
+
+    def is_cycle(self, dirpath: str, name: str) -> bool:
+        """判断 dirpath 下的子目录 name 是否构成环（父目录须先于子目录检查）。"""
+        path = os.path.join(dirpath, name)
+        key = dir_key(path)
+        chain = self._chains.get(dirpath, frozenset())
+        if key is None or key in chain:
+            return True
+        self._chains[path] = chain | {key}
+        return False
+
+
+class IgnoreMatcher:
+    """按顺序叠加的忽略规则（后出现的规则优先，与 gitignore 一致）。
+
+    所有不取反的规则额外合并为一个正则，作为快速预判：
+    没有任何规则命中时无需逐条匹配（绝大多数文件都走这条路径）。
+
+    Attributes:
+        origin: 被匹配路径所在目录相对公共根目录的前缀（以 ``/`` 结尾；skill 即根目录时为空串）
+    """
+
+    def __init__(self, rules: tuple[IgnoreRule, ...] = (), origin: str = "") -> None:
+        self.rules = rules
+        self.origin = origin
+        self._has_negation = any(rule.negate for rule in rules)
+        self._any = self._combine(rule for rule in rules if not rule.negate)
+        self._any_file = self._combine(rule for rule in rules if not rule.negate and not rule.dir_only)
+
+    @staticmethod
+    def _combine(rules) -> re.Pattern | None:
+        parts = [
+            f"{re.escape(rule.base)}(?:{rule.regex.pattern})" for rule in rules
+        ]
+        return re.compile("|".join(parts)) if parts else None
+
+    def extend(self, text: str, base: str = "") -> IgnoreMatcher:
+        """叠加一个 .skillignore 的规则，返回新的匹配器。"""
+        rules = parse_ignore(text, base)
+        return IgnoreMatcher(self.rules + tuple(rules), self.origin) if rules else self
+
+    def extend_file(self, path: Path, base: str = "") -> IgnoreMatcher:
+        """叠加文件中的规则（文件不存在时原样返回）。"""
+        try:
+            text = path.read_text(encoding="utf-8", errors="replace")
+        except OSError:
+            return self
+        return self.extend(text, base)
+
+    def at(self, origin: str) -> IgnoreMatcher:
+        """同一组规则，匹配相对 origin 目录的路径。"""
+        return IgnoreMatcher(self.rules, origin)
+
+    def is_ignored(self, rel: str, is_dir: bool = False) -> bool:
+        """判断相对路径（POSIX）是否被忽略（不检查上级目录，调用方在遍历时已剪掉被忽略的目录）。"""
+        path = self.origin + rel
+        fast = self._any if is_dir else self._any_file
+        if fast is None or fast.fullmatch(path) is None:
+            return False
+        if not self._has_negation:
+            return True
+        for rule in reversed(self.rules):
+            if rule.matches(path, is_dir):
+                return not rule.negate
+        return False
+
+    def is_path_ignored(self, rel: str) -> bool:
+        """判断文件路径本身或任一上级目录是否被忽略（用于 git ls-tree 等平铺的文件清单）。"""
+        parts = rel.split("/")
+        for depth in range(1, len(parts)):
+            if self.is_ignored("/".join(parts[:depth]), is_dir=True):
+                return True
+        return self.is_ignored(rel)
+
+    def copytree_ignore(self, root: Path):
+        """生成 shutil.copytree 的 ignore 回调（root 为复制的源目录；形成环的软链接目录不复制）。"""
+        root_str = str(root)
+        guard = SymlinkCycleGuard(root_str)
+
+        def _ignore(dirpath: str, names: list[str]) -> set[str]:
+            rel_dir = os.path.relpath(dirpath, root_str).replace(os.sep, "/")
+            prefix = "" if rel_dir == "." else f"{rel_dir}/"
+            ignored = set()
+            for name in names:
+                is_dir = os.path.isdir(os.path.join(dirpath, name))
+                if self.is_ignored(prefix + name, is_dir) or (is_dir and guard.is_cycle(dirpath, name)):
+                    ignored.add(name)
+            return ignored
+
+        return _ignore
+
+
+DEFAULT_MATCHER = IgnoreMatcher(tuple(parse_ignore("\n".join(DEFAULT_IGNORE_PATTERNS))))
+
+
+class FileSetMatcher:
+    """只让给定的文件（及其上级目录）可见的匹配器（用于 bundle 等不带 .skillignore 的来源）。"""
+
+    def __init__(self, paths) -> None:
+        self.files = frozenset(paths)
+        self.dirs = frozenset(
+            "/".join(parts[:depth]) for parts in (p.split("/") for p in self.files) for depth in range(1, len(parts))
+        )
+
+    def is_ignored(self, rel: str, is_dir: bool = False) -> bool:
+        return rel not in (self.dirs if is_dir else self.files)
+
+
+class UnionMatcher:
+    """多个匹配器的并集视图：任一匹配器不忽略的路径都可见。
+
+    用于已安装的目标目录（其中没有 .skillignore）：默认规则可见的文件（含源中新被忽略、
+    需要删除的文件）与源 skill 的匹配器可见的文件（如 ``!tests/`` 重新包含的文件）都参与对比。
+    """
+
+    def __init__(self, *matchers) -> None:
+        self.matchers = matchers
+
+    def is_ignored(self, rel: str, is_dir: bool = False) -> bool:
+        return all(matcher.is_ignored(rel, is_dir) for matcher in self.matchers)
+
+
+def chain_matcher(texts: list[tuple[str, str]], origin: str, base: IgnoreMatcher = DEFAULT_MATCHER) -> IgnoreMatcher:
+    """按 (目录前缀, .skillignore 内容) 从上到下叠加规则，返回匹配 origin 下路径的匹配器。"""
+    matcher = base
+    for prefix, text in texts:
+        matcher = matcher.extend(text, prefix)
+    return matcher.at(origin)
+
+
+class IgnoreRegistry:
+    """单次运行内按 skill 根目录缓存的匹配器。
+
+    skill 位于某个源目录之下时，叠加源目录到 skill 根目录路径上每一层的 .skillignore；
+    其他目录（如安装目标）只使用默认规则与自身的 .skillignore。
+    """
+
+    def __init__(self, roots: list[Path] | tuple[Path, ...] = ()) -> None:
+        self._roots = sorted((Path(r) for r in roots), key=lambda r: len(r.parts), reverse=True)
+        self._matchers: dict[str, IgnoreMatcher] = {}
+        self._lock = threading.Lock()
+
+    def for_path(self, root: Path) -> IgnoreMatcher:
+        key = str(root)
+        with self._lock:
+            matcher = self._matchers.get(key)
+        if matcher is not None:
+            return matcher
+
+        repo = next((r for r in self._roots if root == r or r in root.parents), root)
+        rel_parts = root.relative_to(repo).parts
+        matcher = DEFAULT_MATCHER
+        current, prefix = repo, ""
+        for part in (None, *rel_parts):
+            if part is not None:
+                current = current / part
+                prefix = f"{prefix}{part}/"
+            matcher = matcher.extend_file(current / IGNORE_FILENAME, prefix)
+        matcher = matcher.at(prefix)
+        with self._lock:
+            self._matchers[key] = matcher
+        return matcher
+
+
+# 全局匹配器缓存（main 每次运行时以源目录重新配置）
+_global_ignores = IgnoreRegistry()
+
+
+def get_ignore_registry() -> IgnoreRegistry:
+    """获取全局匹配器缓存。"""
+    return _global_ignores
+
+
+def configure_ignore_roots(roots: list[Path]) -> IgnoreRegistry:
+    """以本次的源目录重新配置全局匹配器缓存（已编译的匹配器全部丢弃）。"""
+    global _global_ignores
+    _global_ignores = IgnoreRegistry(roots)
+    return _global_ignores
@@ -2,20 +2,57 @@
 from __future__ import annotations
 
 import argparse
-import hashlib
+import contextlib
+import cProfile
 import json
+import logging
+import os
 import shutil
 import sys
 import time
-from dataclasses import dataclass
+from concurrent.futures import Executor, ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
 from pathlib import Path
+from typing import Callable
 
 # 添加 scripts 目录到 Python 路径，以便导入 i18n
 _scripts_dir = Path(__file__).parent
 if str(_scripts_dir) not in sys.path:
     sys.path.insert(0, str(_scripts_dir))
 
+from copying import COPY_MODES, CopyMode, copy_file, copy_stats, reset_copy_stats
+from discovery import get_discovery_cache
+from events import OUTPUT_FORMATS, OutputFormat, configure_events, get_events
+from fingerprint import (
+    DEFAULT_HASH,
+    HASH_ALGORITHMS,
+    FileEntry,
+    FingerprintMemo,
+    TreeFingerprint,
+    available_algorithms,
+    configure_parallel_hashing,
+    default_algorithm,
+    empty_fingerprint,
+    fingerprint_tree,
+    get_stat_cache,
+    reload_stat_caches,
+    save_stat_caches,
+    set_default_algorithm,
+)
+from frontmatter import SkillMetadata, get_frontmatter_cache, read_skill_metadata
+from generations import GenerationError, GenerationManager, is_enabled as generations_enabled
+from gitsource import GitSource, GitSourceError, parse_git_spec
 from i18n import get_translator
+from ignore import DEFAULT_MATCHER, FileSetMatcher, UnionMatcher, configure_ignore_roots, get_ignore_registry
+from install_index import IndexEntry, InstallIndex
+from pipeline import ENGINES, Engine, Stage, run_pipeline
+from plan import InstallPlan, PlanError, PlannedAction, PlannedTarget
+from skillpack import COMPRESSIONS, Compression, SkillPack, SkillPackError, build_pack
+from store import ObjectStore, StoredTree
+from sync import SyncPlan, apply_sync, diff_trees
+from targetlock import TargetLock, TargetLockTimeout
+from timings import get_timings, reset_timings
+from watch import PollingWatcher, affected_skills, create_watcher, next_batch
 
 
 @dataclass(frozen=True)
@@ -25,6 +62,26 @@ class Target:
     legacy_link: Path
 
 
+@dataclass
+class SyncMode:
+    """重新安装方式。"""
+    DELTA: str = "delta"  # 逐文件增量同步（默认）
+    FULL: str = "full"    # 删除整个目录后完整复制
+
+
+@dataclass
+class SourcePriority:
+    """多个源目录中存在内容不同的同名 skill 时的处理方式。"""
+    FIRST: str = "first"  # 以先列出的源目录为准（默认）
+    LAST: str = "last"    # 以后列出的源目录为准（后者覆盖前者）
+    ERROR: str = "error"  # 报错退出
+
+
+# plan / apply 子命令；计划中记录、apply 时沿用的安装选项（argparse 属性名）
+PLAN_COMMANDS = ("install", "plan", "apply")
+PLAN_OPTIONS = ("sync_mode", "copy_mode", "store", "generations", "keep_generations", "prune", "force", "verify")
+
+
 @dataclass
 class SkillType:
     """技能类型枚举。"""
@@ -43,6 +100,16 @@ class SkillInfo:
     installed: bool = False
     skipped: bool = False
     reason: str = ""
+    file_actions: dict[str, list[str]] = field(default_factory=dict)  # 逐文件动作（delta 同步）
+    metadata: SkillMetadata | None = None  # SKILL.md frontmatter 元数据
+    verified: bool = False  # --verify 校验过已安装文件（reason 为校验结果）
+
+    @property
+    def display_name(self) -> str:
+        """报告中显示的名称（frontmatter 声明了 version 时附带版本号）。"""
+        if self.metadata is not None and self.metadata.version:
+            return f"{self.name} v{self.metadata.version}"
+        return self.name
 
 
 def _now_stamp() -> str:
@@ -56,17 +123,9 @@ def _is_symlink(path: Path) -> bool:
         return False
 
 
-def _ignore_patterns():
-    return shutil.ignore_patterns(
-        ".DS_Store",
-        "__pycache__",
-        "*.pyc",
-        "*.pyo",
-        ".pytest_cache",
-        ".mypy_cache",
-        "test",
-        "tests",
-    )
+def _ignore_patterns(src: Path):
+    """复制 src 时的忽略回调（与指纹计算共用同一个 .skillignore 匹配器）。"""
+    return get_ignore_registry().for_path(src).copytree_ignore(src)
 
 
 def _print_skill_table(
@@ -94,14 +153,16 @@ def _print_skill_table(
 
     # 计算列宽（基于内容）
     all_skills = installed_skills + skipped_skills
-    max_name_len = max((len(skill.name) for skill in all_skills), default=20)
+    max_name_len = max((len(skill.display_name) for skill in all_skills), default=20)
     # 考虑 emoji 宽度（实际显示宽度约为字符数的2倍）
     name_width = max(max_name_len, len(header_skill)) + 2
 
     # 计算原因列的最大宽度（考虑中文和英文）
     reason_samples = []
     for skill in all_skills:
-        if skill.installed:
+        if skill.verified:
+            reason_samples.append(skill.reason)
+        elif skill.installed:
             reason_samples.append(t.table_reason_updated(md5=skill.md5[:12]))
         else:
             reason_samples.append(t.table_reason_no_change())
@@ -136,74 +197,92 @@ def _print_skill_table(
     sorted_skills = sorted(all_skills, key=lambda s: not s.installed)
 
     for skill in sorted_skills:
-        if skill.installed:
-            status = t.table_status_installed()
+        status = t.table_status_installed() if skill.installed else t.table_status_skipped()
+        if skill.verified:
+            reason = skill.reason
+        elif skill.installed:
             reason = t.table_reason_updated(md5=skill.md5[:12])
         else:
-            status = t.table_status_skipped()
             reason = t.table_reason_no_change()
 
         print(
-            f"│ {skill.name:<{name_width}} │ {status:<{status_width}} │ {reason:<{reason_width}} │"
+            f"│ {skill.display_name:<{name_width}} │ {status:<{status_width}} │ {reason:<{reason_width}} │"
         )
 
     print(bottom_border)
 
 
-def _calculate_skill_md5(skill_dir: Path) -> str:
-    """计算 skill 目录的 MD5 哈希值。
+def _calculate_skill_md5(skill_dir: Path, algo: str | None = None) -> str:
+    """计算 skill 目录的全内容指纹（缺省使用当前默认哈希算法，默认 MD5）。
 
-    优先计算 SKILL.md 的哈希值，因为它是技能的核心定义文件。
-    如果需要更精确的版本控制，可以遍历整个目录。
+    覆盖目录下所有会被安装的文件（忽略规则与复制时一致），
+    因此修改脚本、模板等任意文件都会触发重新安装。
+    文件摘要经由 stat 缓存复用，未变化的文件不会被重新读取。
     """
-    skill_md = skill_dir / "SKILL.md"
-    if not skill_md.exists():
-        # 回退到整个目录的哈希
-        hasher = hashlib.md5()
-        for file in sorted(skill_dir.rglob("*")):
-            if file.is_file() and not any(p.startswith(".") for p in file.relative_to(skill_dir).parts):
-                hasher.update(file.read_bytes())
-        return hasher.hexdigest()
+    return fingerprint_tree(skill_dir, algo=algo).digest
 
-    content = skill_md.read_text(encoding="utf-8")
-    return hashlib.md5(content.encode("utf-8")).hexdigest()
+
+def _read_skill_manifest(dest_dir: Path, target: Target) -> dict | None:
+    """读取平台特定的 manifest 文件（如 .skill-manifest.claude.json），不存在或损坏时返回 None。"""
+    # 平台特定的 manifest 文件名（避免不同平台的版本记录互相干扰）
+    manifest_file = dest_dir / f".skill-manifest.{target.label}.json"
+    try:
+        return json.loads(manifest_file.read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError):
+        return None
 
 
-def _get_installed_md5(dest_dir: Path, target: Target) -> str | None:
-    """获取已安装 skill 的 MD5 值。
+def _get_installed_md5(dest_dir: Path, target: Target) -> tuple[str | None, str]:
+    """获取已安装 skill 的指纹及其哈希算法（安装索引中没有记录时的迁移回退）。
 
-    从平台特定的 manifest 文件读取（如 .skill-manifest.claude.json），
-    或回退到计算目录内容的 MD5。
+    从旧版平台特定的 manifest 文件读取（如 .skill-manifest.claude.json，未记录算法时为 MD5），
+    或回退到以当前默认算法计算目录内容的指纹。
 
     Args:
         dest_dir: 技能目标目录
         target: 目标平台信息（codex/claude）
     """
-    # 平台特定的 manifest 文件名（避免不同平台的版本记录互相干扰）
-    manifest_file = dest_dir / f".skill-manifest.{target.label}.json"
-    if manifest_file.exists():
-        try:
-            data = json.loads(manifest_file.read_text(encoding="utf-8"))
-            return data.get("md5")
-        except (json.JSONDecodeError, KeyError):
-            pass
+    manifest = _read_skill_manifest(dest_dir, target)
+    if manifest and manifest.get("md5"):
+        return manifest["md5"], manifest.get("hash_algo", DEFAULT_HASH)
 
-    # 回退方案：尝试直接计算目录 MD5
+    # 回退方案：尝试直接计算目录指纹
     if dest_dir.exists():
         try:
-            return _calculate_skill_md5(dest_dir)
+            return _calculate_skill_md5(dest_dir), default_algorithm()
         except Exception:
             pass
 
-    return None
+    return None, default_algorithm()
+
+
+def _match_recorded_hash(src_dir: Path, src_fingerprint: TreeFingerprint, recorded: str, algo: str) -> str | None:
+    """把以其他哈希算法记录的已安装指纹换算到当前算法。
+
+    记录算法与当前一致时原样返回；否则以记录的算法重新计算源目录指纹（经由该算法的 stat 缓存），
+    内容一致时返回当前算法下的指纹，使切换 --hash 后未变化的 skill 仍被跳过。
+    """
+    if algo == src_fingerprint.algo:
+        return recorded
+    if str(src_dir) in _pack_sources:
+        return None
+    try:
+        if fingerprint_tree(src_dir, algo=algo).digest == recorded:
+            return src_fingerprint.digest
+    except ValueError:  # 记录的算法在当前环境不可用（如未安装 xxhash）
+        return None
+    return recorded
 
 
 def _save_skill_manifest(dest_dir: Path, md5: str, source: Path, target: Target) -> None:
     """保存 skill 的版本信息到平台特定的 manifest 文件。
 
+    仅用于 generation 版本目录（随版本一起不可变，回滚时据此恢复安装索引）；
+    原地安装的状态统一记录在目标目录的安装索引中。
+
     Args:
         dest_dir: 技能目标目录
-        md5: 技能内容的 MD5 哈希值
+        md5: 技能内容指纹（字段名沿用 md5，算法记录在 hash_algo）
         source: 技能源目录路径
         target: 目标平台信息（codex/claude）
     """
@@ -211,42 +290,16 @@ def _save_skill_manifest(dest_dir: Path, md5: str, source: Path, target: Target)
     manifest_file = dest_dir / f".skill-manifest.{target.label}.json"
     manifest_data = {
         "md5": md5,
+        "hash_algo": default_algorithm(),
         "source": str(source),
+        "origin": _skill_origin(source),
         "installed_at": _now_stamp(),
         "target": target.label,
     }
-    manifest_file.write_text(json.dumps(manifest_data, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
-
-
-def _get_skill_category_from_yaml(skill_dir: Path) -> str | None:
-    """从 SKILL.md 的 YAML frontmatter 读取 category 字段。
-
-    Returns:
-        category 值（如 "auxiliary", "normal", "test"），如果不存在则返回 None
-    """
-    skill_md = skill_dir / "SKILL.md"
-    if not skill_md.exists():
-        return None
-
-    try:
-        content = skill_md.read_text(encoding="utf-8")
-        lines = content.split("\n")
-        in_frontmatter = False
-        for line in lines[:30]:  # 只检查前30行
-            stripped = line.strip()
-            if stripped == "---":
-                if not in_frontmatter:
-                    in_frontmatter = True
-                else:
-                    break
-                continue
-            if in_frontmatter and line.startswith("category:"):
-                category = line.split(":", 1)[1].strip().strip('"').strip("'")
-                return category.lower()
-    except Exception:
-        pass
-
-    return None
+    # 先写临时文件再替换：不改写可能与其他版本共享的 inode，读者也不会看到半个文件
+    tmp_file = manifest_file.with_name(f"{manifest_file.name}.tmp")
+    tmp_file.write_text(json.dumps(manifest_data, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+    os.replace(tmp_file, manifest_file)
 
 
 def _determine_skill_type(skill_dir: Path, skills_root: Path) -> str:
@@ -264,7 +317,7 @@ def _determine_skill_type(skill_dir: Path, skills_root: Path) -> str:
         技能类型：SkillType.AUXILIARY, SkillType.NORMAL, 或 SkillType.TEST
     """
     # 优先级1：从 YAML 读取 category（最高优先级，显式声明优先于启发式规则）
-    category = _get_skill_category_from_yaml(skill_dir)
+    category = _skill_metadata(skill_dir).category
     if category:
         if category in {"auxiliary", "dev", "development"}:
             return SkillType.AUXILIARY
@@ -312,8 +365,25 @@ def _is_test_skill_dir(skill_dir: Path) -> bool:
     return _determine_skill_type(skill_dir, skill_dir.parents[1]) == SkillType.TEST
 
 
-def _find_skill_dirs(skills_root: Path, exclude_names: set[str]) -> dict[str, list[Path]]:
-    """发现所有技能目录并按类型分类。
+def _find_skill_dirs(skills_root: Path, exclude_names: set[str], rescan: bool = False) -> list[Path]:
+    """发现所有技能目录（分类见 `_classify_skill_dirs`）。
+
+    使用剪枝的 os.scandir 遍历（隐藏目录、node_modules、__pycache__ 与 .skillignore 忽略的目录不深入，
+    skill 根目录以下不深入），
+    结果按目录 mtime 缓存，源目录未变化时无需重新遍历。
+    """
+    return [
+        skill_dir
+        for skill_dir in get_discovery_cache().find_skill_roots(skills_root, refresh=rescan)
+        if skill_dir.name not in exclude_names
+    ]
+
+
+def _classify_skill_dirs(skill_dirs: list[Path], skills_root: Path, classify: bool = True) -> dict[str, list[Path]]:
+    """按类型分类同一个源目录中的技能目录，并检查同名冲突。
+
+    Args:
+        classify: 为 False 时全部视为普通技能（bundle 中只有打包时的普通技能）
 
     Returns:
         包含三个键的字典：
@@ -327,32 +397,142 @@ def _find_skill_dirs(skills_root: Path, exclude_names: set[str]) -> dict[str, li
         SkillType.AUXILIARY: [],
         SkillType.TEST: [],
     }
-
-    for skill_md in sorted(skills_root.rglob("SKILL.md")):
-        skill_dir = skill_md.parent
-        if skill_dir.name in exclude_names:
-            continue
-        # Skip hidden dirs just in case.
-        if any(part.startswith(".") for part in skill_dir.relative_to(skills_root).parts):
-            continue
-
+    for skill_dir in skill_dirs:
         # 确定技能类型
-        skill_type = _determine_skill_type(skill_dir, skills_root)
+        skill_type = _determine_skill_type(skill_dir, skills_root) if classify else SkillType.NORMAL
         skill_dirs_by_type[skill_type].append(skill_dir)
 
-    # Ensure no basename collisions (we install by directory name).
-    # 仅检查普通技能的冲突（因为只有普通技能会被安装）
+    _check_name_collisions(skill_dirs_by_type[SkillType.NORMAL])
+    return skill_dirs_by_type
+
+
+def _check_name_collisions(skill_dirs: list[Path]) -> None:
+    """同一个源目录（或 git 修订）中不允许有同名的普通技能（按目录名安装）。
+
+    跨源目录的同名 skill 由 `_resolve_duplicate_skills` 按 --source-priority 消解；
+    同一来源中的同名 skill 无从判断优先级，总是报错退出。
+    """
     by_name: dict[str, list[Path]] = {}
-    for d in skill_dirs_by_type[SkillType.NORMAL]:
+    for d in skill_dirs:
         by_name.setdefault(d.name, []).append(d)
     collisions = {name: paths for name, paths in by_name.items() if len(paths) > 1}
     if collisions:
-        msg = ["检测到 skill 目录名冲突（basename 重复），无法安全安装："]
+        msg = ["检测到 skill 目录名冲突（同一源目录中 basename 重复），无法安全安装："]
         for name, paths in sorted(collisions.items()):
             msg.append(f"- {name}: " + ", ".join(str(p) for p in paths))
         raise SystemExit("\n".join(msg))
 
-    return skill_dirs_by_type
+
+def _discover_sources(
+    source_roots: list[Path],
+    exclude_names: set[str],
+    *,
+    rescan: bool = False,
+    jobs: int = 1,
+) -> list[tuple[Path, list[Path]]]:
+    """并发扫描所有源目录（不存在的源目录跳过，重复指定的只扫描一次）。
+
+    Returns:
+        [(源目录, 发现的技能目录)]（顺序与源目录顺序一致）
+    """
+    roots = []
+    for source_root in source_roots:
+        if not source_root.exists():
+            print(f"⚠️  警告: 源目录不存在，跳过: {source_root}")
+            continue
+        if source_root not in roots:
+            roots.append(source_root)
+    if not roots:
+        return []
+
+    with ThreadPoolExecutor(max_workers=max(1, min(jobs, len(roots)))) as pool:
+        results = list(pool.map(
+            lambda root: _find_skill_dirs(root, exclude_names=exclude_names, rescan=rescan), roots
+        ))
+    for source_root in roots:
+        print(f"🔍 扫描源目录: {source_root}")
+    return list(zip(roots, results))
+
+
+def _merge_sources(
+    discovered: list[tuple[Path, list[Path]]],
+    *,
+    priority: str = SourcePriority.FIRST,
+    jobs: int = 1,
+    classify: bool = True,
+) -> dict[str, list[Path]]:
+    """分类各源目录中发现的技能，合并结果并消解同名 skill。
+
+    - 同一个真实目录只保留一次（源目录重复指定或相互嵌套时不会重复安装、重复哈希）；
+    - 同一个源目录中有同名的普通技能时报错退出（见 `_check_name_collisions`）；
+    - 不同源目录中同名的普通技能内容指纹相同时静默合并，只保留优先级最高的一份；
+    - 内容不同时按 priority 选择来源并给出警告（priority 为 error 时报错退出）。
+
+    Returns:
+        按类型分组的技能目录（顺序与源目录顺序一致）
+    """
+    events = get_events()
+    merged: dict[str, list[Path]] = {SkillType.NORMAL: [], SkillType.AUXILIARY: [], SkillType.TEST: []}
+    if not discovered:
+        return merged
+
+    with ThreadPoolExecutor(max_workers=max(1, min(jobs, len(discovered)))) as pool:
+        results = list(pool.map(lambda item: _classify_skill_dirs(item[1], item[0], classify), discovered))
+
+        seen: set[Path] = set()
+        for (source_root, _), skill_dirs_by_type in zip(discovered, results):
+            for skill_type in [SkillType.NORMAL, SkillType.AUXILIARY, SkillType.TEST]:
+                for skill_dir in skill_dirs_by_type[skill_type]:
+                    real = skill_dir.resolve()
+                    if real in seen:
+                        continue
+                    seen.add(real)
+                    merged[skill_type].append(skill_dir)
+                    events.emit("discovered", skill=skill_dir.name, type=skill_type, path=str(skill_dir),
+                                source=str(source_root))
+
+        merged[SkillType.NORMAL] = _resolve_duplicate_skills(merged[SkillType.NORMAL], priority, pool)
+    return merged
+
+
+def _resolve_duplicate_skills(
+    skill_dirs: list[Path], priority: str, executor: Executor | None = None
+) -> list[Path]:
+    """消解同名的普通技能（按目录名安装，同名只能保留一份）。
+
+    只对同名的候选计算指纹；结果进入本次运行的指纹备忘录，安装时不再重复计算。
+    """
+    by_name: dict[str, list[Path]] = {}
+    for skill_dir in skill_dirs:
+        by_name.setdefault(skill_dir.name, []).append(skill_dir)
+    duplicates = {name: paths for name, paths in by_name.items() if len(paths) > 1}
+    if not duplicates:
+        return skill_dirs
+
+    candidates = [p for paths in duplicates.values() for p in paths]
+    mapper = executor.map if executor is not None else map
+    digests = dict(zip(candidates, (fp.digest for fp in mapper(_source_fingerprints.get, candidates))))
+    conflicts = {
+        name: paths for name, paths in duplicates.items() if len({digests[p] for p in paths}) > 1
+    }
+    if conflicts and priority == SourcePriority.ERROR:
+        msg = ["检测到 skill 目录名冲突（basename 重复且内容不同），无法安全安装："]
+        for name, paths in sorted(conflicts.items()):
+            msg.append(f"- {name}: " + ", ".join(str(p) for p in paths))
+        raise SystemExit("\n".join(msg))
+
+    events = get_events()
+    dropped: set[Path] = set()
+    for name, paths in sorted(duplicates.items()):
+        winner = paths[-1] if priority == SourcePriority.LAST else paths[0]
+        losers = [p for p in paths if p != winner]
+        dropped.update(losers)
+        if name in conflicts:
+            print(f"⚠️  skill 同名冲突: {name} 使用 {winner}（忽略 " + ", ".join(str(p) for p in losers) + "）")
+        for loser in losers:
+            reason = "shadowed" if name in conflicts else "duplicate"
+            events.emit("skipped", skill=name, reason=reason, path=str(loser), winner=str(winner))
+    return [d for d in skill_dirs if d not in dropped]
 
 
 @dataclass
@@ -367,6 +547,7 @@ class InstallReport:
     process_messages: list[str] = None  # 安装过程中的消息
     removed_legacy: bool = False
     removed_existing: list[str] = None
+    pruned_skills: list[str] = None  # --prune 清理的遗留 skill
 
     def __post_init__(self):
         if self.auxiliary_skills is None:
@@ -377,6 +558,8 @@ class InstallReport:
             self.process_messages = []
         if self.removed_existing is None:
             self.removed_existing = []
+        if self.pruned_skills is None:
+            self.pruned_skills = []
 
     def to_manifest_dict(self) -> dict:
         """转换为可序列化的字典格式（用于 manifest 文件）。"""
@@ -388,8 +571,10 @@ class InstallReport:
                 "dest": str(skill.dest),
                 "md5": skill.md5,
                 "type": skill.skill_type,
+                "metadata": skill.metadata.to_dict() if skill.metadata else None,
                 "status": "installed",
                 "reason": skill.reason,
+                "file_actions": skill.file_actions,
             })
         for skill in self.skipped_skills:
             skills_list.append({
@@ -398,6 +583,7 @@ class InstallReport:
                 "dest": str(skill.dest),
                 "md5": skill.md5,
                 "type": skill.skill_type,
+                "metadata": skill.metadata.to_dict() if skill.metadata else None,
                 "status": "skipped",
                 "reason": skill.reason,
             })
@@ -410,6 +596,7 @@ class InstallReport:
             "skipped_count": len(self.skipped_skills),
             "auxiliary_count": len(self.auxiliary_skills),
             "test_count": len(self.test_skills),
+            "pruned": self.pruned_skills,
             "skills": skills_list,
         }
 
@@ -503,6 +690,8 @@ def _print_report(report: InstallReport, t: get_translator().__class__) -> None:
         print(f"辅助技能: {total_auxiliary} 个已忽略（开发用，不安装）")
     if total_test > 0:
         print(f"测试技能: {total_test} 个已忽略（测试用，不安装）")
+    if report.pruned_skills:
+        print(f"已清理: {len(report.pruned_skills)} 个遗留技能（{', '.join(report.pruned_skills)}）")
 
 
 def _remove_existing(dest: Path, dry_run: bool, t: get_translator().__class__) -> str:
@@ -525,18 +714,133 @@ def _remove_existing(dest: Path, dry_run: bool, t: get_translator().__class__) -
     return t.removed_existing(dest=dest)
 
 
-def _copy_fresh(src: Path, dest: Path, dry_run: bool, t: get_translator().__class__) -> str:
+def _copy_fresh(
+    src: Path,
+    dest: Path,
+    dry_run: bool,
+    t: get_translator().__class__,
+    copy_mode: str = CopyMode.AUTO,
+    src_fingerprint: TreeFingerprint | None = None,
+) -> str:
     """复制 skill 目录到目标位置。
 
+    逐文件经由复制后端（reflink / copy_file_range / hardlink / copy）写入，
+    不支持的方式会按文件自动回退。
+
     Returns:
         操作消息
     """
     if dry_run:
         return f"{t.get('dry_run_prefix')}install: {src} -> {dest}"
-    shutil.copytree(src, dest, symlinks=False, dirs_exist_ok=False, ignore=_ignore_patterns())
+
+    digests = {}
+    if src_fingerprint is not None:
+        digests = {os.path.join(src, *rel.split("/")): entry.digest for rel, entry in src_fingerprint.files.items()}
+
+    def _copy_function(file_src: str, file_dest: str) -> None:
+        copy_file(Path(file_src), Path(file_dest), mode=copy_mode, digest=digests.get(file_src))
+
+    shutil.copytree(
+        src, dest, symlinks=False, dirs_exist_ok=False, ignore=_ignore_patterns(src), copy_function=_copy_function
+    )
     return t.installed(dest=dest)
 
 
+def _sync_tree(
+    src: Path,
+    dest: Path,
+    src_fingerprint: TreeFingerprint,
+    dry_run: bool,
+    t: get_translator().__class__,
+    copy_mode: str = CopyMode.AUTO,
+    stored_tree: StoredTree | None = None,
+    extract: Callable[[str, Path], None] | None = None,
+) -> tuple[str, SyncPlan]:
+    """把 skill 目录增量同步到目标位置。
+
+    与 `_copy_fresh` 使用相同的忽略规则对比源/目标指纹，只复制新增或变化的文件、
+    只删除源中已不存在的文件；目标不是目录时（文件或软链接）先整体移除。
+    提供 stored_tree 时从对象库物化文件，提供 extract 时从 skillpack 解出成员，均不再读取源目录。
+
+    Returns:
+        (操作消息, 逐文件同步计划)
+    """
+    dest_is_dir = dest.is_dir() and not dest.is_symlink()
+    dest_fingerprint = _installed_fingerprint(dest, src, src_fingerprint.algo) if dest_is_dir else empty_fingerprint(src_fingerprint.algo)
+    plan = diff_trees(src_fingerprint, dest_fingerprint)
+    counts = {"added": len(plan.added), "changed": len(plan.changed), "removed": len(plan.removed)}
+
+    if dry_run:
+        return f"{t.get('dry_run_prefix')}{t.synced(dest=dest, **counts)}", plan
+
+    if not dest_is_dir and (dest.exists() or dest.is_symlink()):
+        dest.unlink()
+    apply_sync(
+        plan,
+        src,
+        dest,
+        src_fingerprint,
+        cache=get_stat_cache(src_fingerprint.algo),
+        copy_mode=copy_mode,
+        resolve_src=stored_tree.object_path if stored_tree is not None else None,
+        extract=extract,
+    )
+    return t.synced(dest=dest, **counts), plan
+
+
+def _install_generation(
+    src: Path,
+    src_fingerprint: TreeFingerprint,
+    *,
+    target: Target,
+    generations: GenerationManager,
+    dry_run: bool,
+    t: get_translator().__class__,
+    sync_mode: str = SyncMode.DELTA,
+    copy_mode: str = CopyMode.AUTO,
+    stored_tree: StoredTree | None = None,
+    force: bool = False,
+    extract: Callable[[str, Path], None] | None = None,
+) -> tuple[str, SyncPlan]:
+    """以 generation 方式安装：在 staging 中构建不可变版本目录，再原子切换软链接。
+
+    delta 模式下 staging 以硬链接克隆当前版本，只写入有差异的文件；
+    目标版本已存在（如回滚后再前滚）时不做任何复制，直接切换（force 时重新构建）。
+
+    Returns:
+        (操作消息, 相对当前版本的逐文件计划)
+    """
+    name = src.name
+    dest = target.root / name
+    version = None if force else generations.find_version(name, src_fingerprint.digest)
+    base = generations.active_version(name) if sync_mode == SyncMode.DELTA and not force else None
+    base_fingerprint = (
+        _installed_fingerprint(base, src, src_fingerprint.algo) if base is not None else empty_fingerprint(src_fingerprint.algo)
+    )
+    plan = diff_trees(src_fingerprint, base_fingerprint)
+    counts = {"added": len(plan.added), "changed": len(plan.changed), "removed": len(plan.removed)}
+
+    if dry_run:
+        version_name = version.name if version is not None else f"{name}-{src_fingerprint.digest[:12]}-*"
+        return f"{t.get('dry_run_prefix')}{t.activated(dest=dest, version=version_name, **counts)}", plan
+
+    if version is None:
+        staging = generations.new_staging(name, base=base)
+        apply_sync(
+            plan,
+            src,
+            staging,
+            src_fingerprint,
+            copy_mode=copy_mode,
+            resolve_src=stored_tree.object_path if stored_tree is not None else None,
+            extract=extract,
+        )
+        _save_skill_manifest(staging, src_fingerprint.digest, src, target)
+        version = generations.commit_version(staging, name, src_fingerprint.digest)
+    generations.activate(name, version)
+    return t.activated(dest=dest, version=version.name, **counts), plan
+
+
 def _safe_remove_legacy_symlink(path: Path, dry_run: bool, t: get_translator().__class__) -> str:
     """移除旧的软链接（pipeline-skills）。
 
@@ -546,6 +850,7 @@ def _safe_remove_legacy_symlink(path: Path, dry_run: bool, t: get_translator()._
     if not path.exists() and not path.is_symlink():
         return ""
     if _is_symlink(path):
+        get_events().emit("removed", path=str(path), kind="legacy-symlink", dry_run=dry_run)
         if dry_run:
             return f"{t.get('dry_run_prefix')}remove legacy symlink: {path}"
         else:
@@ -554,6 +859,502 @@ def _safe_remove_legacy_symlink(path: Path, dry_run: bool, t: get_translator()._
     return t.skip_legacy_path(path=path)
 
 
+# 单次运行内的源目录指纹备忘录（同一 skill 在多个目标间只哈希一次；main 每次运行时重置）
+_source_fingerprints = FingerprintMemo()
+
+# 来自 skillpack 或 git 修订的 skill（虚拟源目录 → (来源, 来源中的 skill 键)）；为空时所有 skill 来自源目录
+_pack_sources: dict[str, tuple[SkillPack | GitSource, str]] = {}
+
+
+def _register_pack(pack: SkillPack | GitSource) -> list[Path]:
+    """登记 bundle / git 修订中的 skill，返回其虚拟源目录（指纹直接取自 bundle 索引或 git 树）。"""
+    src_dirs = []
+    for key, skill in sorted(pack.skills.items()):
+        src_dir = pack.path / key
+        _pack_sources[str(src_dir)] = (pack, key)
+        _source_fingerprints.put(src_dir, skill.fingerprint())
+        src_dirs.append(src_dir)
+    return src_dirs
+
+
+def _pack_extractor(src_dir: Path) -> Callable[[str, Path], None] | None:
+    """skill 来自 bundle 或 git 修订时返回成员解出函数，否则返回 None。"""
+    source = _pack_sources.get(str(src_dir))
+    if source is None:
+        return None
+    pack, key = source
+    return lambda rel, dest: pack.extract(key, rel, dest)
+
+
+def _skill_origin(src_dir: Path) -> str:
+    """skill 的真实来源（bundle / git 修订，见 IndexEntry.origin）；来自源目录时为空串。"""
+    source = _pack_sources.get(str(src_dir))
+    return source[0].origin if source is not None else ""
+
+
+def _run_origin() -> str:
+    """本次运行的真实来源（--from-pack / --from-git）；从源目录安装时为空串。"""
+    return next((pack.origin for pack, _ in _pack_sources.values()), "")
+
+
+def _infer_origin(source: str) -> str:
+    """为没有记录 origin 的旧记录推断真实来源：虚拟源目录位于 bundle 文件或 ``<仓库>@<修订>`` 之下。"""
+    if not source or Path(source).exists():
+        return ""
+    for parent in Path(source).parents:
+        if parent.is_file():
+            return f"pack:{parent}"
+        repo, sep, _ = str(parent).rpartition("@")
+        if sep and (Path(repo) / ".git").exists():
+            return f"git:{parent}"
+    return ""
+
+
+def _origin_scope(origin: str) -> str:
+    """比较来源时使用的范围：bundle 按文件；git 按仓库与仓库内路径（不含修订：新修订中删除的 skill 应被清理）。"""
+    if origin.startswith("git:"):
+        repo, _, subpath = parse_git_spec(origin[len("git:"):])
+        return f"git:{repo}:{subpath}"
+    return origin
+
+
+def _installed_matcher(src_dir: Path) -> UnionMatcher:
+    """对比已安装目录时使用的忽略匹配器：默认规则与源 skill 匹配器的并集。
+
+    目标目录中没有 .skillignore（不安装），只用默认规则会看不到源中以 ``!`` 重新包含的文件
+    （如 ``!tests/``），每次运行都把它们当作缺失重新复制；bundle 中的 skill 不带规则，以其文件清单代替。
+    """
+    source = _pack_sources.get(str(src_dir))
+    if source is None:
+        skill_matcher = get_ignore_registry().for_path(src_dir)
+    else:
+        pack, key = source
+        if isinstance(pack, GitSource):
+            skill_matcher = pack.skill_matcher(pack.skills[key].rel)
+        else:
+            skill_matcher = FileSetMatcher(_source_fingerprints.get(src_dir).files)
+    return UnionMatcher(DEFAULT_MATCHER, skill_matcher)
+
+
+def _installed_fingerprint(dest: Path, src_dir: Path, algo: str, rehash: bool = False) -> TreeFingerprint:
+    """已安装目录的指纹（按源 skill 的匹配器遍历；不存在时为空指纹）。"""
+    if not dest.is_dir():
+        return empty_fingerprint(algo)
+    return fingerprint_tree(dest, algo=algo, rehash=rehash, matcher=_installed_matcher(src_dir))
+
+
+def _skill_metadata(src_dir: Path) -> SkillMetadata:
+    source = _pack_sources.get(str(src_dir))
+    if source is not None:
+        pack, key = source
+        return SkillMetadata.from_dict(pack.skills[key].metadata)
+    return read_skill_metadata(src_dir)
+
+
+def _default_jobs() -> int:
+    """默认并发数：安装以 I/O 为主，沿用 ThreadPoolExecutor 的默认上限。"""
+    return min(32, (os.cpu_count() or 1) + 4)
+
+
+def _install_one_skill(
+    src_dir: Path,
+    *,
+    target: Target,
+    dry_run: bool,
+    force: bool,
+    t: get_translator().__class__,
+    sync_mode: str = SyncMode.DELTA,
+    copy_mode: str = CopyMode.AUTO,
+    store: ObjectStore | None = None,
+    generations: GenerationManager | None = None,
+    installed: dict[str, IndexEntry] | None = None,
+    verify: bool = False,
+    planned_action: str | None = None,
+) -> tuple[SkillInfo, list[str]]:
+    """安装单个普通技能：哈希 → 比较 → 删除/复制 → 写入 manifest。
+
+    各 skill 之间互不依赖，可在线程池中并发执行。
+    启用对象库时先把源目录入库（已存在的对象不读取），再从对象库物化到目标。
+    启用 generations 时构建不可变版本目录并原子切换软链接。
+    verify 时不比较记录的指纹，而是校验已安装文件的实际内容（见 `_verify_one_skill`）。
+    apply 时给出计划中的动作（install / skip），不再自行判断是否需要安装（目标指纹已在目标锁内校验）。
+
+    Returns:
+        (技能信息, 该技能产生的过程消息)
+    """
+    messages: list[str] = []
+    dest_dir = target.root / src_dir.name
+    with get_timings().measure(target.label, src_dir.name, "hash"):
+        src_fingerprint = _source_fingerprints.get(src_dir)
+    src_md5 = src_fingerprint.digest
+    # force 模式下忽略已安装的 MD5，强制重新安装；优先使用安装索引（一次读取），
+    # 索引中没有记录时回退到旧版 manifest（迁移）
+    entry = (installed or {}).get(src_dir.name)
+    if force:
+        installed_md5 = None
+    elif entry is not None:
+        installed_md5 = (
+            _match_recorded_hash(src_dir, src_fingerprint, entry.hash, entry.hash_algo) if dest_dir.is_dir() else None
+        )
+    else:
+        legacy_md5, legacy_algo = _get_installed_md5(dest_dir, target)
+        installed_md5 = (
+            _match_recorded_hash(src_dir, src_fingerprint, legacy_md5, legacy_algo) if legacy_md5 else None
+        )
+
+    skill_info = SkillInfo(
+        name=src_dir.name,
+        src=src_dir,
+        dest=dest_dir,
+        md5=src_md5,
+        skill_type=SkillType.NORMAL,
+        metadata=_skill_metadata(src_dir),
+    )
+
+    if planned_action == "skip":
+        skill_info.skipped = True
+        skill_info.verified = verify
+        skill_info.reason = t.table_reason_verified() if verify else t.table_reason_no_change()
+        reason = "verified" if verify else "unchanged"
+        get_events().emit("skipped", target=target.label, skill=src_dir.name, reason=reason, hash=src_md5)
+        return skill_info, messages
+    if planned_action == "install":
+        installed_md5 = None
+
+    # 检查是否需要安装（启用 generations 后，原地安装的旧目录需要迁移为版本目录）
+    migrate = generations is not None and generations.active_version(src_dir.name) is None
+    if verify and not migrate and dest_dir.is_dir():
+        return _verify_one_skill(
+            src_dir,
+            src_fingerprint,
+            skill_info,
+            target=target,
+            dry_run=dry_run,
+            t=t,
+            copy_mode=copy_mode,
+            store=store,
+            generations=generations,
+        )
+    if installed_md5 == src_md5 and not migrate:
+        skill_info.skipped = True
+        skill_info.reason = t.table_reason_no_change()
+        get_events().emit("skipped", target=target.label, skill=src_dir.name, reason="unchanged", hash=src_md5)
+        return skill_info, messages
+
+    # bundle 中的 skill 直接从 mmap 解出有变化的成员（不经过对象库）
+    extract = _pack_extractor(src_dir)
+    # copy 步骤：写入对象库、物化/复制到目标（--timings 中与 hash 分开统计）
+    timings = get_timings()
+    with timings.measure(target.label, src_dir.name, "copy"):
+        stored_tree = (
+            store.ingest(src_dir, src_fingerprint) if store is not None and extract is None and not dry_run else None
+        )
+
+    if generations is not None:
+        # generation 安装：版本目录内已写入 manifest，切换后无需再写
+        with timings.measure(target.label, src_dir.name, "copy"):
+            activate_msg, plan = _install_generation(
+                src_dir,
+                src_fingerprint,
+                target=target,
+                generations=generations,
+                dry_run=dry_run,
+                t=t,
+                sync_mode=sync_mode,
+                copy_mode=copy_mode,
+                stored_tree=stored_tree,
+                force=force,
+                extract=extract,
+            )
+        messages.append(activate_msg)
+        skill_info.file_actions = plan.to_dict()
+        skill_info.installed = True
+        skill_info.reason = t.table_reason_updated(md5=src_md5)
+        _emit_copied(target, skill_info, "generation", plan, dry_run)
+        return skill_info, messages
+
+    with timings.measure(target.label, src_dir.name, "copy"):
+        if sync_mode == SyncMode.FULL:
+            # 完整重装：直接删除旧版本，不再备份
+            remove_msg = _remove_existing(dest_dir, dry_run=dry_run, t=t)
+            if remove_msg:
+                messages.append(remove_msg)
+                get_events().emit(
+                    "removed", target=target.label, skill=src_dir.name, path=str(dest_dir), kind="skill",
+                    dry_run=dry_run,
+                )
+
+        if sync_mode == SyncMode.DELTA or store is not None or extract is not None:
+            # 增量同步：只改动有差异的文件（full 模式下目标已清空，等价于完整物化）
+            sync_msg, plan = _sync_tree(
+                src_dir,
+                dest_dir,
+                src_fingerprint,
+                dry_run=dry_run,
+                t=t,
+                copy_mode=copy_mode,
+                stored_tree=stored_tree,
+                extract=extract,
+            )
+            messages.append(sync_msg)
+            skill_info.file_actions = plan.to_dict()
+        else:
+            copy_msg = _copy_fresh(
+                src_dir, dest=dest_dir, dry_run=dry_run, t=t, copy_mode=copy_mode, src_fingerprint=src_fingerprint
+            )
+            if copy_msg:
+                messages.append(copy_msg)
+            plan = SyncPlan(added=sorted(src_fingerprint.files))
+
+    skill_info.installed = True
+    skill_info.reason = t.table_reason_updated(md5=src_md5)
+    _emit_copied(target, skill_info, sync_mode, plan, dry_run)
+    return skill_info, messages
+
+
+def _verify_one_skill(
+    src_dir: Path,
+    src_fingerprint: TreeFingerprint,
+    skill_info: SkillInfo,
+    *,
+    target: Target,
+    dry_run: bool,
+    t: get_translator().__class__,
+    copy_mode: str = CopyMode.AUTO,
+    store: ObjectStore | None = None,
+    generations: GenerationManager | None = None,
+) -> tuple[SkillInfo, list[str]]:
+    """校验并修复已安装的技能（--verify）。
+
+    不信任安装索引与 stat 缓存（手工修改可能保留大小与 mtime），逐个重新读取已安装文件，
+    与源指纹对比：无漂移时跳过；否则只写入缺失或内容不同的文件、删除多余文件。
+    generation 的版本目录不可变，有漂移时重新构建一个版本并切换。
+
+    Returns:
+        (技能信息, 该技能产生的过程消息)
+    """
+    messages: list[str] = []
+    name = src_dir.name
+    skill_info.verified = True
+    installed_root = generations.active_version(name) if generations is not None else skill_info.dest
+    with get_timings().measure(target.label, name, "verify"):
+        installed_fingerprint = (
+            _installed_fingerprint(installed_root, src_dir, src_fingerprint.algo, rehash=True)
+            if not installed_root.is_symlink()
+            else empty_fingerprint(src_fingerprint.algo)
+        )
+    drift = diff_trees(src_fingerprint, installed_fingerprint)
+    if drift.is_empty:
+        skill_info.skipped = True
+        skill_info.reason = t.table_reason_verified()
+        get_events().emit("skipped", target=target.label, skill=name, reason="verified", hash=src_fingerprint.digest)
+        return skill_info, messages
+
+    messages.append(
+        t.drift(dest=skill_info.dest, missing=len(drift.added), modified=len(drift.changed), extra=len(drift.removed))
+    )
+    # 修复时总是从源读取（不从对象库物化）：hardlink 安装中被原地修改的文件与对象共享 inode，
+    # 对象可能同样已被改动，先逐字节校验并由源文件重写这些对象
+    with get_timings().measure(target.label, name, "copy"):
+        extract = _pack_extractor(src_dir)
+        if store is not None and extract is None and not dry_run:
+            store.repair(src_dir, src_fingerprint, drift.added + drift.changed)
+        if generations is not None:
+            repair_msg, _ = _install_generation(
+                src_dir,
+                src_fingerprint,
+                target=target,
+                generations=generations,
+                dry_run=dry_run,
+                t=t,
+                copy_mode=copy_mode,
+                force=True,
+                extract=extract,
+            )
+        else:
+            # 刚才的重新哈希已刷新 stat 缓存，这里再次计算目标指纹不会重复读取文件
+            repair_msg, _ = _sync_tree(
+                src_dir,
+                skill_info.dest,
+                src_fingerprint,
+                dry_run=dry_run,
+                t=t,
+                copy_mode=copy_mode,
+                extract=extract,
+            )
+    messages.append(repair_msg)
+    skill_info.installed = True
+    skill_info.file_actions = drift.to_dict()
+    skill_info.reason = t.table_reason_repaired(count=len(drift.added) + len(drift.changed) + len(drift.removed))
+    _emit_copied(target, skill_info, "verify", drift, dry_run)
+    return skill_info, messages
+
+
+def _emit_copied(target: Target, skill_info: SkillInfo, mode: str, plan: SyncPlan, dry_run: bool) -> None:
+    """输出 copied 事件（--output ndjson）。"""
+    get_events().emit(
+        "copied",
+        target=target.label,
+        skill=skill_info.name,
+        hash=skill_info.md5,
+        mode=mode,
+        added=len(plan.added),
+        changed=len(plan.changed),
+        removed=len(plan.removed),
+        dry_run=dry_run,
+    )
+
+
+def _ignored_skill_info(src_dir: Path, target: Target, skill_type: str, reason: str) -> SkillInfo:
+    """构建不安装的技能（辅助/测试）的记录。"""
+    get_events().emit("skipped", target=target.label, skill=src_dir.name, reason=skill_type)
+    return SkillInfo(
+        name=src_dir.name,
+        src=src_dir,
+        dest=target.root / src_dir.name,  # 虚拟目标，不会实际安装
+        md5=_source_fingerprints.get(src_dir).digest,
+        skill_type=skill_type,
+        skipped=True,
+        reason=reason,
+        metadata=_skill_metadata(src_dir),
+    )
+
+
+def _record_index(
+    index: InstallIndex,
+    target: Target,
+    installed: dict[str, IndexEntry],
+    skills: list[SkillInfo],
+) -> None:
+    """把本次安装/迁移的 skill 写入安装索引，并清理原地安装目录中的旧版 manifest。"""
+    entries: list[IndexEntry] = []
+    for skill in skills:
+        previous = installed.get(skill.name)
+        fingerprint = _source_fingerprints.get(skill.src)
+        if (
+            not skill.installed
+            and previous is not None
+            and previous.hash == skill.md5
+            and previous.hash_algo == fingerprint.algo
+        ):
+            continue
+        entries.append(
+            IndexEntry(
+                name=skill.name,
+                hash=skill.md5,
+                hash_algo=fingerprint.algo,
+                source=str(skill.src),
+                installed_at=_now_stamp(),
+                files=fingerprint.files,
+                origin=_skill_origin(skill.src),
+            )
+        )
+        if not skill.dest.is_symlink():
+            for legacy in (".skill-manifest.json", f".skill-manifest.{target.label}.json"):
+                legacy_manifest = skill.dest / legacy
+                if legacy_manifest.exists():
+                    legacy_manifest.unlink()
+    index.record(entries)
+
+
+def _find_orphans(target: Target, index: InstallIndex, keep: set[str], source_roots: list[Path]) -> list[str]:
+    """找出目标中由安装器安装、但已不在源目录普通技能中的 skill（源中删除或重命名后的遗留）。
+
+    只处理安装索引（或尚未迁移的旧版 manifest）中有记录的 skill：
+    - 来自源目录的记录：来源位于本次的源目录之下或已不存在时才清理；
+    - 来自 bundle / git 修订的记录（虚拟源目录从不存在于磁盘上）：只有本次从同一个 bundle
+      或同一仓库（及仓库内路径）安装时才清理，其他来源的运行一律保留。
+    手动放入的目录、从其他源目录安装且来源仍在的 skill 不会被删除。
+    """
+    recorded = {name: (entry.source, entry.origin) for name, entry in index.load().items()}
+    if target.root.is_dir():
+        with os.scandir(target.root) as it:
+            for dir_entry in it:
+                if dir_entry.name in recorded or dir_entry.name.startswith(".") or not dir_entry.is_dir():
+                    continue
+                legacy = _read_skill_manifest(Path(dir_entry.path), target)
+                if legacy is not None:
+                    recorded[dir_entry.name] = (legacy.get("source", ""), legacy.get("origin", ""))
+
+    run_scope = _origin_scope(_run_origin())
+    orphans: list[str] = []
+    for name, (source, origin) in sorted(recorded.items()):
+        if name in keep:
+            continue
+        origin = origin or _infer_origin(source)
+        if origin:
+            if _origin_scope(origin) == run_scope:
+                orphans.append(name)
+            continue
+        source_path = Path(source) if source else None
+        if (
+            source_path is not None
+            and source_path.exists()
+            and not any(root == source_path or root in source_path.parents for root in source_roots)
+        ):
+            continue
+        orphans.append(name)
+    return orphans
+
+
+def _prune_orphans(
+    target: Target,
+    index: InstallIndex,
+    orphans: list[str],
+    generations: GenerationManager | None,
+    dry_run: bool,
+    t: get_translator().__class__,
+) -> list[str]:
+    """删除 `_find_orphans` 找出的遗留 skill 并移除其索引记录。
+
+    Returns:
+        过程消息
+    """
+    events = get_events()
+    messages: list[str] = []
+    for name in orphans:
+        dest = target.root / name
+        events.emit("removed", target=target.label, skill=name, path=str(dest), kind="orphan", dry_run=dry_run)
+        if dry_run:
+            messages.append(f"{t.get('dry_run_prefix')}{t.pruned(dest=dest)}")
+            continue
+        if generations is not None and generations.active_version(name) is not None:
+            generations.deactivate(name)
+        elif dest.is_symlink() or dest.is_file():
+            dest.unlink()
+        elif dest.is_dir():
+            shutil.rmtree(dest)
+        messages.append(t.pruned(dest=dest))
+    if not dry_run:
+        index.remove(orphans)
+    return messages
+
+
+@contextlib.contextmanager
+def _target_lock(target: Target, timeout: float | None, dry_run: bool):
+    """持有目标目录的跨进程锁（dry-run 不写入，不加锁）。
+
+    等待过其他进程时先合并对方写回的 stat 缓存；释放锁之前写回本进程的 stat 缓存，
+    使等待中的进程可以直接复用，不再重复读取未变化的文件。
+    """
+    if dry_run:
+        yield
+        return
+
+    def _on_wait(pid: int | None) -> None:
+        print(f"⏳ {target.label.upper()} 目标正被其他安装进程（pid {pid or '?'}）占用，等待释放: {target.root}")
+        get_events().emit("waiting", target=target.label, pid=pid, path=str(lock.path))
+
+    lock = TargetLock(target.root, timeout, on_wait=_on_wait)
+    with lock:
+        if lock.waited:
+            reload_stat_caches()
+        try:
+            yield
+        finally:
+            save_stat_caches()
+
+
 def _install_to_target(
     *,
     target: Target,
@@ -562,10 +1363,25 @@ def _install_to_target(
     dry_run: bool,
     force: bool = False,
     t: get_translator().__class__,
+    sync_mode: str = SyncMode.DELTA,
+    copy_mode: str = CopyMode.AUTO,
+    store: ObjectStore | None = None,
+    use_generations: bool = False,
+    keep_generations: int = 5,
+    jobs: int = 1,
+    executor: Executor | None = None,
+    prune: bool = False,
+    source_roots: list[Path] | None = None,
+    verify: bool = False,
+    lock_timeout: float | None = None,
+    engine: str = Engine.THREADS,
+    planned: PlannedTarget | None = None,
 ) -> InstallReport:
     """安装 skills 到指定目标，返回安装报告。
 
     仅安装普通技能（normal），辅助技能和测试技能将被记录但不安装。
+    每个 skill 的哈希、比较、复制和 manifest 写入作为独立任务提交到线程池；
+    结果按输入顺序收集，因此报告顺序与串行执行完全一致。
 
     Args:
         target: 目标平台配置
@@ -574,88 +1390,167 @@ def _install_to_target(
         dry_run: 预览模式
         force: 强制重装
         t: 翻译器
+        sync_mode: 重新安装方式（delta 增量同步 / full 完整复制）
+        copy_mode: 复制后端（auto / copy / reflink / hardlink）
+        store: 共享对象库（启用时从对象库物化，并记录该目标引用的版本）
+        use_generations: 使用 generation 布局（目标已启用时自动沿用）
+        keep_generations: 保留的最近代数
+        jobs: 未提供 executor 时自建线程池的并发数；asyncio 引擎下也是每个流水线阶段的 worker 数
+        executor: 共享线程池（多个目标并发安装时共用，保证总并发有界）
+        prune: 清理安装器安装过、但已不在源目录普通技能中的 skill
+        source_roots: 本次的源目录（prune 只清理来源位于其下或来源已不存在的 skill）
+        verify: 校验已安装文件的实际内容，只修复有漂移的文件
+        lock_timeout: 等待其他进程释放目标锁的最长秒数（None 表示一直等待）
+        engine: threads 每个 skill 一个线程池任务；asyncio 为 hash → install 的有界队列流水线
+        planned: apply 时该目标的计划：只执行计划中的安装与清理，与计划不符时抛出 PlanError（不做任何改动）
 
     Returns:
         InstallReport 包含所有类型的技能信息
     """
+    if executor is None:
+        with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+            return _install_to_target(
+                target=target,
+                skills_root=skills_root,
+                skill_dirs_by_type=skill_dirs_by_type,
+                dry_run=dry_run,
+                force=force,
+                t=t,
+                sync_mode=sync_mode,
+                copy_mode=copy_mode,
+                store=store,
+                use_generations=use_generations,
+                keep_generations=keep_generations,
+                executor=pool,
+                prune=prune,
+                source_roots=source_roots,
+                verify=verify,
+                lock_timeout=lock_timeout,
+                jobs=jobs,
+                engine=engine,
+                planned=planned,
+            )
+
+    timings = get_timings()
+    started_wall, started_cpu = time.perf_counter(), time.thread_time()
     process_messages: list[str] = []
     installed_skills: list[SkillInfo] = []
     skipped_skills: list[SkillInfo] = []
-    auxiliary_skills: list[SkillInfo] = []
-    test_skills: list[SkillInfo] = []
-
-    # 处理旧的软链接
-    legacy_msg = _safe_remove_legacy_symlink(target.legacy_link, dry_run=dry_run, t=t)
-    if legacy_msg:
-        process_messages.append(legacy_msg)
 
     target.root.mkdir(parents=True, exist_ok=True)
-
-    # 仅处理普通技能（安装或跳过）
-    for src_dir in skill_dirs_by_type[SkillType.NORMAL]:
-        dest_dir = target.root / src_dir.name
-        src_md5 = _calculate_skill_md5(src_dir)
-        # force 模式下忽略已安装的 MD5，强制重新安装
-        installed_md5 = None if force else _get_installed_md5(dest_dir, target)
-
-        skill_info = SkillInfo(
-            name=src_dir.name,
-            src=src_dir,
-            dest=dest_dir,
-            md5=src_md5,
-            skill_type=SkillType.NORMAL,
+    # 持有目标锁期间才读取索引：等待过其他进程时，读到的是对方刚写回的索引，未变化的 skill 全部跳过
+    with _target_lock(target, lock_timeout, dry_run):
+        # 处理旧的软链接
+        legacy_msg = _safe_remove_legacy_symlink(target.legacy_link, dry_run=dry_run, t=t)
+        if legacy_msg:
+            process_messages.append(legacy_msg)
+
+        generations = (
+            GenerationManager(target.root) if use_generations or generations_enabled(target.root) else None
         )
 
-        # 检查是否需要安装
-        if installed_md5 == src_md5:
-            reason_msg = t.table_reason_no_change()
-            skill_info.skipped = True
-            skill_info.reason = reason_msg
-            skipped_skills.append(skill_info)
-            continue
+        # 一次读取整个安装索引
+        index = InstallIndex(target.root)
+        installed = {} if force else index.load()
+
+        normal_dirs = skill_dirs_by_type[SkillType.NORMAL]
+        keep = {d.name for d in normal_dirs}
+        planned_actions: dict[str, str] = {}
+        if planned is not None:
+            # 持有目标锁后再次核对计划：此后不会再有其他进程改动该目标
+            planned_actions = _check_planned_target(
+                planned, keep, _find_orphans(target, index, keep, source_roots or [skills_root]) if prune else []
+            )
 
-        # 需要安装：直接删除旧版本，不再备份
-        remove_msg = _remove_existing(dest_dir, dry_run=dry_run, t=t)
-        if remove_msg:
-            process_messages.append(remove_msg)
+        def _install(src_dir: Path) -> tuple[SkillInfo, list[str]]:
+            return timings.timed(
+                target.label,
+                src_dir.name,
+                "total",
+                _install_one_skill,
+                src_dir,
+                target=target,
+                dry_run=dry_run,
+                force=force,
+                t=t,
+                sync_mode=sync_mode,
+                copy_mode=copy_mode,
+                store=store,
+                generations=generations,
+                installed=installed,
+                verify=verify,
+                planned_action=planned_actions.get(src_dir.name),
+            )
+
+        def _hash(src_dir: Path) -> Path:
+            with timings.measure(target.label, src_dir.name, "hash"):
+                _source_fingerprints.get(src_dir)
+            return src_dir
 
-        copy_msg = _copy_fresh(src_dir, dest=dest_dir, dry_run=dry_run, t=t)
-        if copy_msg:
-            process_messages.append(copy_msg)
+        # 仅普通技能会被安装或跳过；辅助技能和测试技能只记录（仍需计算指纹用于报告）
+        normal_futures = (
+            [executor.submit(_install, src_dir) for src_dir in normal_dirs] if engine == Engine.THREADS else []
+        )
+        auxiliary_futures = [
+            executor.submit(
+                _ignored_skill_info, src_dir, target, SkillType.AUXILIARY, "辅助技能（开发用，不安装到生产环境）"
+            )
+            for src_dir in skill_dirs_by_type[SkillType.AUXILIARY]
+        ]
+        test_futures = [
+            executor.submit(
+                _ignored_skill_info, src_dir, target, SkillType.TEST, "测试技能（测试用，不安装到生产环境）"
+            )
+            for src_dir in skill_dirs_by_type[SkillType.TEST]
+        ]
+
+        if engine == Engine.ASYNCIO:
+            # 哈希与安装是两个由有界队列连接的阶段：第 N+1 个 skill 的哈希与第 N 个的复制重叠
+            workers = max(1, jobs)
+            normal_results = run_pipeline(
+                normal_dirs,
+                [Stage("hash", _hash, workers), Stage("install", _install, workers)],
+                executor=executor,
+                queue_size=2 * workers,
+            )
+        else:
+            normal_results = [future.result() for future in normal_futures]
 
+        for skill_info, messages in normal_results:
+            process_messages.extend(messages)
+            if skill_info.installed:
+                installed_skills.append(skill_info)
+            else:
+                skipped_skills.append(skill_info)
+
+        # 单个事务写回安装索引：新安装的 skill，以及索引中尚无记录（从旧版 manifest 迁移）的 skill
         if not dry_run:
-            _save_skill_manifest(dest_dir, src_md5, src_dir, target)
+            _record_index(index, target, installed, installed_skills + skipped_skills)
 
-        reason_msg = t.table_reason_updated(md5=src_md5)
-        skill_info.installed = True
-        skill_info.reason = reason_msg
-        installed_skills.append(skill_info)
-
-    # 记录辅助技能（不安装）
-    for src_dir in skill_dirs_by_type[SkillType.AUXILIARY]:
-        skill_info = SkillInfo(
-            name=src_dir.name,
-            src=src_dir,
-            dest=target.root / src_dir.name,  # 虚拟目标，不会实际安装
-            md5=_calculate_skill_md5(src_dir),
-            skill_type=SkillType.AUXILIARY,
-            skipped=True,
-            reason="辅助技能（开发用，不安装到生产环境）",
-        )
-        auxiliary_skills.append(skill_info)
-
-    # 记录测试技能（不安装）
-    for src_dir in skill_dirs_by_type[SkillType.TEST]:
-        skill_info = SkillInfo(
-            name=src_dir.name,
-            src=src_dir,
-            dest=target.root / src_dir.name,  # 虚拟目标，不会实际安装
-            md5=_calculate_skill_md5(src_dir),
-            skill_type=SkillType.TEST,
-            skipped=True,
-            reason="测试技能（测试用，不安装到生产环境）",
-        )
-        test_skills.append(skill_info)
+        pruned: list[str] = []
+        if prune:
+            pruned = (
+                planned.pruned if planned is not None else _find_orphans(target, index, keep, source_roots or [skills_root])
+            )
+            process_messages.extend(_prune_orphans(target, index, pruned, generations, dry_run=dry_run, t=t))
+        if not dry_run:
+            get_events().emit("manifest-saved", target=target.label, kind="index", path=str(index.path))
+        index.close()
+
+        # 记录新的一代并清理过旧的版本目录
+        if generations is not None and not dry_run:
+            number = generations.record()
+            if number is not None:
+                process_messages.append(t.generation_recorded(number=number, root=target.root))
+            generations.prune(keep_generations)
+
+        # 记录该目标引用的版本（供垃圾回收判断哪些对象仍在使用）
+        if store is not None and not dry_run:
+            store.update_refs(
+                target.label,
+                {s.name: s.md5 for s in installed_skills + skipped_skills if store.has_tree(s.md5)},
+            )
+            store.remove_refs(target.label, pruned)
 
     # 构建报告
     report = InstallReport(
@@ -663,34 +1558,680 @@ def _install_to_target(
         target_root=target.root,
         installed_skills=installed_skills,
         skipped_skills=skipped_skills,
-        auxiliary_skills=auxiliary_skills,
-        test_skills=test_skills,
+        auxiliary_skills=[f.result() for f in auxiliary_futures],
+        test_skills=[f.result() for f in test_futures],
         process_messages=process_messages,
+        pruned_skills=pruned,
     )
 
+    timings.record_target(target.label, time.perf_counter() - started_wall, time.thread_time() - started_cpu)
     return report
 
 
+def _print_generations(targets: list[Target]) -> None:
+    """打印各目标的 generation 记录（* 标记当前代）。"""
+    for target in targets:
+        generations = GenerationManager(target.root)
+        records = generations.list_generations()
+        current = generations.current()
+        print(f"\n{target.label.upper()}: {target.root}")
+        if not records:
+            print("   (未启用 generations)")
+            continue
+        for record in records:
+            marker = "*" if record.number == current else " "
+            print(f" {marker} {record.number:>4}  {record.created_at}  {len(record.skills)} 个技能")
+
+
+def _sync_index_with_generation(target: Target, generations: GenerationManager) -> None:
+    """回滚后按各版本目录内的 manifest 更新安装索引，并移除已不在当前代中的记录（调用方需持有目标锁）。"""
+    index = InstallIndex(target.root)
+    active = generations.active_skills()
+    entries: list[IndexEntry] = []
+    for name in active:
+        version_dir = target.root / name
+        manifest = _read_skill_manifest(version_dir, target)
+        if not manifest or not manifest.get("md5"):
+            continue
+        algo = manifest.get("hash_algo", DEFAULT_HASH)
+        source = manifest.get("source", "")
+        # 来源目录仍在时按其 .skillignore 遍历版本目录（与安装时对比所用的匹配器一致）
+        matcher = (
+            UnionMatcher(DEFAULT_MATCHER, get_ignore_registry().for_path(Path(source)))
+            if source and Path(source).is_dir()
+            else DEFAULT_MATCHER
+        )
+        entries.append(
+            IndexEntry(
+                name=name,
+                hash=manifest["md5"],
+                hash_algo=algo,
+                source=source,
+                installed_at=_now_stamp(),
+                files=fingerprint_tree(version_dir, algo=algo, matcher=matcher).files,
+                origin=manifest.get("origin", ""),
+            )
+        )
+    index.record(entries)
+    index.remove([name for name in index.load() if name not in active and not (target.root / name).exists()])
+    index.close()
+
+
+def _rollback_targets(
+    targets: list[Target],
+    number: int | None,
+    dry_run: bool,
+    t: get_translator().__class__,
+    lock_timeout: float | None = None,
+) -> int:
+    """把各目标切换到指定代（缺省为上一代）；只切换软链接，与 skill 大小无关。
+
+    切换软链接与改写安装索引都在目标锁内完成，不会与并发的安装交错（否则索引与当前代可能不一致）。
+    """
+    status = 0
+    for target in targets:
+        try:
+            # 目标目录不存在时没有可回滚的代，不为此创建目录与锁文件
+            with _target_lock(target, lock_timeout, dry_run or not target.root.is_dir()):
+                generations = GenerationManager(target.root)
+                record = generations.rollback(number, dry_run=dry_run)
+                if not dry_run:
+                    _sync_index_with_generation(target, generations)
+        except (GenerationError, TargetLockTimeout) as exc:
+            print(f"❌ {target.label.upper()}: {exc}")
+            get_events().emit("error", target=target.label, message=str(exc), type=type(exc).__name__)
+            status = 1
+            continue
+        prefix = t.get("dry_run_prefix") if dry_run else ""
+        print(f"{prefix}⏪ {target.label.upper()}: 已切换到 generation {record.number}（{len(record.skills)} 个技能）")
+    return status
+
+
+def _fsck_skill(target: Target, entry: IndexEntry, recorded: dict[str, FileEntry]) -> SyncPlan:
+    """按索引中的文件清单检查单个已安装 skill（缺失 / 被修改 / 多余的文件）。
+
+    文件摘要经由 stat 缓存：mtime 等未变化的文件不会被重新读取。
+    清单中的文件总会被检查（即使默认规则会忽略它，如源中以 ``!tests/`` 重新包含的文件），
+    清单之外只有默认规则可见的文件才算多余；
+    索引中没有文件清单（旧版记录）时只比较整体指纹，不一致时把全部文件记为被修改。
+    """
+    dest = target.root / entry.name
+    matcher = UnionMatcher(DEFAULT_MATCHER, FileSetMatcher(recorded))
+    actual = fingerprint_tree(dest, algo=entry.hash_algo, matcher=matcher) if dest.is_dir() else empty_fingerprint(entry.hash_algo)
+    if not recorded and actual.files:
+        return SyncPlan() if actual.digest == entry.hash else SyncPlan(changed=sorted(actual.files))
+    return diff_trees(TreeFingerprint(digest=entry.hash, files=recorded, algo=entry.hash_algo), actual)
+
+
+def _fsck_targets(targets: list[Target], jobs: int, lock_timeout: float | None) -> int:
+    """检查各目标中已安装的 skill 是否仍与安装索引一致（--fsck）。
+
+    每个目标一次读出全部记录与文件清单，各 skill 的检查提交到线程池并发执行；
+    持有目标锁，避免与正在进行的安装交错导致误报。
+
+    Returns:
+        退出码（全部一致为 0，发现问题为 1）
+    """
+    events = get_events()
+    status = 0
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        for target in targets:
+            index = InstallIndex(target.root)
+            if not index.exists():
+                print(f"\n🩺 {target.label.upper()}: {target.root}（没有安装索引，跳过）")
+                continue
+            with _target_lock(target, lock_timeout, dry_run=False):
+                entries = index.load()
+                files = index.all_files()
+                index.close()
+                futures = {
+                    name: pool.submit(_fsck_skill, target, entry, files.get(name, {}))
+                    for name, entry in sorted(entries.items())
+                }
+                results = {name: future.result() for name, future in futures.items()}
+
+            broken = {name: plan for name, plan in results.items() if not plan.is_empty}
+            print(f"\n🩺 {target.label.upper()}: {target.root}（{len(results)} 个技能）")
+            for name, plan in broken.items():
+                print(f"   ❌ {name}: 缺失 {len(plan.added)}，被修改 {len(plan.changed)}，多余 {len(plan.removed)}")
+                for rel in plan.added:
+                    print(f"      - {rel}")
+                for rel in plan.changed:
+                    print(f"      ~ {rel}")
+                for rel in plan.removed:
+                    print(f"      + {rel}")
+            for name, plan in results.items():
+                events.emit(
+                    "fsck",
+                    target=target.label,
+                    skill=name,
+                    ok=plan.is_empty,
+                    missing=plan.added,
+                    modified=plan.changed,
+                    extra=plan.removed,
+                )
+            print(f"   {len(results) - len(broken)} 个一致，{len(broken)} 个有问题")
+            if broken:
+                status = 1
+    if status:
+        print("\n💡 使用 --verify 只修复有问题的文件")
+    return status
+
+
+def _watch_sources(
+    *,
+    targets: list[Target],
+    source_paths: list[Path],
+    known_skills: dict[str, Path],
+    exclude: set[str],
+    args: argparse.Namespace,
+    store: ObjectStore | None,
+    t: get_translator().__class__,
+) -> int:
+    """监听源目录，每批变化只重装受影响的 skill（Ctrl+C 退出）。
+
+    Args:
+        known_skills: 已发现的普通技能（名称 → 源目录），用于检查新 skill 的目录名冲突
+    """
+    global _source_fingerprints
+    roots = [p for p in source_paths if p.exists()]
+    watcher = create_watcher(roots, polling=args.watch_poll)
+    kind = "轮询" if isinstance(watcher, PollingWatcher) else "inotify"
+    print(f"👀 监听源目录变化（{kind}，Ctrl+C 退出）: " + ", ".join(str(p) for p in roots))
+    prefix = t.get("dry_run_prefix") if args.dry_run else ""
+    try:
+        with ThreadPoolExecutor(max_workers=args.jobs) as skill_pool:
+            while True:
+                changed = next_batch(watcher)
+                normal: list[Path] = []
+                for skill_dir in sorted(affected_skills(changed, roots)):
+                    if skill_dir.name in exclude:
+                        continue
+                    root = next(r for r in roots if skill_dir == r or r in skill_dir.parents)
+                    if _determine_skill_type(skill_dir, root) != SkillType.NORMAL:
+                        continue
+                    existing = known_skills.setdefault(skill_dir.name, skill_dir)
+                    if existing != skill_dir:
+                        print(f"⚠️  skill 目录名冲突，跳过: {skill_dir}（已有 {existing}）")
+                        continue
+                    normal.append(skill_dir)
+                if not normal:
+                    continue
+
+                # 每批重新计算指纹与忽略规则（stat 缓存使未变化的文件无需重新读取）
+                _source_fingerprints = FingerprintMemo()
+                configure_ignore_roots(roots)
+                started = time.monotonic()
+                for target in targets:
+                    try:
+                        report = _install_to_target(
+                            target=target,
+                            skills_root=roots[0],
+                            skill_dirs_by_type={
+                                SkillType.NORMAL: normal, SkillType.AUXILIARY: [], SkillType.TEST: []
+                            },
+                            dry_run=args.dry_run,
+                            t=t,
+                            sync_mode=args.sync_mode,
+                            copy_mode=args.copy_mode,
+                            store=store,
+                            use_generations=args.generations,
+                            keep_generations=args.keep_generations,
+                            executor=skill_pool,
+                            lock_timeout=args.lock_timeout,
+                            jobs=args.jobs,
+                            engine=args.engine,
+                        )
+                    except TargetLockTimeout as exc:
+                        # 本批跳过该目标，下一批变化时再试
+                        print(f"⚠️  {exc}")
+                        continue
+                    for message in report.process_messages:
+                        print(message)
+                    updated = ", ".join(s.name for s in report.installed_skills) or "无变化"
+                    print(f"{prefix}🔁 {target.label.upper()}: {updated}")
+                elapsed_ms = (time.monotonic() - started) * 1000
+                print(f"   ⏱️  {len(normal)} 个技能，用时 {elapsed_ms:.0f} ms")
+                if not args.dry_run:
+                    save_stat_caches()
+                    get_frontmatter_cache().save()
+    except KeyboardInterrupt:
+        print("\n👋 已停止监听")
+        return 0
+    finally:
+        watcher.close()
+
+
+def _build_skillpack(
+    out: Path,
+    skill_dirs: list[Path],
+    compression: str,
+    dry_run: bool,
+    t: get_translator().__class__,
+) -> int:
+    """把普通技能打包为单个 .skillpack 文件。"""
+    if dry_run:
+        print(f"{t.get('dry_run_prefix')}📦 打包 {len(skill_dirs)} 个技能 -> {out}: "
+              + ", ".join(d.name for d in skill_dirs))
+        return 0
+    try:
+        fingerprints = build_pack(
+            out, [(d, read_skill_metadata(d).to_dict()) for d in skill_dirs], compression=compression
+        )
+    except SkillPackError as exc:
+        print(f"❌ {exc}")
+        return 1
+    total_files = sum(len(fp.files) for fp in fingerprints.values())
+    total_bytes = sum(fp.total_bytes for fp in fingerprints.values())
+    print(
+        f"📦 已打包 {len(fingerprints)} 个技能（{total_files} 个文件，{total_bytes} 字节，{compression}）"
+        f" -> {out}（{out.stat().st_size} 字节）"
+    )
+    save_stat_caches()
+    return 0
+
+
+def _profile_output(argv: list[str]) -> str | None:
+    """预先解析 --profile（其余参数交给 _run 的完整解析器）。"""
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument("--profile", type=str, default=None)
+    args, _ = parser.parse_known_args(argv)
+    return args.profile
+
+
 def main(argv: list[str]) -> int:
+    """入口：指定 --profile 时在 cProfile 中运行整个安装流程。"""
+    profile_out = _profile_output(argv)
+    if profile_out is None:
+        return _run(argv)
+
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(_run, argv)
+    finally:
+        profiler.dump_stats(profile_out)
+        print(f"🔬 性能剖析已保存: {profile_out}（python3 -m pstats {profile_out} 查看）")
+
+
+def _run(argv: list[str]) -> int:
     # 初始化翻译器
     t = get_translator()
 
     parser = argparse.ArgumentParser(description=t.get("arg_help_description"))
+    parser.add_argument(
+        "command", nargs="?", choices=PLAN_COMMANDS, default="install",
+        help="install 直接安装（默认）；plan 只计算并写出安装计划；apply 按计划文件执行",
+    )
+    parser.add_argument("plan_file", nargs="?", metavar="PLAN", help="apply 要执行的计划文件")
+    parser.add_argument(
+        "-o", "--plan-output", default="plan.json", metavar="FILE",
+        help="plan 写出的计划文件（默认 %(default)s）",
+    )
     parser.add_argument("--dry-run", action="store_true", help=t.get("arg_help_dry_run"))
     parser.add_argument("--codex", action="store_true", help=t.get("arg_help_codex"))
     parser.add_argument("--claude", action="store_true", help=t.get("arg_help_claude"))
     parser.add_argument("--force", action="store_true", help=t.get("arg_help_force"))
+    parser.add_argument(
+        "--fsck", action="store_true",
+        help="按安装索引检查各目标中已安装的技能，报告缺失、被修改与多余的文件（发现问题时退出码为 1）",
+    )
+    parser.add_argument(
+        "--lock-timeout", type=float, default=600, metavar="SECONDS",
+        help="其他进程正在安装同一目标时的最长等待秒数（默认 %(default)s；0 表示不等待，负数表示一直等待）",
+    )
+    parser.add_argument(
+        "--verify", action="store_true",
+        help="校验已安装文件的实际内容（不信任索引与 stat 缓存），只修复缺失或被修改的文件并报告每个技能的漂移",
+    )
     parser.add_argument("--source", type=str, default=None, help="指定额外的 skills 源目录路径")
+    parser.add_argument(
+        "--sync-mode", choices=[SyncMode.DELTA, SyncMode.FULL], default=SyncMode.DELTA,
+        help="重新安装方式：delta 仅同步有差异的文件（默认），full 删除后完整复制",
+    )
+    parser.add_argument(
+        "--copy-mode", choices=COPY_MODES, default=CopyMode.AUTO,
+        help="复制后端：auto 依次尝试 reflink/copy_file_range/普通复制（默认）；"
+             "hardlink 硬链接到共享只读对象库 ~/.bensz-skills/objects（所有目标与对象共享 inode，原地修改任一"
+             "已安装文件会同时改动其他目标，不要用于会被手工编辑的目标；--verify 可修复）；不支持时逐文件回退",
+    )
+    parser.add_argument(
+        "--store", action="store_true",
+        help="经由内容寻址对象库 ~/.bensz-skills 安装（相同文件只存一份；--copy-mode hardlink 时自动启用）",
+    )
+    parser.add_argument(
+        "--gc", action="store_true",
+        help="安装完成后清理对象库中不再被任何目标引用的版本与对象",
+    )
+    parser.add_argument(
+        "--generations", action="store_true",
+        help="以 generation 方式安装：在 staging 中构建不可变版本并原子切换软链接（目标启用后自动沿用）",
+    )
+    parser.add_argument(
+        "--keep-generations", type=int, default=5, metavar="K",
+        help="每个目标保留的最近代数（默认 %(default)s）",
+    )
+    parser.add_argument(
+        "--rollback", type=int, nargs="?", const=0, default=None, metavar="N",
+        help="把目标切换回第 N 代（省略 N 时回到上一代）",
+    )
+    parser.add_argument(
+        "--list-generations", action="store_true",
+        help="列出各目标的 generation 记录",
+    )
+    parser.add_argument(
+        "--jobs", "-j", type=int, default=_default_jobs(), metavar="N",
+        help="并发工作线程数（跨 skill 与目标共享，默认 %(default)s；1 表示串行）",
+    )
+    parser.add_argument(
+        "--engine", choices=ENGINES, default=Engine.THREADS,
+        help="安装引擎：threads 每个技能一个线程池任务（默认）；"
+             "asyncio 哈希与安装为有界队列连接的流水线阶段，阻塞调用交给线程池",
+    )
+    parser.add_argument(
+        "--rescan", action="store_true",
+        help="忽略 skill 发现缓存，重新遍历源目录",
+    )
+    parser.add_argument(
+        "--watch", action="store_true",
+        help="安装后持续监听源目录，只重装发生变化的 skill（inotify，不可用时回退为轮询）",
+    )
+    parser.add_argument(
+        "--watch-poll", action="store_true",
+        help="--watch 时强制使用轮询（如网络文件系统上 inotify 收不到事件）",
+    )
+    parser.add_argument(
+        "--hash", choices=HASH_ALGORITHMS, default=None,
+        help="内容指纹的哈希算法（默认 md5；xxh3 需要 xxhash；git 为 git blob ID）。切换算法后未变化的 skill 仍会被跳过",
+    )
+    parser.add_argument(
+        "--hash-processes", type=int, default=os.cpu_count() or 1, metavar="N",
+        help="大型 skill 哈希使用的进程数（默认 %(default)s；1 表示不使用进程池）",
+    )
+    parser.add_argument(
+        "--hash-parallel-files", type=int, default=256, metavar="N",
+        help="单个 skill 中待哈希文件数达到 N 时使用进程池（默认 %(default)s）",
+    )
+    parser.add_argument(
+        "--hash-parallel-bytes", type=int, default=64 * 1024 * 1024, metavar="BYTES",
+        help="或待哈希总字节数达到 BYTES 时使用进程池（默认 %(default)s）",
+    )
+    parser.add_argument(
+        "--pack", type=str, default=None, metavar="OUT",
+        help="把源目录中的普通技能打包为单个 .skillpack 文件（不安装）",
+    )
+    parser.add_argument(
+        "--pack-compression", choices=COMPRESSIONS, default=Compression.NONE,
+        help="--pack 的压缩方式：none（默认）或 zstd（逐文件压缩，需要 zstandard）",
+    )
+    parser.add_argument(
+        "--from-pack", type=str, default=None, metavar="FILE",
+        help="从 .skillpack 文件安装（mmap 读取，只解出有变化的文件）",
+    )
+    parser.add_argument(
+        "--from-git", type=str, default=None, metavar="REPO@REV[:PATH]",
+        help="直接从本地 git 仓库的某个修订安装（不检出工作区；git blob ID 作为内容指纹）",
+    )
+    parser.add_argument(
+        "--timings", action="store_true",
+        help="统计各阶段、各目标、各 skill 的墙钟/CPU 时间与读写字节数，输出到报告并写入 manifest",
+    )
+    parser.add_argument(
+        "--profile", type=str, default=None, metavar="OUT",
+        help="用 cProfile 剖析整个运行并保存到 OUT（只覆盖主线程，建议配合 -j 1）",
+    )
+    parser.add_argument(
+        "--debug", action="store_true",
+        help="向 stderr 输出调试日志（如发现阶段被剪掉的含 SKILL.md 的目录）",
+    )
+    parser.add_argument(
+        "--prune", action="store_true",
+        help="清理目标中由安装器安装、但已不在源目录普通技能中的 skill（可与 --dry-run 组合预览）",
+    )
+    parser.add_argument(
+        "--source-priority",
+        choices=[SourcePriority.FIRST, SourcePriority.LAST, SourcePriority.ERROR],
+        default=SourcePriority.FIRST,
+        help="多个源目录中有内容不同的同名 skill 时：first 以先列出的源目录为准（默认），last 以后列出的为准，error 报错退出",
+    )
+    parser.add_argument(
+        "--output", choices=OUTPUT_FORMATS, default=OutputFormat.TEXT,
+        help="输出格式：text（默认，人类可读报告）或 ndjson（每个动作一行 JSON 事件，不渲染报告）",
+    )
     args = parser.parse_args(argv)
+    if args.jobs < 1:
+        parser.error("--jobs 必须 >= 1")
+    if args.debug:
+        logging.basicConfig(level=logging.DEBUG, format="🐞 %(name)s: %(message)s")
+    if args.lock_timeout < 0:
+        args.lock_timeout = None
+    if args.from_pack and (args.pack or args.watch):
+        parser.error("--from-pack 不能与 --pack 或 --watch 同时使用")
+    if args.verify and args.force:
+        parser.error("--verify 不能与 --force 同时使用")
+    if args.from_git and (args.from_pack or args.pack or args.watch):
+        parser.error("--from-git 不能与 --from-pack、--pack 或 --watch 同时使用")
+    if (args.command == "apply") != (args.plan_file is not None):
+        parser.error("apply 需要且只有 apply 接受计划文件参数")
+    if args.command != "install" and (
+        args.watch or args.pack or args.from_pack or args.from_git or args.fsck
+        or args.rollback is not None or args.list_generations
+    ):
+        parser.error(f"{args.command} 不能与 --watch、--pack、--from-pack、--from-git、--fsck 或 generation 管理操作同时使用")
+    if args.command == "plan":
+        args.dry_run = True
+    if args.hash and args.hash not in available_algorithms():
+        parser.error(f"哈希算法 {args.hash} 在当前环境不可用（xxh3 需要 pip install xxhash）")
+    set_default_algorithm(args.hash or DEFAULT_HASH)
+    configure_parallel_hashing(
+        processes=args.hash_processes, min_files=args.hash_parallel_files, min_bytes=args.hash_parallel_bytes
+    )
+
+    if args.output != OutputFormat.NDJSON:
+        configure_events(None)
+        return _execute(args, t)
+
+    # NDJSON：事件直接写到原始 stdout，人类可读的文本全部丢弃
+    events = configure_events(sys.stdout)
+    with open(os.devnull, "w", encoding="utf-8") as devnull, contextlib.redirect_stdout(devnull):
+        try:
+            return _execute(args, t)
+        except SystemExit as exc:
+            if isinstance(exc.code, str):
+                events.emit("error", message=exc.code, type="SystemExit")
+                return 1
+            raise
+        except Exception as exc:
+            events.emit("error", message=str(exc), type=type(exc).__name__)
+            return 1
+
+
+def _build_plan(
+    args: argparse.Namespace,
+    targets: list[Target],
+    reports: list[InstallReport],
+    skill_dirs_by_type: dict[str, list[Path]],
+    source_paths: list[Path],
+    skills_root: Path,
+) -> InstallPlan:
+    """把 plan（dry-run）的计算结果整理为可序列化的安装计划。"""
+    algo = default_algorithm()
+    planned_targets: list[PlannedTarget] = []
+    for target, report in zip(targets, reports):
+        actions = [
+            PlannedAction(
+                skill=skill.name,
+                src=str(skill.src),
+                action="install",
+                added=skill.file_actions.get("added", []),
+                changed=skill.file_actions.get("changed", []),
+                removed=skill.file_actions.get("removed", []),
+                dest_digest=_planned_dest_digest(target.root, skill.name, skill.src, algo),
+            )
+            for skill in report.installed_skills
+        ]
+        actions.extend(
+            PlannedAction(
+                skill=skill.name,
+                src=str(skill.src),
+                action="skip",
+                dest_digest=_planned_dest_digest(target.root, skill.name, skill.src, algo),
+            )
+            for skill in report.skipped_skills
+        )
+        planned_targets.append(
+            PlannedTarget(
+                label=target.label,
+                root=str(target.root),
+                legacy_link=str(target.legacy_link),
+                actions=actions,
+                pruned=report.pruned_skills,
+            )
+        )
+    return InstallPlan(
+        hash_algo=algo,
+        options={key: getattr(args, key) for key in PLAN_OPTIONS},
+        source_roots=[str(p) for p in source_paths],
+        skills_root=str(skills_root),
+        skills={skill_type: [str(p) for p in dirs] for skill_type, dirs in skill_dirs_by_type.items()},
+        fingerprints={
+            str(d): InstallPlan.encode_fingerprint(_source_fingerprints.get(d))
+            for d in skill_dirs_by_type[SkillType.NORMAL]
+        },
+        targets=planned_targets,
+    )
+
+
+def _planned_dest_digest(root: Path, skill: str, src: Path, algo: str) -> str | None:
+    """计划中记录的目标指纹（目标不存在时为 None）。"""
+    dest = root / skill
+    return _installed_fingerprint(dest, src, algo).digest if dest.is_dir() else None
+
+
+def _stale_actions(planned: PlannedTarget, algo: str) -> list[str]:
+    """核对计划中每个技能（install 与 skip）在目标中的当前指纹，返回已变化的说明。"""
+    stale: list[str] = []
+    for action in planned.actions:
+        if _planned_dest_digest(Path(planned.root), action.skill, Path(action.src), algo) != action.dest_digest:
+            stale.append(f"目标已变化: {Path(planned.root) / action.skill}")
+    return stale
+
+
+def _check_planned_target(planned: PlannedTarget, normal: set[str], orphans: list[str]) -> dict[str, str]:
+    """在目标锁内核对计划（apply）：目标指纹、技能集合与将被清理的技能都必须与计划一致。
+
+    Returns:
+        技能名 → 计划中的动作（install / skip）
+
+    Raises:
+        PlanError: 与计划不符（此时尚未改动该目标）
+    """
+    actions = {action.skill: action.action for action in planned.actions}
+    stale = _stale_actions(planned, default_algorithm())
+    if set(actions) != normal:
+        stale.append(f"{planned.label} 的技能集合与计划不符: " + ", ".join(sorted(set(actions) ^ normal)))
+    if sorted(orphans) != sorted(planned.pruned):
+        stale.append(f"{planned.label} 将被清理的技能与计划不符: {sorted(orphans)} != {sorted(planned.pruned)}")
+    if stale:
+        raise PlanError("\n".join(stale))
+    return actions
+
+
+def _revalidate_plan(plan: InstallPlan, jobs: int = 1) -> list[str]:
+    """重新校验计划中的源指纹与各技能的目标指纹（经由 stat 缓存，未变化的文件不重新读取）。
+
+    全部一致时把计划中的源指纹登记到本次运行的指纹备忘录，安装时不再计算。
+    安装时还会在目标锁内再次核对（见 `_check_planned_target`）。
+
+    Returns:
+        与计划不符的说明（为空表示计划仍然有效）
+    """
+    normal = plan.skills.get(SkillType.NORMAL, [])
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        current = list(pool.map(lambda src: fingerprint_tree(Path(src), algo=plan.hash_algo).digest, normal))
+
+    stale: list[str] = []
+    for src, digest in zip(normal, current):
+        if digest != plan.fingerprints[src]["digest"]:
+            stale.append(f"源已变化: {src}")
+    for target in plan.targets:
+        stale.extend(_stale_actions(target, plan.hash_algo))
+    if not stale:
+        for src in normal:
+            _source_fingerprints.put(Path(src), plan.fingerprint(src))
+    return stale
+
+
+def _execute(args: argparse.Namespace, t: get_translator().__class__) -> int:
+    """按已解析的参数执行一次安装（或 generation 管理、打包、监听）。"""
+    global _source_fingerprints
+    _source_fingerprints = FingerprintMemo()
+    _pack_sources.clear()
+    reset_copy_stats()
+    reset_timings(enabled=args.timings)
+
+    plan = None
+    if args.command == "apply":
+        try:
+            plan = InstallPlan.load(Path(args.plan_file).resolve())
+        except PlanError as exc:
+            print(f"❌ {exc}")
+            get_events().emit("error", message=str(exc), type=type(exc).__name__)
+            return 1
+        # 安装选项与哈希算法均以计划为准
+        for key, value in plan.options.items():
+            setattr(args, key, value)
+        set_default_algorithm(plan.hash_algo)
+        print(f"📝 执行安装计划: {args.plan_file}（生成于 {plan.created_at}）")
 
     install_codex = args.codex or (not args.codex and not args.claude)
     install_claude = args.claude or (not args.codex and not args.claude)
 
+    targets: list[Target] = []
+    home = Path.home()
+    if plan is not None:
+        targets = [Target(label=p.label, root=Path(p.root), legacy_link=Path(p.legacy_link)) for p in plan.targets]
+        install_codex = install_claude = False
+    if install_codex:
+        targets.append(
+            Target(
+                label="codex",
+                root=home / ".codex/skills",
+                legacy_link=home / ".codex/skills/pipeline-skills",
+            )
+        )
+    if install_claude:
+        targets.append(
+            Target(
+                label="claude",
+                root=home / ".claude/skills",
+                legacy_link=home / ".claude/skills/pipeline-skills",
+            )
+        )
+
+    # generation 管理操作：只作用于目标目录，无需扫描源目录
+    if args.list_generations:
+        _print_generations(targets)
+        return 0
+    if args.rollback is not None:
+        return _rollback_targets(
+            targets, args.rollback or None, dry_run=args.dry_run, t=t, lock_timeout=args.lock_timeout
+        )
+    if args.fsck:
+        try:
+            return _fsck_targets(targets, jobs=args.jobs, lock_timeout=args.lock_timeout)
+        except TargetLockTimeout as exc:
+            print(f"❌ {exc}")
+            get_events().emit("error", message=str(exc), type=type(exc).__name__)
+            return 1
+
     script_path = Path(__file__).resolve()
     default_skills_root = script_path.parents[2]  # .../pipelines/skills/
 
     # 处理源目录：可以是单个目录或多个目录（用逗号分隔）
-    if args.source:
+    if plan is not None:
+        source_paths = [Path(p) for p in plan.source_roots]
+        skills_root = Path(plan.skills_root)
+    elif args.source:
         # 支持逗号分隔的多个源目录
         source_paths = [Path(p).resolve() for p in args.source.split(",")]
         # 使用第一个指定的源目录作为主目录（用于版本控制等）
@@ -699,8 +2240,9 @@ def main(argv: list[str]) -> int:
         source_paths = [default_skills_root]
         skills_root = default_skills_root
 
-    # 按类型发现技能目录（支持多个源目录）
+    # 按类型发现技能目录（支持多个源目录）；.skillignore 匹配器以源目录为仓库根
     exclude = {"install-bensz-skills"}
+    configure_ignore_roots(source_paths)
 
     # 合并所有源目录的技能
     merged_skill_dirs_by_type: dict[str, list[Path]] = {
@@ -709,126 +2251,245 @@ def main(argv: list[str]) -> int:
         SkillType.TEST: [],
     }
 
-    for source_root in source_paths:
-        if not source_root.exists():
-            print(f"⚠️  警告: 源目录不存在，跳过: {source_root}")
-            continue
-        print(f"🔍 扫描源目录: {source_root}")
-        skill_dirs_by_type = _find_skill_dirs(source_root, exclude_names=exclude)
-        for skill_type in [SkillType.NORMAL, SkillType.AUXILIARY, SkillType.TEST]:
-            merged_skill_dirs_by_type[skill_type].extend(skill_dirs_by_type[skill_type])
+    timings = get_timings()
+    events = get_events()
+    with timings.phase("discovery"):
+        if plan is not None:
+            # 按计划执行：技能列表取自计划，源/目标指纹只经由 stat 缓存重新校验
+            merged_skill_dirs_by_type = {
+                skill_type: [Path(p) for p in plan.skills.get(skill_type, [])] for skill_type in merged_skill_dirs_by_type
+            }
+            stale = _revalidate_plan(plan, jobs=args.jobs)
+            if stale:
+                for message in stale:
+                    print(f"❌ {message}")
+                print("💡 计划生成后源或目标已变化，请重新运行 plan")
+                events.emit("error", message="; ".join(stale), type="StalePlan")
+                return 1
+        elif args.from_pack or args.from_git:
+            # 从单个 bundle 或 git 修订安装：技能列表与指纹直接取自 bundle 索引 / git 树，无需遍历源目录
+            try:
+                if args.from_pack:
+                    pack = SkillPack(Path(args.from_pack).resolve())
+                    print(f"📦 读取 skillpack: {pack.path}（{len(pack.skills)} 个技能）")
+                else:
+                    pack = GitSource(args.from_git)
+                    print(f"🌿 读取 git 修订: {pack.path}（{pack.commit[:12]}，{len(pack.skills)} 个技能）")
+            except (OSError, SkillPackError, GitSourceError) as exc:
+                print(f"❌ {exc}")
+                events.emit("error", message=str(exc), type=type(exc).__name__)
+                return 1
+            if pack.hash_algo != default_algorithm():
+                # 摘要是打包时的算法（git 修订为 blob ID），安装时沿用该算法
+                if args.hash:
+                    print(f"⚠️  来源使用 {pack.hash_algo} 摘要，忽略 --hash {args.hash}")
+                set_default_algorithm(pack.hash_algo)
+            source_paths = [pack.path]
+            skills_root = pack.path
+            discovered = [(pack.path, [d for d in _register_pack(pack) if d.name not in exclude])]
+        else:
+            discovered = _discover_sources(source_paths, exclude_names=exclude, rescan=args.rescan, jobs=args.jobs)
+
+    if plan is None:
+        with timings.phase("classification"):
+            # bundle 中只有打包时的普通技能；git 修订按与源目录相同的规则分类
+            merged_skill_dirs_by_type = _merge_sources(
+                discovered, priority=args.source_priority, jobs=args.jobs, classify=not args.from_pack
+            )
 
     normal_skill_dirs = merged_skill_dirs_by_type[SkillType.NORMAL]
 
     if not normal_skill_dirs:
         print(t.error_no_skills_found(root=skills_root))
+        events.emit("error", message=f"no skills found in {skills_root}", type="NoSkillsFound")
         return 1
 
-    targets: list[Target] = []
-    home = Path.home()
-    if install_codex:
-        targets.append(
-            Target(
-                label="codex",
-                root=home / ".codex/skills",
-                legacy_link=home / ".codex/skills/pipeline-skills",
-            )
-        )
-    if install_claude:
-        targets.append(
-            Target(
-                label="claude",
-                root=home / ".claude/skills",
-                legacy_link=home / ".claude/skills/pipeline-skills",
-            )
+    if args.pack:
+        return _build_skillpack(
+            Path(args.pack).resolve(), normal_skill_dirs, args.pack_compression, dry_run=args.dry_run, t=t
         )
 
-    reports: list[InstallReport] = []
-    for target in targets:
-        print(f"\n{'=' * 60}")
-        print(f"📦 {t.installing_to_target(TARGET=target.label.upper(), root=target.root)}")
-        print(f"{'=' * 60}")
-
-        # 如果是 force 模式，清除平台特定的 manifest 文件
-        if args.force:
-            for skill_dir in normal_skill_dirs:
-                dest_dir = target.root / skill_dir.name
-                # 删除旧版通用 manifest（向后兼容清理）
-                old_manifest = dest_dir / ".skill-manifest.json"
-                if old_manifest.exists():
-                    old_manifest.unlink()
-                # 删除新版平台特定 manifest
-                new_manifest = dest_dir / f".skill-manifest.{target.label}.json"
-                if new_manifest.exists():
-                    new_manifest.unlink()
-
-        # 执行安装并获取报告
-        report = _install_to_target(
-            target=target,
-            skills_root=skills_root,
-            skill_dirs_by_type=merged_skill_dirs_by_type,
-            dry_run=args.dry_run,
-            force=args.force,
-            t=t,
-        )
-        reports.append(report)
-
-        # 打印该目标的报告
-        _print_report(report, t)
-
-    # 输出总体摘要
-    print(f"\n{'=' * 60}")
-    print(t.summary_total_header())
-    print(f"{'=' * 60}")
+    store = ObjectStore() if args.store or args.copy_mode == CopyMode.HARDLINK else None
+    planned_targets = {p.label: p for p in plan.targets} if plan is not None else {}
+
+    # 各目标并发安装，共用同一个有界线程池；报告按目标顺序输出
+    with timings.phase("install"):
+        with ThreadPoolExecutor(max_workers=args.jobs) as skill_pool, \
+                ThreadPoolExecutor(max_workers=max(1, len(targets))) as target_pool:
+            report_futures = [
+                target_pool.submit(
+                    _install_to_target,
+                    target=target,
+                    skills_root=skills_root,
+                    skill_dirs_by_type=merged_skill_dirs_by_type,
+                    dry_run=args.dry_run,
+                    force=args.force,
+                    t=t,
+                    sync_mode=args.sync_mode,
+                    copy_mode=args.copy_mode,
+                    store=store,
+                    use_generations=args.generations,
+                    keep_generations=args.keep_generations,
+                    executor=skill_pool,
+                    prune=args.prune,
+                    source_roots=source_paths,
+                    verify=args.verify,
+                    lock_timeout=args.lock_timeout,
+                    jobs=args.jobs,
+                    engine=args.engine,
+                    planned=planned_targets.get(target.label),
+                )
+                for target in targets
+            ]
+            try:
+                reports: list[InstallReport] = [f.result() for f in report_futures]
+            except TargetLockTimeout as exc:
+                print(f"❌ {exc}")
+                events.emit("error", message=str(exc), type=type(exc).__name__)
+                return 1
+            except PlanError as exc:
+                for message in str(exc).splitlines():
+                    print(f"❌ {message}")
+                print("💡 计划生成后目标已变化，请重新运行 plan")
+                events.emit("error", message=str(exc), type="StalePlan")
+                return 1
 
     total_installed = sum(len(r.installed_skills) for r in reports)
     total_skipped = sum(len(r.skipped_skills) for r in reports)
     total_auxiliary = len(merged_skill_dirs_by_type[SkillType.AUXILIARY])
     total_test = len(merged_skill_dirs_by_type[SkillType.TEST])
+    gc_result = (store or ObjectStore()).gc(dry_run=args.dry_run) if args.gc else None
+
+    # ndjson 模式下各动作已作为事件输出，完全跳过表格与摘要的渲染
+    with timings.phase("report"):
+        if not events.enabled:
+            for target, report in zip(targets, reports):
+                print(f"\n{'=' * 60}")
+                print(f"📦 {t.installing_to_target(TARGET=target.label.upper(), root=target.root)}")
+                print(f"{'=' * 60}")
+
+                # 打印该目标的报告
+                _print_report(report, t)
+
+            # 输出总体摘要
+            print(f"\n{'=' * 60}")
+            print(t.summary_total_header())
+            print(f"{'=' * 60}")
+
+            print(t.summary_total_counts())
+            print(t.summary_installed_count(count=total_installed))
+            print(t.summary_skipped_count(count=total_skipped))
+            if total_auxiliary > 0:
+                print(f"辅助技能: {total_auxiliary} 个已忽略（开发用）")
+            if total_test > 0:
+                print(f"测试技能: {total_test} 个已忽略（测试用）")
+
+            # 按目标分类汇总
+            for report in reports:
+                target_name = report.target_label
+                installed = report.installed_skills
+                skipped = report.skipped_skills
+
+                print(f"\n{target_name.upper()}:")
+                if installed:
+                    print(t.summary_new_install(skills=', '.join(s.name for s in installed)))
+                if skipped:
+                    print(t.summary_unchanged(skills=', '.join(s.name for s in skipped)))
+                if report.pruned_skills:
+                    print(f"  已清理: {', '.join(report.pruned_skills)}")
+
+            methods = copy_stats()
+            if methods:
+                print("📎 复制方式: " + ", ".join(f"{name}={count}" for name, count in sorted(methods.items())))
+
+            if gc_result is not None:
+                prefix = t.get("dry_run_prefix") if args.dry_run else ""
+                print(
+                    f"{prefix}🧹 对象库清理: {gc_result.trees} 个版本, {gc_result.objects} 个对象, "
+                    f"释放 {gc_result.freed_bytes} 字节"
+                )
+
+            print(f"{'=' * 60}\n")
+
+    with timings.phase("manifest"):
+        # Write one manifest per run for traceability.
+        # 将 reports 转换为可序列化的格式
+        manifests_for_save = [r.to_manifest_dict() for r in reports]
+        manifests_for_save.append({
+            "skills_source_roots": [str(p) for p in source_paths],
+            "copy_methods": copy_stats(),
+            "hash_algo": default_algorithm(),
+            "skill_type_counts": {
+                "normal": len(merged_skill_dirs_by_type[SkillType.NORMAL]),
+                "auxiliary": len(merged_skill_dirs_by_type[SkillType.AUXILIARY]),
+                "test": len(merged_skill_dirs_by_type[SkillType.TEST]),
+            }
+        })
+        if plan is not None:
+            manifests_for_save[-1]["plan"] = str(Path(args.plan_file).resolve())
+        # plan 虽不安装，仍写回缓存：apply 校验指纹时未变化的文件只需 stat
+        if not args.dry_run or args.command == "plan":
+            save_stat_caches()
+            get_discovery_cache().save()
+            get_frontmatter_cache().save()
+
+    if args.timings:
+        # manifest 阶段只计入构建清单与保存缓存，不含随后写出清单文件本身
+        manifests_for_save[-1]["timings"] = timings.to_dict()
+
+    manifest_path = None
+    if args.command == "plan":
+        plan_path = Path(args.plan_output).resolve()
+        _build_plan(args, targets, reports, merged_skill_dirs_by_type, source_paths, skills_root).save(plan_path)
+        print(f"📝 安装计划已保存: {plan_path}（执行: install.py apply {plan_path}）")
+        events.emit("manifest-saved", kind="plan", path=str(plan_path))
+    elif args.dry_run:
+        if not events.enabled:
+            print(t.manifest_preview())
+            print(json.dumps({"runs": manifests_for_save}, ensure_ascii=False, indent=2))
+    else:
+        stamp = _now_stamp()
+        manifest_path = Path.home() / f".bensz-skills-install-manifest.{stamp}.json"
+        manifest_path.write_text(json.dumps({"runs": manifests_for_save}, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+        print(t.summary_manifest_saved(path=manifest_path))
+        events.emit("manifest-saved", kind="run", path=str(manifest_path))
+
+    if args.timings and not events.enabled:
+        print("\n⏱️  耗时统计")
+        for line in timings.format_report():
+            print(line)
+
+    events.emit(
+        "summary",
+        dry_run=args.dry_run,
+        installed=total_installed,
+        skipped=total_skipped,
+        auxiliary=total_auxiliary,
+        test=total_test,
+        targets={
+            r.target_label: {
+                "installed": [s.name for s in r.installed_skills],
+                "skipped": [s.name for s in r.skipped_skills],
+                "pruned": r.pruned_skills,
+            }
+            for r in reports
+        },
+        copy_methods=copy_stats(),
+        gc=asdict(gc_result) if gc_result is not None else None,
+        manifest=str(manifest_path) if manifest_path is not None else None,
+        timings=manifests_for_save[-1].get("timings"),
+    )
 
-    print(t.summary_total_counts())
-    print(t.summary_installed_count(count=total_installed))
-    print(t.summary_skipped_count(count=total_skipped))
-    if total_auxiliary > 0:
-        print(f"辅助技能: {total_auxiliary} 个已忽略（开发用）")
-    if total_test > 0:
-        print(f"测试技能: {total_test} 个已忽略（测试用）")
-
-    # 按目标分类汇总
-    for report in reports:
-        target_name = report.target_label
-        installed = report.installed_skills
-        skipped = report.skipped_skills
-
-        print(f"\n{target_name.upper()}:")
-        if installed:
-            print(t.summary_new_install(skills=', '.join(s.name for s in installed)))
-        if skipped:
-            print(t.summary_unchanged(skills=', '.join(s.name for s in skipped)))
-
-    print(f"{'=' * 60}\n")
-
-    # Write one manifest per run for traceability.
-    # 将 reports 转换为可序列化的格式
-    manifests_for_save = [r.to_manifest_dict() for r in reports]
-    manifests_for_save.append({
-        "skills_source_roots": [str(p) for p in source_paths],
-        "skill_type_counts": {
-            "normal": len(merged_skill_dirs_by_type[SkillType.NORMAL]),
-            "auxiliary": len(merged_skill_dirs_by_type[SkillType.AUXILIARY]),
-            "test": len(merged_skill_dirs_by_type[SkillType.TEST]),
-        }
-    })
-
-    if args.dry_run:
-        print(t.manifest_preview())
-        print(json.dumps({"runs": manifests_for_save}, ensure_ascii=False, indent=2))
-        return 0
-
-    stamp = _now_stamp()
-    manifest_path = Path.home() / f".bensz-skills-install-manifest.{stamp}.json"
-    manifest_path.write_text(json.dumps({"runs": manifests_for_save}, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
-    print(t.summary_manifest_saved(path=manifest_path))
+    if args.watch:
+        return _watch_sources(
+            targets=targets,
+            source_paths=source_paths,
+            known_skills={d.name: d for d in normal_skill_dirs},
+            exclude=exclude,
+            args=args,
+            store=store,
+            t=t,
+        )
     return 0
 
 
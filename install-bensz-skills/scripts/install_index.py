@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""Consolidated per-target install index for install-bensz-skills.
+
+每个目标目录只有一个 SQLite 状态文件（<root>/.bensz-skills-index.sqlite），
+记录已安装 skill 的名称、指纹、来源（源目录，以及 bundle / git 修订等真实来源）、安装时间与文件清单。
+最新判断只需一次查询读出全部 skill，不再逐个解析 .skill-manifest.<label>.json。
+"""
+from __future__ import annotations
+
+import sqlite3
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from fingerprint import FileEntry
+
+INDEX_FILENAME = ".bensz-skills-index.sqlite"
+SCHEMA_VERSION = 2
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS skills (
+    name         TEXT PRIMARY KEY,
+    hash         TEXT NOT NULL,
+    hash_algo    TEXT NOT NULL DEFAULT 'md5',
+    source       TEXT NOT NULL,
+    installed_at TEXT NOT NULL,
+    origin       TEXT NOT NULL DEFAULT ''
+);
+CREATE TABLE IF NOT EXISTS files (
+    skill  TEXT NOT NULL,
+    path   TEXT NOT NULL,
+    size   INTEGER NOT NULL,
+    digest TEXT NOT NULL,
+    PRIMARY KEY (skill, path)
+) WITHOUT ROWID;
+"""
+
+
+@dataclass
+class IndexEntry:
+    """索引中的单个 skill 记录。
+
+    Attributes:
+        source: 源目录（来自 bundle / git 修订时为并不存在的虚拟路径）
+        origin: 真实来源：``pack:<bundle 文件>`` 或 ``git:<仓库>@<修订>[:<路径>]``；来自源目录时为空串
+    """
+    name: str
+    hash: str
+    source: str
+    installed_at: str
+    hash_algo: str = "md5"
+    files: dict[str, FileEntry] = field(default_factory=dict)
+    origin: str = ""
+
+
+class InstallIndex:
+    """目标目录的安装索引（线程安全，写入以单个事务提交）。"""
+
+    def __init__(self, root: Path) -> None:
+        self.root = root
+        self.path = root / INDEX_FILENAME
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.root.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.executescript(_SCHEMA)
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(skills)")}
+            if "origin" not in columns:
+                # 版本 1 → 2：增加 origin 列（旧记录为空串）
+                conn.execute("ALTER TABLE skills ADD COLUMN origin TEXT NOT NULL DEFAULT ''")
+            conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('schema_version', ?)", (str(SCHEMA_VERSION),)
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def exists(self) -> bool:
+        return self.path.exists()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def load(self) -> dict[str, IndexEntry]:
+        """一次查询读出全部 skill 记录（不含文件清单）。索引不存在时返回空字典且不创建文件。"""
+        if not self.exists():
+            return {}
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT name, hash, hash_algo, source, installed_at, origin FROM skills"
+            ).fetchall()
+        return {
+            name: IndexEntry(
+                name=name, hash=hash_, hash_algo=algo, source=source, installed_at=installed_at, origin=origin
+            )
+            for name, hash_, algo, source, installed_at, origin in rows
+        }
+
+    def files(self, name: str) -> dict[str, FileEntry]:
+        """读取单个 skill 记录的文件清单。"""
+        if not self.exists():
+            return {}
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT path, size, digest FROM files WHERE skill = ? ORDER BY path", (name,)
+            ).fetchall()
+        return {path: FileEntry(size=size, digest=digest) for path, size, digest in rows}
+
+    def all_files(self) -> dict[str, dict[str, FileEntry]]:
+        """一次查询读出所有 skill 的文件清单（skill 名 → 相对路径 → 文件记录）。"""
+        if not self.exists():
+            return {}
+        with self._lock:
+            rows = self._connect().execute("SELECT skill, path, size, digest FROM files ORDER BY skill, path").fetchall()
+        files: dict[str, dict[str, FileEntry]] = {}
+        for skill, path, size, digest in rows:
+            files.setdefault(skill, {})[path] = FileEntry(size=size, digest=digest)
+        return files
+
+    def record(self, entries: list[IndexEntry]) -> None:
+        """在单个事务中写入（覆盖）多个 skill 记录及其文件清单。"""
+        if not entries:
+            return
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                for entry in entries:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO skills (name, hash, hash_algo, source, installed_at, origin) "
+                        "VALUES (?, ?, ?, ?, ?, ?)",
+                        (entry.name, entry.hash, entry.hash_algo, entry.source, entry.installed_at, entry.origin),
+                    )
+                    conn.execute("DELETE FROM files WHERE skill = ?", (entry.name,))
+                    conn.executemany(
+                        "INSERT INTO files (skill, path, size, digest) VALUES (?, ?, ?, ?)",
+                        [(entry.name, path, f.size, f.digest) for path, f in sorted(entry.files.items())],
+                    )
+
+    def remove(self, names: list[str]) -> None:
+        """在单个事务中删除多个 skill 记录。"""
+        if not names or not self.exists():
+            return
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.executemany("DELETE FROM skills WHERE name = ?", [(n,) for n in names])
+                conn.executemany("DELETE FROM files WHERE skill = ?", [(n,) for n in names])
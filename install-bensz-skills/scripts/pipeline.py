@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""asyncio install pipeline for install-bensz-skills (--engine asyncio).
+
+把单个目标的安装拆成由有界队列串联的流水线阶段（默认：hash → install → collect）：
+
+- 每个阶段有若干个协程 worker，阻塞的文件系统调用（哈希、复制、写 manifest）
+  经 run_in_executor 交给共享线程池，事件循环本身从不阻塞；
+- 阶段之间是有界 asyncio.Queue：下游变慢时上游在 put 处等待（背压），
+  预先哈希的 skill 数不超过队列容量，内存占用有界；
+- 不同阶段并行推进，因此第 N+1 个 skill 的哈希与第 N 个 skill 的复制重叠；
+- 结果按输入顺序返回，报告与线程引擎完全一致。
+"""
+from __future__ import annotations
+
+import asyncio
+from concurrent.futures import Executor
+from dataclasses import dataclass
+from typing import Any, Callable
+
+
+class Engine:
+    THREADS = "threads"
+    ASYNCIO = "asyncio"
+
+
+ENGINES = [Engine.THREADS, Engine.ASYNCIO]
+
+_DONE = object()
+
+
+@dataclass(frozen=True)
+class Stage:
+    """流水线中的一个阶段。
+
+    Attributes:
+        name: 阶段名（用于错误信息）
+        fn: 在线程池中执行的阻塞函数，参数为上一阶段的输出
+        workers: 并发执行该阶段的 worker 数
+    """
+    name: str
+    fn: Callable[[Any], Any]
+    workers: int = 1
+
+
+async def _worker(stage: Stage, inbox: asyncio.Queue, outbox: asyncio.Queue, executor: Executor) -> None:
+    loop = asyncio.get_running_loop()
+    while True:
+        item = await inbox.get()
+        if item is _DONE:
+            return
+        index, value = item
+        result = await loop.run_in_executor(executor, stage.fn, value)
+        await outbox.put((index, result))
+
+
+async def _run(items: list, stages: list[Stage], executor: Executor, queue_size: int) -> list:
+    queues = [asyncio.Queue(maxsize=queue_size) for _ in range(len(stages) + 1)]
+    results: list = [None] * len(items)
+
+    async def _feed() -> None:
+        for index, item in enumerate(items):
+            await queues[0].put((index, item))
+        await _close(0)
+
+    async def _close(position: int) -> None:
+        for _ in range(stages[position].workers):
+            await queues[position].put(_DONE)
+
+    async def _stage(position: int) -> None:
+        stage = stages[position]
+        workers = [
+            asyncio.create_task(_worker(stage, queues[position], queues[position + 1], executor))
+            for _ in range(stage.workers)
+        ]
+        await asyncio.gather(*workers)
+        # 本阶段全部完成后再通知下游结束
+        if position + 1 < len(stages):
+            await _close(position + 1)
+        else:
+            await queues[-1].put(_DONE)
+
+    async def _collect() -> None:
+        while True:
+            item = await queues[-1].get()
+            if item is _DONE:
+                return
+            index, result = item
+            results[index] = result
+
+    tasks = [asyncio.create_task(_feed()), asyncio.create_task(_collect())]
+    tasks.extend(asyncio.create_task(_stage(position)) for position in range(len(stages)))
+    try:
+        await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+    return results
+
+
+def run_pipeline(items: list, stages: list[Stage], *, executor: Executor, queue_size: int = 4) -> list:
+    """在新的事件循环中运行流水线，按输入顺序返回最后一个阶段的结果。
+
+    任一阶段抛出异常时取消整条流水线并重新抛出该异常（已提交到线程池的调用会执行完毕）。
+    """
+    if not items:
+        return []
+    return asyncio.run(_run(items, stages, executor, max(1, queue_size)))
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""Serializable install plans (plan / apply) for install-bensz-skills.
+
+``install.py plan -o plan.json`` 与 ``--dry-run`` 做同样的计算，但把结果写成安装计划：
+
+- 发现的技能（按类型）与各普通技能的源指纹（含逐文件摘要）；
+- 各目标的逐技能动作（install / skip）与逐文件差异，每个技能在目标中的当前指纹，以及将被清理的技能；
+- 本次的安装选项（同步方式、复制后端、generations、prune 等）。
+
+``install.py apply plan.json`` 不再遍历源目录：只经由 stat 缓存重新校验源指纹
+（未变化的文件只需 stat）与各技能（含 skip）的目标指纹，全部一致后按计划执行：
+只安装计划中的 install、只清理计划中的 pruned。取得目标锁后会再次核对目标指纹、技能集合与清理集合，
+任一与计划不符时拒绝执行（不改动该目标），需要重新生成计划。
+"""
+from __future__ import annotations
+
+import json
+import os
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+from fingerprint import FileEntry, TreeFingerprint
+
+PLAN_VERSION = 2
+
+
+class PlanError(ValueError):
+    """计划文件无效、版本不兼容或已过期。"""
+
+
+@dataclass
+class PlannedAction:
+    """计划中某个目标上的单个技能动作。
+
+    Attributes:
+        action: install（将安装或同步）/ skip（未变化）
+        dest_digest: 生成计划时目标中该技能的指纹（目标不存在时为 None；install 与 skip 都会记录）
+    """
+    skill: str
+    src: str
+    action: str
+    added: list[str] = field(default_factory=list)
+    changed: list[str] = field(default_factory=list)
+    removed: list[str] = field(default_factory=list)
+    dest_digest: str | None = None
+
+
+@dataclass
+class PlannedTarget:
+    """计划中的单个安装目标。"""
+    label: str
+    root: str
+    legacy_link: str
+    actions: list[PlannedAction] = field(default_factory=list)
+    pruned: list[str] = field(default_factory=list)
+
+
+@dataclass
+class InstallPlan:
+    """一次安装的完整计划（可序列化为 JSON）。"""
+    hash_algo: str
+    options: dict
+    source_roots: list[str]
+    skills_root: str
+    skills: dict[str, list[str]]
+    fingerprints: dict[str, dict]
+    targets: list[PlannedTarget]
+    created_at: str = field(default_factory=lambda: time.strftime("%Y-%m-%dT%H:%M:%S"))
+    version: int = PLAN_VERSION
+
+    @staticmethod
+    def encode_fingerprint(fingerprint: TreeFingerprint) -> dict:
+        return {
+            "digest": fingerprint.digest,
+            "files": {rel: [entry.size, entry.digest] for rel, entry in sorted(fingerprint.files.items())},
+        }
+
+    def fingerprint(self, src: str) -> TreeFingerprint:
+        """计划中记录的源指纹。"""
+        data = self.fingerprints[src]
+        files = {rel: FileEntry(size=size, digest=digest) for rel, (size, digest) in data["files"].items()}
+        return TreeFingerprint(digest=data["digest"], files=files, algo=self.hash_algo)
+
+    def save(self, path: Path) -> None:
+        """原子写出计划文件。"""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(asdict(self), ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: Path) -> InstallPlan:
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError) as exc:
+            raise PlanError(f"无法读取安装计划 {path}: {exc}") from exc
+        if data.get("version") != PLAN_VERSION:
+            raise PlanError(f"安装计划版本不兼容（{data.get('version')}，需要 {PLAN_VERSION}）: {path}")
+        try:
+            targets = [
+                PlannedTarget(
+                    label=target["label"],
+                    root=target["root"],
+                    legacy_link=target["legacy_link"],
+                    actions=[PlannedAction(**action) for action in target["actions"]],
+                    pruned=target.get("pruned", []),
+                )
+                for target in data["targets"]
+            ]
+            return cls(
+                hash_algo=data["hash_algo"],
+                options=data["options"],
+                source_roots=data["source_roots"],
+                skills_root=data["skills_root"],
+                skills=data["skills"],
+                fingerprints=data["fingerprints"],
+                targets=targets,
+                created_at=data.get("created_at", ""),
+            )
+        except (KeyError, TypeError) as exc:
+            raise PlanError(f"安装计划格式无效（{exc}）: {path}") from exc
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""Single-file skill bundles (.skillpack) for install-bensz-skills.
+
+文件格式：
+
+- 8 字节魔数 ``SKILLPK1`` + 8 字节小端序索引长度；
+- JSON 索引：每个 skill 的指纹、元数据，以及每个文件的大小、摘要、可执行位、
+  数据偏移与存储长度；
+- 数据区：按文件摘要去重后的文件内容（未压缩，或逐文件 zstd 压缩以保留随机访问）。
+
+安装时以 mmap 打开，只根据索引对比目标目录，按需解出有变化的成员，
+不需要逐个遍历、stat 成千上万个小文件。
+"""
+from __future__ import annotations
+
+import json
+import mmap
+import os
+import shutil
+import stat
+import struct
+from dataclasses import dataclass
+from pathlib import Path
+
+from fingerprint import FileEntry, TreeFingerprint, default_algorithm, fingerprint_tree, new_hasher
+from timings import count_io
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - zstandard 为可选依赖
+    zstandard = None
+
+MAGIC = b"SKILLPK1"
+FORMAT_VERSION = 1
+PACK_SUFFIX = ".skillpack"
+_HEADER = struct.Struct("<8sQ")
+_CHUNK_SIZE = 1024 * 1024
+
+
+class Compression:
+    NONE = "none"
+    ZSTD = "zstd"
+
+
+COMPRESSIONS = [Compression.NONE, Compression.ZSTD]
+
+
+class SkillPackError(ValueError):
+    """bundle 文件格式错误、损坏或缺少解压依赖。"""
+
+
+@dataclass(frozen=True)
+class PackMember:
+    """bundle 中的单个文件。"""
+    size: int
+    digest: str
+    executable: bool
+    offset: int
+    stored_size: int
+
+
+@dataclass(frozen=True)
+class PackedSkill:
+    """bundle 中的单个 skill。"""
+    name: str
+    digest: str
+    metadata: dict
+    files: dict[str, PackMember]
+    algo: str = "md5"
+
+    def fingerprint(self) -> TreeFingerprint:
+        """与 fingerprint_tree 以相同算法对源目录计算的结果一致。"""
+        return TreeFingerprint(
+            digest=self.digest,
+            files={rel: FileEntry(size=m.size, digest=m.digest) for rel, m in self.files.items()},
+            algo=self.algo,
+        )
+
+
+def _require_zstd() -> None:
+    if zstandard is None:
+        raise SkillPackError("zstd 压缩的 bundle 需要安装 zstandard（pip install zstandard）")
+
+
+def build_pack(
+    out: Path,
+    skills: list[tuple[Path, dict]],
+    compression: str = Compression.NONE,
+) -> dict[str, TreeFingerprint]:
+    """把多个 skill 目录打包为单个 bundle 文件（先写临时文件，再原子替换）。
+
+    文件内容流式写入（压缩时流式压缩），内存占用与文件大小无关；摘要使用当前默认哈希算法。
+
+    Args:
+        out: 输出文件
+        skills: (skill 目录, 元数据) 列表；skill 名取目录名
+        compression: none 或 zstd（逐文件压缩）
+
+    Returns:
+        skill 名 → 打包时的内容指纹
+    """
+    if compression == Compression.ZSTD:
+        _require_zstd()
+        compressor = zstandard.ZstdCompressor(level=3)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    data_tmp = out.with_name(f".{out.name}.{os.getpid()}.data")
+    pack_tmp = out.with_name(f".{out.name}.{os.getpid()}.tmp")
+
+    index: dict = {
+        "version": FORMAT_VERSION,
+        "hash_algo": default_algorithm(),
+        "compression": compression,
+        "skills": {},
+    }
+    fingerprints: dict[str, TreeFingerprint] = {}
+    locations: dict[str, tuple[int, int]] = {}  # 文件摘要 → (偏移, 存储长度)，相同内容只存一份
+    try:
+        with open(data_tmp, "wb") as data:
+            for skill_dir, metadata in skills:
+                fp = fingerprint_tree(skill_dir)
+                fingerprints[skill_dir.name] = fp
+                files: dict[str, list] = {}
+                for rel, entry in sorted(fp.files.items()):
+                    src = skill_dir / rel
+                    if entry.digest not in locations:
+                        offset = data.tell()
+                        with open(src, "rb") as f:
+                            if compression == Compression.ZSTD:
+                                compressor.copy_stream(f, data, size=entry.size)
+                            else:
+                                shutil.copyfileobj(f, data, _CHUNK_SIZE)
+                        locations[entry.digest] = (offset, data.tell() - offset)
+                    offset, stored_size = locations[entry.digest]
+                    executable = bool(os.stat(src).st_mode & stat.S_IXUSR)
+                    files[rel] = [entry.size, entry.digest, executable, offset, stored_size]
+                index["skills"][skill_dir.name] = {"digest": fp.digest, "metadata": metadata, "files": files}
+
+        index_bytes = json.dumps(index, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        with open(pack_tmp, "wb") as f, open(data_tmp, "rb") as data:
+            f.write(_HEADER.pack(MAGIC, len(index_bytes)))
+            f.write(index_bytes)
+            shutil.copyfileobj(data, f, _CHUNK_SIZE)
+        os.replace(pack_tmp, out)
+    finally:
+        for tmp in (data_tmp, pack_tmp):
+            if tmp.exists():
+                tmp.unlink()
+    return fingerprints
+
+
+class SkillPack:
+    """以 mmap 只读打开的 bundle；成员按需解出。"""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        # 真实来源（记录在安装索引中；skill 的虚拟源目录 <bundle>/<skill> 并不存在于磁盘上）
+        self.origin = f"pack:{path}"
+        with open(path, "rb") as f:
+            try:
+                self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError as exc:  # 空文件
+                raise SkillPackError(f"不是有效的 skillpack: {path}") from exc
+        if len(self._mm) < _HEADER.size:
+            raise SkillPackError(f"不是有效的 skillpack: {path}")
+        magic, index_len = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            raise SkillPackError(f"不是有效的 skillpack: {path}")
+        self._data_start = _HEADER.size + index_len
+        try:
+            index = json.loads(bytes(self._mm[_HEADER.size:self._data_start]).decode("utf-8"))
+        except ValueError as exc:
+            raise SkillPackError(f"skillpack 索引损坏: {path}") from exc
+        if index.get("version") != FORMAT_VERSION:
+            raise SkillPackError(f"不支持的 skillpack 版本 {index.get('version')}: {path}")
+        self.compression = index.get("compression", Compression.NONE)
+        self.hash_algo = index.get("hash_algo", "md5")
+        try:
+            new_hasher(self.hash_algo)
+        except ValueError as exc:
+            raise SkillPackError(f"{exc}: {path}") from exc
+        if self.compression == Compression.ZSTD:
+            _require_zstd()
+            self._decompressor = zstandard.ZstdDecompressor()
+        self.skills: dict[str, PackedSkill] = {
+            name: PackedSkill(
+                name=name,
+                digest=entry["digest"],
+                metadata=entry.get("metadata") or {},
+                files={rel: PackMember(*member) for rel, member in entry["files"].items()},
+                algo=self.hash_algo,
+            )
+            for name, entry in index.get("skills", {}).items()
+        }
+
+    def close(self) -> None:
+        self._mm.close()
+
+    def _chunks(self, member: PackMember):
+        """按块产出成员内容（未压缩时为 mmap 视图切片，不复制；压缩时流式解压）。"""
+        start = self._data_start + member.offset
+        view = memoryview(self._mm)[start:start + member.stored_size]
+        if self.compression == Compression.ZSTD:
+            with self._decompressor.stream_reader(view) as reader:
+                for chunk in iter(lambda: reader.read(_CHUNK_SIZE), b""):
+                    yield chunk
+            return
+        for offset in range(0, len(view), _CHUNK_SIZE):
+            yield view[offset:offset + _CHUNK_SIZE]
+
+    def extract(self, skill: str, rel: str, dest: Path) -> None:
+        """把成员流式写入 dest（dest 应为临时文件，由调用方原子替换），并校验摘要。"""
+        member = self.skills[skill].files[rel]
+        hasher = new_hasher(self.hash_algo, member.size)
+        with open(dest, "wb") as f:
+            for chunk in self._chunks(member):
+                hasher.update(chunk)
+                f.write(chunk)
+        count_io(read=member.stored_size, written=member.size)
+        if hasher.hexdigest() != member.digest:
+            raise SkillPackError(f"skillpack 成员损坏: {skill}/{rel}")
+        os.chmod(dest, 0o755 if member.executable else 0o644)
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""Content-addressed shared object store for install-bensz-skills.
+
+对象库布局（位于 ~/.bensz-skills）：
+
+- objects/<ab>/<摘要>[x]：按文件内容摘要去重的只读对象（x 后缀表示可执行）；
+- trees/<指纹>.json：某个 skill 版本的文件清单（相对路径 → 大小、摘要、可执行位）与哈希算法；
+- refs/<label>.json：每个目标当前引用的 skill 版本（skill 名 → 指纹）。
+
+相同内容在不同 skill、目标和版本之间只存储一份；各目标从对象库物化 skill，
+已入库的版本再次物化时无需读取源文件。对象存在不代表内容正确（hardlink 模式下
+已安装文件与对象共享 inode），读取版本时按摘要校验对象（经由 stat 缓存），被改动的对象由源文件重新写入。
+"""
+from __future__ import annotations
+
+import json
+import os
+import stat
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+
+from copying import ensure_object, object_intact, objects_dir, store_object_path
+from fingerprint import DEFAULT_HASH, TreeFingerprint, state_dir
+
+
+@dataclass(frozen=True)
+class StoredFile:
+    """对象库中的文件条目。"""
+    size: int
+    digest: str
+    executable: bool
+
+
+@dataclass(frozen=True)
+class StoredTree:
+    """对象库中的 skill 版本（文件清单）。"""
+    digest: str
+    files: dict[str, StoredFile]
+    algo: str = DEFAULT_HASH
+
+    def object_path(self, rel: str) -> Path:
+        entry = self.files[rel]
+        return store_object_path(entry.digest, entry.executable)
+
+
+@dataclass
+class GcResult:
+    """垃圾回收结果。"""
+    trees: int = 0
+    objects: int = 0
+    freed_bytes: int = 0
+
+
+def _write_json_atomic(path: Path, data: dict) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp.write_text(json.dumps(data, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+    os.replace(tmp, path)
+
+
+class ObjectStore:
+    """内容寻址对象库，线程安全。"""
+
+    def __init__(self, root: Path | None = None) -> None:
+        self._root = root or state_dir()
+        self._lock = threading.Lock()
+        self._tree_locks: dict[str, threading.Lock] = {}
+
+    @property
+    def trees_dir(self) -> Path:
+        return self._root / "trees"
+
+    @property
+    def refs_dir(self) -> Path:
+        return self._root / "refs"
+
+    def _tree_path(self, digest: str) -> Path:
+        return self.trees_dir / f"{digest}.json"
+
+    def _tree_lock(self, digest: str) -> threading.Lock:
+        with self._lock:
+            return self._tree_locks.setdefault(digest, threading.Lock())
+
+    def _read_tree(self, digest: str) -> StoredTree | None:
+        """只读取版本清单（不检查对象）。"""
+        try:
+            data = json.loads(self._tree_path(digest).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        return StoredTree(
+            digest=digest,
+            files={rel: StoredFile(*entry) for rel, entry in data.get("files", {}).items()},
+            algo=data.get("hash_algo", DEFAULT_HASH),
+        )
+
+    def has_tree(self, digest: str) -> bool:
+        """版本清单是否存在（不校验对象，用于记录引用）。"""
+        return self._tree_path(digest).exists()
+
+    def load_tree(self, digest: str) -> StoredTree | None:
+        """读取已入库的版本；清单不存在、对象缺失或对象内容与摘要不符时返回 None。
+
+        对象摘要经由 stat 缓存校验：未变化的对象只需 stat，被原地改动的对象（mtime 变化）会被重新读取。
+        """
+        tree = self._read_tree(digest)
+        if tree is None:
+            return None
+        for rel, entry in tree.files.items():
+            if not object_intact(tree.object_path(rel), entry.digest, tree.algo):
+                return None
+        return tree
+
+    def ingest(self, src_dir: Path, fingerprint: TreeFingerprint) -> StoredTree:
+        """把 skill 目录写入对象库并返回其版本清单。
+
+        内容完好的对象不会被重写；同一版本被多个目标并发请求时只入库一次。
+        清单在全部对象写入后才落盘，因此清单存在即表示版本完整。
+        """
+        with self._tree_lock(fingerprint.digest):
+            existing = self.load_tree(fingerprint.digest)
+            if existing is not None:
+                return existing
+            files: dict[str, StoredFile] = {}
+            for rel, entry in sorted(fingerprint.files.items()):
+                src = src_dir / rel
+                executable = bool(os.stat(src).st_mode & stat.S_IXUSR)
+                ensure_object(src, entry.digest, executable, fingerprint.algo)
+                files[rel] = StoredFile(size=entry.size, digest=entry.digest, executable=executable)
+            _write_json_atomic(
+                self._tree_path(fingerprint.digest),
+                {
+                    "hash_algo": fingerprint.algo,
+                    "files": {rel: [f.size, f.digest, f.executable] for rel, f in files.items()},
+                },
+            )
+            return StoredTree(digest=fingerprint.digest, files=files, algo=fingerprint.algo)
+
+    def repair(self, src_dir: Path, fingerprint: TreeFingerprint, rels: list[str]) -> None:
+        """逐字节校验给定文件对应的对象（不信任 stat 缓存），内容不符时由源文件重新写入。
+
+        --verify 修复 hardlink 安装时使用：被原地修改的已安装文件与对象共享 inode，
+        修复前必须先修好对象，否则重新链接得到的仍是被改动的内容。
+        """
+        for rel in rels:
+            src = src_dir / rel
+            executable = bool(os.stat(src).st_mode & stat.S_IXUSR)
+            ensure_object(src, fingerprint.files[rel].digest, executable, fingerprint.algo, rehash=True)
+
+    def read_refs(self, label: str) -> dict[str, str]:
+        """读取目标当前引用的版本（skill 名 → 指纹）。"""
+        try:
+            return json.loads((self.refs_dir / f"{label}.json").read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+
+    def update_refs(self, label: str, refs: dict[str, str]) -> None:
+        """合并更新目标的引用记录。"""
+        with self._lock:
+            merged = self.read_refs(label)
+            merged.update(refs)
+            _write_json_atomic(self.refs_dir / f"{label}.json", dict(sorted(merged.items())))
+
+    def remove_refs(self, label: str, names: list[str]) -> None:
+        """删除目标中已清理的 skill 的引用记录。"""
+        if not names:
+            return
+        with self._lock:
+            refs = self.read_refs(label)
+            for name in names:
+                refs.pop(name, None)
+            _write_json_atomic(self.refs_dir / f"{label}.json", dict(sorted(refs.items())))
+
+    def referenced_trees(self) -> set[str]:
+        """所有目标引用的版本指纹。"""
+        digests: set[str] = set()
+        if self.refs_dir.is_dir():
+            for ref_file in self.refs_dir.glob("*.json"):
+                digests.update(self.read_refs(ref_file.stem).values())
+        return digests
+
+    def gc(self, dry_run: bool = False, keep: set[str] | None = None) -> GcResult:
+        """删除不再被任何目标引用的版本清单与对象。
+
+        Args:
+            dry_run: 只统计不删除
+            keep: 额外需要保留的版本指纹
+        """
+        result = GcResult()
+        live_trees = self.referenced_trees() | (keep or set())
+        live_objects: set[Path] = set()
+
+        if self.trees_dir.is_dir():
+            for tree_file in self.trees_dir.glob("*.json"):
+                digest = tree_file.stem
+                if digest in live_trees:
+                    # 内容被改动的对象仍属于在用版本，不能回收
+                    tree = self._read_tree(digest)
+                    if tree is not None:
+                        live_objects.update(tree.object_path(rel) for rel in tree.files)
+                    continue
+                result.trees += 1
+                if not dry_run:
+                    tree_file.unlink()
+
+        if objects_dir().is_dir():
+            for obj in objects_dir().glob("*/*"):
+                if obj in live_objects or obj.name.endswith(".tmp"):
+                    continue
+                result.objects += 1
+                result.freed_bytes += obj.stat().st_size
+                if not dry_run:
+                    obj.unlink()
+        return result
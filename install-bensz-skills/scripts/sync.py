@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""File-level delta sync for install-bensz-skills.
+
+对比源目录与目标目录的内容指纹，只复制新增/变化的文件、只删除已移除的文件，
+使重新安装的耗时与变更量成正比，而不是与 skill 的总大小成正比。
+"""
+from __future__ import annotations
+
+import os
+import shutil
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable
+
+from copying import CopyMode, copy_file
+from fingerprint import StatCache, TreeFingerprint
+
+
+@dataclass
+class SyncPlan:
+    """源目录与目标目录之间的逐文件差异（相对路径，均已排序）。"""
+    added: list[str] = field(default_factory=list)
+    changed: list[str] = field(default_factory=list)
+    removed: list[str] = field(default_factory=list)
+
+    @property
+    def is_empty(self) -> bool:
+        return not (self.added or self.changed or self.removed)
+
+    def to_dict(self) -> dict[str, list[str]]:
+        """转换为可序列化的逐文件动作记录（用于报告与 manifest）。"""
+        return {"added": self.added, "changed": self.changed, "removed": self.removed}
+
+
+def diff_trees(src: TreeFingerprint, dest: TreeFingerprint) -> SyncPlan:
+    """按相对路径与文件摘要对比两个指纹。"""
+    plan = SyncPlan()
+    for rel in sorted(src.files):
+        dest_entry = dest.files.get(rel)
+        if dest_entry is None:
+            plan.added.append(rel)
+        elif dest_entry.digest != src.files[rel].digest:
+            plan.changed.append(rel)
+    plan.removed = sorted(rel for rel in dest.files if rel not in src.files)
+    return plan
+
+
+def _prune_empty_parents(path: Path, stop: Path) -> None:
+    """删除因文件移除而变空的上级目录（不越过 stop）。"""
+    parent = path.parent
+    while parent != stop and stop in parent.parents:
+        try:
+            parent.rmdir()
+        except OSError:
+            return
+        parent = parent.parent
+
+
+def _remove_path(path: Path) -> None:
+    if path.is_dir() and not path.is_symlink():
+        shutil.rmtree(path)
+    else:
+        path.unlink()
+
+
+def write_file_atomic(dest: Path, writer: Callable[[Path], None]) -> None:
+    """由 writer 写入同目录临时文件，再原子替换目标。
+
+    替换而非原地覆盖，避免读者看到写了一半的文件，也不会改写与其他路径共享的 inode
+    （hardlink 模式下目标与对象库共享 inode）。
+    """
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    tmp = dest.with_name(f".{dest.name}.bensz-tmp")
+    if tmp.exists() or tmp.is_symlink():
+        tmp.unlink()
+    writer(tmp)
+    os.replace(tmp, dest)
+
+
+def copy_file_atomic(src: Path, dest: Path, mode: str = CopyMode.AUTO, digest: str | None = None) -> None:
+    """复制单个文件：先写入同目录临时文件，再原子替换目标。"""
+    write_file_atomic(dest, lambda tmp: copy_file(src, tmp, mode=mode, digest=digest))
+
+
+def apply_sync(
+    plan: SyncPlan,
+    src_root: Path,
+    dest_root: Path,
+    src_fingerprint: TreeFingerprint,
+    cache: StatCache | None = None,
+    copy_mode: str = CopyMode.AUTO,
+    resolve_src: Callable[[str], Path] | None = None,
+    extract: Callable[[str, Path], None] | None = None,
+) -> None:
+    """在目标目录上执行同步计划。
+
+    先删除（为同名的“文件 ↔ 目录”替换腾出位置），再复制新增与变化的文件。
+    复制完成后用源摘要预填 stat 缓存，下次对比目标目录时无需重新读取。
+
+    Args:
+        resolve_src: 相对路径 → 实际读取的文件（如对象库中的对象）；缺省为 src_root 下的同名文件
+        extract: 直接写出文件内容的函数 (相对路径, 临时文件)（如从 skillpack 解出成员），优先于 resolve_src
+    """
+    dest_root.mkdir(parents=True, exist_ok=True)
+
+    for rel in plan.removed:
+        path = dest_root / rel
+        if path.exists() or path.is_symlink():
+            _remove_path(path)
+        _prune_empty_parents(path, dest_root)
+
+    for rel in plan.added + plan.changed:
+        dest = dest_root / rel
+        # 目标位置被同名目录占据时（源中由目录变为文件），先移除
+        if dest.is_dir() and not dest.is_symlink():
+            shutil.rmtree(dest)
+        # 上级路径被同名文件占据时（源中由文件变为目录），先移除
+        for parent in reversed(dest.relative_to(dest_root).parents[:-1]):
+            blocker = dest_root / parent
+            if blocker.is_file() or blocker.is_symlink():
+                blocker.unlink()
+        digest = src_fingerprint.files[rel].digest
+        if extract is not None:
+            write_file_atomic(dest, lambda tmp, rel=rel: extract(rel, tmp))
+        else:
+            src = resolve_src(rel) if resolve_src is not None else src_root / rel
+            copy_file_atomic(src, dest, mode=copy_mode, digest=digest)
+        if cache is not None:
+            cache.store(str(dest), os.stat(dest), digest)
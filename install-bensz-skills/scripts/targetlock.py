@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""Cross-process lock per install target for install-bensz-skills.
+
+同一目标目录同时只允许一个安装进程写入（并行的 CI 任务、--watch 与手动运行等），
+避免删除/复制交错导致安装损坏：
+
+- 锁文件为 ``<目标目录>/.bensz-skills.lock``，使用 fcntl.flock 排他锁，进程退出时由内核自动释放；
+- 锁文件中记录持有者的 pid，便于提示正在等待哪个进程；
+- 等待有超时（秒），超时抛出 TargetLockTimeout；
+- 不支持 fcntl 的平台上锁为空操作。
+"""
+from __future__ import annotations
+
+import os
+import time
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows 无 fcntl
+    fcntl = None
+
+LOCK_FILENAME = ".bensz-skills.lock"
+
+# 轮询间隔（秒）：从短到长，锁很快释放时几乎不增加延迟
+_POLL_MIN = 0.05
+_POLL_MAX = 0.5
+
+
+class TargetLockTimeout(TimeoutError):
+    """在超时时间内没有等到目标锁。"""
+
+
+class TargetLock:
+    """目标目录的排他锁（上下文管理器）。
+
+    Attributes:
+        waited: 获取锁之前是否等待过其他进程（等待过时对方刚完成安装，可复用其索引与缓存）
+    """
+
+    def __init__(self, root: Path, timeout: float | None = None, on_wait=None) -> None:
+        """
+        Args:
+            root: 目标目录
+            timeout: 最长等待秒数（None 表示一直等待，0 表示不等待）
+            on_wait: 开始等待时的回调，参数为持有者 pid（未知时为 None）
+        """
+        self.path = root / LOCK_FILENAME
+        self.timeout = timeout
+        self.waited = False
+        self._on_wait = on_wait
+        self._fd: int | None = None
+
+    def holder_pid(self) -> int | None:
+        """锁文件中记录的持有者 pid。"""
+        try:
+            return int(self.path.read_text(encoding="ascii").strip())
+        except (OSError, ValueError):
+            return None
+
+    def acquire(self) -> None:
+        if fcntl is None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            self._wait(fd)
+        except BaseException:
+            os.close(fd)
+            raise
+        os.ftruncate(fd, 0)
+        os.pwrite(fd, f"{os.getpid()}\n".encode("ascii"), 0)
+        self._fd = fd
+
+    def _wait(self, fd: int) -> None:
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return
+        except BlockingIOError:
+            pass
+        self.waited = True
+        if self._on_wait is not None:
+            self._on_wait(self.holder_pid())
+        if self.timeout is None:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            return
+        deadline = time.monotonic() + self.timeout
+        interval = _POLL_MIN
+        while True:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return
+            except BlockingIOError:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TargetLockTimeout(
+                        f"等待目标锁超时（{self.timeout:g} 秒，持有者 pid {self.holder_pid() or '?'}）: {self.path}"
+                    ) from None
+                time.sleep(min(interval, remaining))
+                interval = min(interval * 2, _POLL_MAX)
+
+    def release(self) -> None:
+        if self._fd is None:
+            return
+        # 清空 pid 但不删除锁文件：删除后其他进程可能锁住不同的 inode
+        os.ftruncate(self._fd, 0)
+        fcntl.flock(self._fd, fcntl.LOCK_UN)
+        os.close(self._fd)
+        self._fd = None
+
+    def __enter__(self) -> TargetLock:
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.release()
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""Per-phase timing and I/O accounting for install-bensz-skills (--timings).
+
+记录每个阶段、每个目标、每个 skill 的墙钟时间与 CPU 时间，以及读取/写入的字节数：
+
+- 阶段（discovery / classification / install / report / manifest）在主线程中串行执行，CPU 时间取进程 CPU 时间；
+- skill 任务在线程池中执行，分步骤（hash / copy / verify / total）计时，CPU 时间取所在线程的 CPU 时间，
+  字节数取线程内计数；
+- 字节数为实际搬运的数据量：哈希读取、复制（copy / copy_file_range）与 skillpack 解出，
+  reflink 与硬链接不搬运数据，不计入。
+"""
+from __future__ import annotations
+
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+_thread_io = threading.local()
+_global_io = [0, 0]  # [读取字节, 写入字节]
+_global_io_lock = threading.Lock()
+
+
+def count_io(read: int = 0, written: int = 0) -> None:
+    """累计当前线程与全局的读写字节数（始终开启，开销仅为几次整数加法）。"""
+    _thread_io.read = getattr(_thread_io, "read", 0) + read
+    _thread_io.written = getattr(_thread_io, "written", 0) + written
+    with _global_io_lock:
+        _global_io[0] += read
+        _global_io[1] += written
+
+
+def _thread_snapshot() -> tuple[int, int]:
+    return getattr(_thread_io, "read", 0), getattr(_thread_io, "written", 0)
+
+
+def _global_snapshot() -> tuple[int, int]:
+    with _global_io_lock:
+        return _global_io[0], _global_io[1]
+
+
+@dataclass
+class Sample:
+    """一段被测代码的耗时与读写字节数。"""
+    wall: float = 0.0
+    cpu: float = 0.0
+    read: int = 0
+    written: int = 0
+
+    def add(self, other: Sample) -> None:
+        self.wall += other.wall
+        self.cpu += other.cpu
+        self.read += other.read
+        self.written += other.written
+
+    def to_dict(self) -> dict:
+        return {
+            "wall_ms": round(self.wall * 1000, 3),
+            "cpu_ms": round(self.cpu * 1000, 3),
+            "bytes_read": self.read,
+            "bytes_written": self.written,
+        }
+
+
+class Timings:
+    """线程安全的耗时记录器；未启用时所有计时均为空操作。"""
+
+    def __init__(self, enabled: bool = False) -> None:
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self.phases: dict[str, Sample] = {}
+        self.targets: dict[str, Sample] = {}
+        self.skills: dict[tuple[str, str], dict[str, Sample]] = {}
+
+    @contextmanager
+    def phase(self, name: str):
+        """计时主线程中的一个阶段（CPU 时间为整个进程的 CPU 时间，包含工作线程）。"""
+        if not self.enabled:
+            yield
+            return
+        wall, cpu, (read, written) = time.perf_counter(), time.process_time(), _global_snapshot()
+        try:
+            yield
+        finally:
+            end_read, end_written = _global_snapshot()
+            sample = Sample(time.perf_counter() - wall, time.process_time() - cpu,
+                            end_read - read, end_written - written)
+            with self._lock:
+                self.phases.setdefault(name, Sample()).add(sample)
+
+    @contextmanager
+    def measure(self, target: str, skill: str, step: str):
+        """计时线程池中某个 skill 的一个步骤（CPU 时间与字节数只统计当前线程）。"""
+        if not self.enabled:
+            yield
+            return
+        wall, cpu, (read, written) = time.perf_counter(), time.thread_time(), _thread_snapshot()
+        try:
+            yield
+        finally:
+            end_read, end_written = _thread_snapshot()
+            sample = Sample(time.perf_counter() - wall, time.thread_time() - cpu,
+                            end_read - read, end_written - written)
+            with self._lock:
+                self.skills.setdefault((target, skill), {}).setdefault(step, Sample()).add(sample)
+
+    def timed(self, target: str, skill: str, step: str, fn, /, *args, **kwargs):
+        """在 measure 中调用 fn（便于直接提交到线程池）。"""
+        with self.measure(target, skill, step):
+            return fn(*args, **kwargs)
+
+    def record_target(self, label: str, wall: float, cpu: float) -> None:
+        """记录一个目标的安装耗时（目标线程自身的 CPU 时间；各 skill 的 CPU 与字节数另行汇总）。"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self.targets.setdefault(label, Sample()).add(Sample(wall=wall, cpu=cpu))
+
+    def _target_totals(self) -> dict[str, Sample]:
+        totals = {label: Sample(wall=sample.wall, cpu=sample.cpu) for label, sample in self.targets.items()}
+        for (label, _), steps in self.skills.items():
+            total = totals.setdefault(label, Sample())
+            sample = steps.get("total")
+            if sample is not None:
+                total.cpu += sample.cpu
+                total.read += sample.read
+                total.written += sample.written
+        return totals
+
+    def to_dict(self) -> dict:
+        """转换为可序列化的字典（写入运行 manifest）。"""
+        with self._lock:
+            skills = []
+            for (label, name), steps in sorted(self.skills.items()):
+                entry = {"target": label, "skill": name}
+                entry.update({step: sample.to_dict() for step, sample in steps.items()})
+                skills.append(entry)
+            return {
+                "phases": {name: sample.to_dict() for name, sample in self.phases.items()},
+                "targets": {label: sample.to_dict() for label, sample in self._target_totals().items()},
+                "skills": skills,
+            }
+
+    def format_report(self, top: int = 10) -> list[str]:
+        """生成报告中的耗时统计行（阶段、目标与最慢的 top 个 skill）。"""
+        def _row(label: str, sample: Sample) -> str:
+            return (f"  {label:<24} {sample.wall * 1000:>10.1f} {sample.cpu * 1000:>10.1f} "
+                    f"{_format_bytes(sample.read):>10} {_format_bytes(sample.written):>10}")
+
+        lines = [f"  {'':<24} {'wall(ms)':>10} {'cpu(ms)':>10} {'读取':>8} {'写入':>8}"]
+        with self._lock:
+            for name, sample in self.phases.items():
+                lines.append(_row(name, sample))
+            for label, sample in self._target_totals().items():
+                lines.append(_row(label.upper(), sample))
+            slowest = sorted(
+                ((key, steps.get("total", Sample())) for key, steps in self.skills.items()),
+                key=lambda item: item[1].wall,
+                reverse=True,
+            )[:top]
+            if slowest:
+                lines.append(f"  最慢的 {len(slowest)} 个技能（hash / copy / total ms）:")
+                for (label, name), total in slowest:
+                    hashing = self.skills[(label, name)].get("hash", Sample())
+                    copying = self.skills[(label, name)].get("copy", Sample())
+                    lines.append(f"    {label}/{name}: {hashing.wall * 1000:.1f} / {copying.wall * 1000:.1f} "
+                                 f"/ {total.wall * 1000:.1f}")
+        return lines
+
+
+def _format_bytes(n: int) -> str:
+    value = float(n)
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if value < 1024 or unit == "GiB":
+            return f"{value:.0f} {unit}" if unit == "B" else f"{value:.1f} {unit}"
+        value /= 1024
+    return f"{n} B"
+
+
+# 全局记录器（main 每次运行时重置）
+_global_timings = Timings()
+
+
+def get_timings() -> Timings:
+    """获取全局耗时记录器。"""
+    return _global_timings
+
+
+def reset_timings(enabled: bool) -> Timings:
+    """重置全局耗时记录器（main 每次运行时调用）。"""
+    global _global_timings
+    _global_timings = Timings(enabled=enabled)
+    return _global_timings
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""Source watching for install-bensz-skills (--watch).
+
+监听所有源目录的文件变化，合并一小段时间内的突发事件后，
+把变化的路径映射为受影响的 skill 根目录，交给安装流程只重装这些 skill。
+
+- Linux 上通过 ctypes 调用 inotify（无第三方依赖），编辑到生效通常在 0.2 秒左右；
+- inotify 不可用（非 Linux、watch 数量超限等）时回退为定时轮询 stat。
+"""
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+from pathlib import Path
+
+from discovery import SKILL_FILENAME, is_pruned_dir, walk_skill_roots
+from ignore import IGNORE_FILENAME
+
+# 一批事件在静默该时长后才触发安装（合并编辑器保存时的多次写入）
+DEBOUNCE_SECONDS = 0.15
+
+# 轮询回退的扫描间隔
+POLL_INTERVAL = 0.5
+
+# inotify 常量（<sys/inotify.h>）
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+_WATCH_MASK = (
+    IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO
+    | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR
+)
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+def _iter_watch_dirs(root: Path):
+    """遍历需要监听的目录（与发现规则一致地剪掉隐藏目录、依赖目录等）。"""
+    for dirpath, dirnames, _ in os.walk(root):
+        dirnames[:] = [d for d in dirnames if not is_pruned_dir(d)]
+        yield Path(dirpath)
+
+
+class InotifyWatcher:
+    """基于 inotify 的递归目录监听（新建目录会自动加入监听）。"""
+
+    def __init__(self, roots: list[Path]) -> None:
+        if not sys.platform.startswith("linux"):
+            raise OSError("inotify 仅在 Linux 上可用")
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or None, use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+        self._fd = fd
+        self._dirs: dict[int, Path] = {}
+        for root in roots:
+            self._watch_tree(root)
+
+    def _watch_tree(self, root: Path) -> None:
+        for directory in _iter_watch_dirs(root):
+            wd = self._add_watch(self._fd, os.fsencode(directory), _WATCH_MASK)
+            if wd < 0:
+                errno = ctypes.get_errno()
+                if errno in {28, 24}:  # ENOSPC/EMFILE：watch 数量超限，交由调用方回退为轮询
+                    raise OSError(errno, os.strerror(errno))
+                continue
+            self._dirs[wd] = directory
+
+    def close(self) -> None:
+        os.close(self._fd)
+
+    def wait(self, timeout: float | None) -> set[Path]:
+        """等待事件（timeout 为 None 时一直等待），返回发生变化的路径。"""
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return set()
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return set()
+        changed: set[Path] = set()
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            wd, mask, _cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b"\0")
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                # 事件队列溢出：无法得知具体变化，视为所有监听目录都有变化
+                changed.update(self._dirs.values())
+                continue
+            directory = self._dirs.get(wd)
+            if directory is None:
+                continue
+            if mask & IN_IGNORED:
+                del self._dirs[wd]
+                continue
+            path = directory / os.fsdecode(name) if name else directory
+            if name and is_pruned_dir(path.name) and mask & IN_ISDIR:
+                continue
+            changed.add(path)
+            if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+                self._watch_tree(path)
+        return changed
+
+
+class PollingWatcher:
+    """定时比较 stat 快照的回退实现。"""
+
+    def __init__(self, roots: list[Path], interval: float = POLL_INTERVAL) -> None:
+        self._roots = roots
+        self._interval = interval
+        self._snapshot = self._scan()
+
+    def _scan(self) -> dict[str, tuple[int, int, int]]:
+        snapshot: dict[str, tuple[int, int, int]] = {}
+        for root in self._roots:
+            for directory in _iter_watch_dirs(root):
+                try:
+                    with os.scandir(directory) as it:
+                        for entry in it:
+                            try:
+                                st = entry.stat(follow_symlinks=False)
+                            except OSError:
+                                continue
+                            snapshot[entry.path] = (st.st_mtime_ns, st.st_size, st.st_ino)
+                except OSError:
+                    continue
+        return snapshot
+
+    def close(self) -> None:
+        pass
+
+    def wait(self, timeout: float | None) -> set[Path]:
+        while True:
+            time.sleep(self._interval if timeout is None else timeout)
+            snapshot = self._scan()
+            changed = {
+                Path(path)
+                for path in snapshot.keys() | self._snapshot.keys()
+                if snapshot.get(path) != self._snapshot.get(path)
+            }
+            self._snapshot = snapshot
+            if changed or timeout is not None:
+                return changed
+
+
+def create_watcher(roots: list[Path], polling: bool = False) -> InotifyWatcher | PollingWatcher:
+    """优先使用 inotify，不可用时回退为轮询。"""
+    if not polling:
+        try:
+            return InotifyWatcher(roots)
+        except (OSError, AttributeError):
+            pass
+    return PollingWatcher(roots)
+
+
+def next_batch(watcher: InotifyWatcher | PollingWatcher, debounce: float = DEBOUNCE_SECONDS) -> set[Path]:
+    """阻塞直到出现变化，并把随后 debounce 秒内的事件合并为一批。"""
+    changed = watcher.wait(None)
+    while True:
+        more = watcher.wait(debounce)
+        if not more:
+            return changed
+        changed |= more
+
+
+def affected_skills(paths: set[Path], roots: list[Path]) -> set[Path]:
+    """把变化的路径映射为受影响的 skill 根目录。
+
+    与发现规则一致：从源目录向下，第一个含 SKILL.md 的目录即 skill 根目录；
+    变化发生在 skill 之外的目录（如新建或移入整个 skill 目录）时，在该目录下重新发现；
+    skill 之外的 .skillignore 变化时，其所在目录下的 skill 均受影响。
+    """
+    skills: set[Path] = set()
+    for path in paths:
+        root = next((r for r in roots if path == r or r in path.parents), None)
+        if root is None:
+            continue
+        rel_parts = path.relative_to(root).parts
+        if any(is_pruned_dir(part) for part in rel_parts[:-1]):
+            continue
+        current = root
+        found = None
+        for part in (None, *rel_parts):
+            if part is not None:
+                current = current / part
+            if (current / SKILL_FILENAME).is_file():
+                found = current
+                break
+        if found is not None:
+            skills.add(found)
+        elif path.is_dir() and (not rel_parts or not is_pruned_dir(rel_parts[-1])):
+            found_roots, _ = walk_skill_roots(path)
+            skills.update(path if rel == "." else path / rel for rel in found_roots)
+        elif path.name == IGNORE_FILENAME:
+            found_roots, _ = walk_skill_roots(path.parent)
+            skills.update(path.parent if rel == "." else path.parent / rel for rel in found_roots)
+    return skills
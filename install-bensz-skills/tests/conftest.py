@@ -0,0 +1,59 @@
+"""install-bensz-skills 测试的公共夹具。
+
+每个测试使用独立的 HOME（目标目录、对象库与各类缓存都位于其下），并重置进程内的单例缓存。
+"""
+from __future__ import annotations
+
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+SCRIPTS_DIR = Path(__file__).resolve().parents[1] / "scripts"
+if str(SCRIPTS_DIR) not in sys.path:
+    sys.path.insert(0, str(SCRIPTS_DIR))
+
+import discovery  # noqa: E402
+import fingerprint  # noqa: E402
+import frontmatter  # noqa: E402
+import install  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def home(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    home = tmp_path / "home"
+    home.mkdir()
+    monkeypatch.setenv("HOME", str(home))
+    monkeypatch.setattr(fingerprint, "_global_stat_caches", {})
+    monkeypatch.setattr(discovery, "_global_discovery_cache", None)
+    monkeypatch.setattr(frontmatter, "_global_frontmatter_cache", None)
+    return home
+
+
+@pytest.fixture
+def src(tmp_path: Path) -> Path:
+    root = tmp_path / "src"
+    root.mkdir()
+    return root
+
+
+def make_skill(root: Path, name: str, files: dict[str, str] | None = None) -> Path:
+    """在 root 下创建一个 skill（SKILL.md 加上给定的文件）。"""
+    skill = root / name
+    skill.mkdir(parents=True)
+    (skill / "SKILL.md").write_text(f"---\nname: {name}\ndescription: {name}\n---\n# {name}\n", encoding="utf-8")
+    for rel, content in (files or {}).items():
+        path = skill / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content, encoding="utf-8")
+    return skill
+
+
+def run_install(*args: str) -> int:
+    """以命令行参数运行安装器（串行哈希，不启动进程池）。"""
+    return install.main([*args, "--hash-processes", "1"])
+
+
+def target_root(label: str) -> Path:
+    return Path(os.environ["HOME"]) / f".{label}" / "skills"
@@ -0,0 +1,21 @@
+"""bench.py：以子进程运行真实的安装器，阶段耗时取自 --timings。"""
+from __future__ import annotations
+
+import json
+
+import bench
+
+
+def test_bench_runs_installer_and_reads_timings(tmp_path):
+    out = tmp_path / "bench.json"
+    args = ["--skills", "2", "--files", "2", "--repeat", "1", "--jobs", "2", "--workdir", str(tmp_path / "w")]
+    assert bench.main([*args, "-o", str(out)]) == 0
+    scenarios = json.loads(out.read_text(encoding="utf-8"))["scenarios"]
+    counts = {name: (s["installed"], s["skipped"]) for name, s in scenarios.items()}
+    assert counts == {"cold": (2, 0), "warm": (0, 2), "change": (1, 1), "force": (2, 0)}
+    assert set(scenarios["cold"]["phases"]) == set(bench.PHASES)
+    cold, warm = scenarios["cold"]["phases"], scenarios["warm"]["phases"]
+    for phase in ("discovery", "classification", "hashing", "copy", "install", "manifest", "report"):
+        assert cold[phase] > 0, phase
+    # 无变化时不复制
+    assert warm["copy"] == 0
@@ -0,0 +1,47 @@
+"""剪枝的 skill 发现。"""
+from __future__ import annotations
+
+import logging
+
+from conftest import make_skill
+
+from discovery import walk_skill_roots
+
+
+def test_common_build_dir_names_are_not_pruned(src):
+    for rel in ("build", "dist/alpha", "env/beta", "venv/gamma", "lib/site-packages/delta"):
+        make_skill(src, rel)
+    skills, _ = walk_skill_roots(src)
+    assert skills == ["build", "dist/alpha", "env/beta", "lib/site-packages/delta", "venv/gamma"]
+
+
+def test_only_vcs_dependency_and_cache_dirs_are_pruned(src):
+    make_skill(src, "alpha")
+    for rel in (".git/hooks", "node_modules/pkg", "__pycache__/x", ".hidden/zeta"):
+        make_skill(src, rel)
+    skills, _ = walk_skill_roots(src)
+    assert skills == ["alpha"]
+
+
+def test_skillignore_controls_pruning(src):
+    make_skill(src, "venv/gamma")
+    make_skill(src, "alpha")
+    (src / ".skillignore").write_text("venv/\n", encoding="utf-8")
+    skills, _ = walk_skill_roots(src)
+    assert skills == ["alpha"]
+
+
+def test_pruned_skill_is_logged_at_debug(src, caplog):
+    make_skill(src, "node_modules/pkg")
+    with caplog.at_level(logging.DEBUG, logger="discovery"):
+        walk_skill_roots(src)
+    assert any("node_modules/pkg" in record.getMessage() for record in caplog.records)
+
+
+def test_directory_symlinks_are_not_followed(src):
+    make_skill(src, "a/s1")
+    (src / "a" / "up").symlink_to("..", target_is_directory=True)
+    (src / "a" / "again").symlink_to("..", target_is_directory=True)
+    (src / "alias").symlink_to("a/s1", target_is_directory=True)
+    skills, _ = walk_skill_roots(src)
+    assert skills == ["a/s1"]
@@ -0,0 +1,74 @@
+"""--output ndjson：事件序列与字段是机器可读的契约。"""
+from __future__ import annotations
+
+import json
+
+from conftest import make_skill, run_install
+
+
+def _events(capsys, src, *args: str) -> list[dict]:
+    capsys.readouterr()
+    assert run_install("--source", str(src), "--claude", "--output", "ndjson", *args) == 0
+    lines = capsys.readouterr().out.splitlines()
+    # ndjson 模式下 stdout 只有事件
+    return [json.loads(line) for line in lines if line.strip()]
+
+
+def _by_skill(events: list[dict], kind: str) -> dict[str, dict]:
+    return {e["skill"]: e for e in events if e["event"] == kind}
+
+
+def test_fresh_install_and_noop_rerun(src, capsys):
+    make_skill(src, "alpha", {"scripts/run.py": "print()\n"})
+    make_skill(src, "beta")
+    helper = make_skill(src, "helper")
+    (helper / "SKILL.md").write_text("---\nname: helper\ncategory: auxiliary\n---\n", encoding="utf-8")
+
+    events = _events(capsys, src)
+    assert all(isinstance(e["ts"], float) for e in events)
+    kinds = [e["event"] for e in events]
+    assert kinds[-1] == "summary"
+    assert kinds.index("discovered") < kinds.index("copied") < kinds.index("manifest-saved")
+    assert set(_by_skill(events, "discovered")) == {"alpha", "beta", "helper"}
+
+    copied = _by_skill(events, "copied")
+    assert set(copied) == {"alpha", "beta"}
+    alpha = copied["alpha"]
+    assert (alpha["target"], alpha["mode"], alpha["dry_run"]) == ("claude", "delta", False)
+    assert (alpha["added"], alpha["changed"], alpha["removed"]) == (2, 0, 0)
+    assert len(alpha["hash"]) == 32
+    assert _by_skill(events, "skipped")["helper"]["reason"] == "auxiliary"
+
+    summary = events[-1]
+    assert summary["dry_run"] is False
+    assert (summary["installed"], summary["skipped"], summary["auxiliary"], summary["test"]) == (2, 0, 1, 0)
+    assert summary["targets"]["claude"] == {"installed": ["alpha", "beta"], "skipped": [], "pruned": []}
+    assert summary["manifest"].endswith(".json")
+
+    # 无变化的重复运行：没有 copied，每个普通技能一个 unchanged 的 skipped
+    events = _events(capsys, src)
+    assert not _by_skill(events, "copied")
+    skipped = _by_skill(events, "skipped")
+    assert {name: e["reason"] for name, e in skipped.items()} == {
+        "alpha": "unchanged", "beta": "unchanged", "helper": "auxiliary"
+    }
+    assert skipped["alpha"]["hash"] == alpha["hash"]
+    summary = events[-1]
+    assert (summary["event"], summary["installed"], summary["skipped"]) == ("summary", 0, 2)
+
+
+def test_delta_counts_and_dry_run(src, capsys):
+    skill = make_skill(src, "alpha", {"a.txt": "a\n", "b.txt": "b\n"})
+    _events(capsys, src)
+    (skill / "a.txt").write_text("changed\n", encoding="utf-8")
+    (skill / "b.txt").unlink()
+    (skill / "c.txt").write_text("c\n", encoding="utf-8")
+
+    events = _events(capsys, src, "--dry-run")
+    copied = _by_skill(events, "copied")["alpha"]
+    assert (copied["added"], copied["changed"], copied["removed"], copied["dry_run"]) == (1, 1, 1, True)
+    assert events[-1]["dry_run"] is True
+    assert events[-1]["manifest"] is None
+
+    copied = _by_skill(_events(capsys, src), "copied")["alpha"]
+    assert (copied["added"], copied["changed"], copied["removed"], copied["dry_run"]) == (1, 1, 1, False)
@@ -0,0 +1,94 @@
+"""目录指纹：stat 缓存的淘汰与软链接环。"""
+from __future__ import annotations
+
+import json
+import os
+
+import pytest
+from conftest import make_skill, run_install, target_root
+
+import fingerprint
+from fingerprint import StatCache, available_algorithms, empty_fingerprint, fingerprint_tree, iter_tree_files
+
+
+def _age(root) -> None:
+    """把文件 mtime 调到竞态窗口之外，使其可以写入缓存。"""
+    old = 1_000_000_000
+    for _, path in iter_tree_files(root):
+        os.utime(path, (old, old))
+
+
+def _cached_paths(path) -> set[str]:
+    return set(json.loads(path.read_text(encoding="utf-8"))["entries"])
+
+
+def test_stat_cache_evicts_files_gone_from_walked_roots(tmp_path, src):
+    skill = make_skill(src, "alpha", {"a.txt": "a\n", "b.txt": "b\n"})
+    other = make_skill(src, "beta", {"c.txt": "c\n"})
+    _age(skill)
+    _age(other)
+    cache = StatCache(tmp_path / "cache.json")
+    fingerprint_tree(skill, cache)
+    fingerprint_tree(other, cache)
+    cache.save()
+
+    (skill / "b.txt").unlink()
+    cache = StatCache(tmp_path / "cache.json")
+    fingerprint_tree(skill, cache)
+    cache.save()
+
+    entries = _cached_paths(tmp_path / "cache.json")
+    assert str(skill / "a.txt") in entries
+    assert str(skill / "b.txt") not in entries
+    # 本次未遍历的目录保持不变
+    assert str(other / "c.txt") in entries
+
+
+def test_stat_cache_is_capped(tmp_path, src, monkeypatch):
+    skill = make_skill(src, "alpha", {"a.txt": "a\n"})
+    other = make_skill(src, "beta", {"c.txt": "c\n"})
+    _age(skill)
+    _age(other)
+    cache = StatCache(tmp_path / "cache.json")
+    fingerprint_tree(skill, cache)
+    fingerprint_tree(other, cache)
+    cache.save()
+
+    monkeypatch.setattr(fingerprint, "MAX_CACHE_ENTRIES", 2)
+    cache = StatCache(tmp_path / "cache.json")
+    fingerprint_tree(skill, cache)
+    cache.save()
+    assert _cached_paths(tmp_path / "cache.json") == {str(skill / "a.txt"), str(skill / "SKILL.md")}
+
+
+def test_symlink_cycle_is_not_followed(src):
+    skill = make_skill(src, "alpha", {"docs/a.md": "a\n"})
+    (skill / "docs" / "loop").symlink_to(skill, target_is_directory=True)
+    (skill / "shared").symlink_to(skill / "docs", target_is_directory=True)
+
+    assert sorted(rel for rel, _ in iter_tree_files(skill)) == ["SKILL.md", "docs/a.md", "shared/a.md"]
+    assert run_install("--source", str(src), "--claude") == 0
+    installed = target_root("claude") / "alpha"
+    assert (installed / "shared" / "a.md").is_file()
+    assert not (installed / "docs" / "loop").exists()
+    assert run_install("--source", str(src), "--claude", "--verify") == 0
+
+
+@pytest.mark.parametrize("algo", ["md5", "sha256", "blake2b", "git"])
+def test_empty_fingerprint_uses_the_requested_algorithm(tmp_path, algo):
+    empty = tmp_path / "empty"
+    empty.mkdir()
+    expected = fingerprint_tree(empty, StatCache(tmp_path / "cache.json", algo=algo))
+    assert empty_fingerprint(algo) == expected
+    assert empty_fingerprint(algo).algo == algo
+
+
+def test_switching_hash_does_not_reinstall_unchanged_skills(src, capsys):
+    make_skill(src, "alpha", {"a.txt": "a\n"})
+    algos = ["md5", "sha256", "blake2b"] + (["xxh3"] if "xxh3" in available_algorithms() else []) + ["md5"]
+    for i, algo in enumerate(algos):
+        capsys.readouterr()
+        assert run_install("--source", str(src), "--claude", "--hash", algo, "--output", "ndjson") == 0
+        events = [json.loads(line) for line in capsys.readouterr().out.splitlines() if line.startswith("{")]
+        summary = events[-1]
+        assert (summary["installed"], summary["skipped"]) == ((1, 0) if i == 0 else (0, 1)), algo
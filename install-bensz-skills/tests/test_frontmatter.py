@@ -0,0 +1,45 @@
+"""SKILL.md frontmatter：解析的容错与缓存上限。"""
+from __future__ import annotations
+
+import json
+
+import pytest
+from conftest import make_skill, run_install, target_root
+
+import frontmatter
+from frontmatter import FrontmatterCache, parse_frontmatter
+
+
+@pytest.mark.parametrize("prefix", ["", "\ufeff", "\n\n", "\ufeff\n", "<!-- generated -->\n"])
+def test_frontmatter_tolerates_bom_and_leading_lines(prefix):
+    metadata = parse_frontmatter(f"{prefix}---\nname: helper\ncategory: auxiliary\n---\n# helper\n")
+    assert (metadata.name, metadata.category) == ("helper", "auxiliary")
+
+
+def test_frontmatter_must_start_within_first_30_lines():
+    assert parse_frontmatter("\n" * 30 + "---\ncategory: auxiliary\n---\n").category is None
+    assert parse_frontmatter("# title\nno frontmatter\n").category is None
+
+
+def test_bom_auxiliary_skill_is_not_installed(src):
+    make_skill(src, "alpha")
+    helper = make_skill(src, "helper")
+    (helper / "SKILL.md").write_text("\ufeff\n---\nname: helper\ncategory: auxiliary\n---\n", encoding="utf-8")
+    assert run_install("--source", str(src), "--claude") == 0
+    assert (target_root("claude") / "alpha").is_dir()
+    assert not (target_root("claude") / "helper").exists()
+
+
+def test_frontmatter_cache_is_capped(tmp_path, monkeypatch):
+    path = tmp_path / "frontmatter-cache.json"
+    cache = FrontmatterCache(path)
+    for i in range(3):
+        cache.read_digest(f"digest-{i}", lambda i=i: f"---\nname: s{i}\n---\n".encode())
+    cache.save()
+
+    monkeypatch.setattr(frontmatter, "MAX_CACHE_ENTRIES", 1)
+    cache = FrontmatterCache(path)
+    assert cache.read_digest("digest-1", lambda: b"").name == "s1"
+    cache.read_digest("digest-9", lambda: b"---\nname: s9\n---\n")
+    cache.save()
+    assert set(json.loads(path.read_text(encoding="utf-8"))["entries"]) == {"digest-1", "digest-9"}
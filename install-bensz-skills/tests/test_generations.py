@@ -0,0 +1,97 @@
+"""--generations：不可变版本目录、软链接切换、回滚与旧代清理。"""
+from __future__ import annotations
+
+import os
+
+from conftest import make_skill, run_install, target_root
+
+from generations import GENERATIONS_DIRNAME, GenerationManager
+
+
+def _install(src, *args: str) -> None:
+    assert run_install("--source", str(src), "--claude", "--generations", *args) == 0
+
+
+def _read(root, rel: str) -> str:
+    return (root / rel).read_text(encoding="utf-8")
+
+
+def test_generation_install_layout(src):
+    make_skill(src, "alpha", {"run.py": "print(1)\n"})
+    _install(src)
+    root = target_root("claude")
+    link = root / "alpha"
+    assert link.is_symlink()
+    assert not os.path.isabs(os.readlink(link))
+    version = link.resolve()
+    assert version.parent == root / GENERATIONS_DIRNAME / "versions"
+    assert version.name.startswith("alpha-")
+    assert _read(link, "run.py") == "print(1)\n"
+
+    generations = GenerationManager(root)
+    assert generations.current() == 1
+    assert generations.get(1).skills == {"alpha": version.name}
+
+    # 无变化时不新建代，也不改动软链接
+    _install(src)
+    assert generations.current() == 1
+    assert link.resolve() == version
+
+
+def test_change_flips_symlink_to_new_version(src):
+    skill = make_skill(src, "alpha", {"run.py": "print(1)\n"})
+    make_skill(src, "beta", {"b.txt": "b\n"})
+    _install(src)
+    root = target_root("claude")
+    old_alpha, old_beta = (root / "alpha").resolve(), (root / "beta").resolve()
+
+    (skill / "run.py").write_text("print(2)\n", encoding="utf-8")
+    _install(src)
+    generations = GenerationManager(root)
+    assert generations.current() == 2
+    new_alpha = (root / "alpha").resolve()
+    assert new_alpha != old_alpha
+    assert _read(new_alpha, "run.py") == "print(2)\n"
+    # 旧版本目录保持不变（不可变），未变化的 skill 沿用同一个版本目录
+    assert _read(old_alpha, "run.py") == "print(1)\n"
+    assert (root / "beta").resolve() == old_beta
+
+
+def test_rollback_to_previous_and_numbered_generation(src):
+    skill = make_skill(src, "alpha", {"run.py": "print(1)\n"})
+    _install(src)
+    for n in (2, 3):
+        (skill / "run.py").write_text(f"print({n})\n", encoding="utf-8")
+        _install(src)
+    root = target_root("claude")
+    generations = GenerationManager(root)
+    assert generations.current() == 3
+
+    assert run_install("--claude", "--rollback") == 0
+    assert generations.current() == 2
+    assert _read(root, "alpha/run.py") == "print(2)\n"
+
+    assert run_install("--claude", "--rollback", "1") == 0
+    assert generations.current() == 1
+    assert _read(root, "alpha/run.py") == "print(1)\n"
+
+    assert run_install("--claude", "--list-generations") == 0
+    assert run_install("--claude", "--rollback", "9") == 1
+    assert generations.current() == 1
+
+
+def test_old_generations_are_pruned(src):
+    skill = make_skill(src, "alpha", {"run.py": "print(1)\n"})
+    _install(src, "--keep-generations", "2")
+    for n in (2, 3, 4):
+        (skill / "run.py").write_text(f"print({n})\n", encoding="utf-8")
+        _install(src, "--keep-generations", "2")
+
+    root = target_root("claude")
+    generations = GenerationManager(root)
+    assert [g.number for g in generations.list_generations()] == [3, 4]
+    versions = sorted(p.name for p in (root / GENERATIONS_DIRNAME / "versions").iterdir())
+    assert versions == sorted({g.skills["alpha"] for g in generations.list_generations()})
+    assert _read(root, "alpha/run.py") == "print(4)\n"
+    assert run_install("--claude", "--rollback") == 0
+    assert _read(root, "alpha/run.py") == "print(3)\n"
@@ -0,0 +1,63 @@
+""".skillignore：发现、哈希、复制与已安装目录的对比共用同一套规则。"""
+from __future__ import annotations
+
+import json
+
+from conftest import make_skill, run_install, target_root
+
+from ignore import DEFAULT_MATCHER, FileSetMatcher, UnionMatcher, parse_ignore
+
+
+def _copied_events(capsys) -> list[dict]:
+    events = [json.loads(line) for line in capsys.readouterr().out.splitlines() if line.startswith("{")]
+    return [e for e in events if e["event"] == "copied"]
+
+
+def test_negated_rule_reincludes_default_ignored_dir():
+    matcher = DEFAULT_MATCHER.extend("!tests/\n")
+    assert DEFAULT_MATCHER.is_ignored("tests", is_dir=True)
+    assert not matcher.is_ignored("tests", is_dir=True)
+    assert matcher.is_ignored("__pycache__", is_dir=True)
+    assert parse_ignore("# comment\n\n") == []
+
+
+def test_union_matcher_sees_paths_visible_to_any():
+    union = UnionMatcher(DEFAULT_MATCHER, FileSetMatcher(["tests/t.py"]))
+    assert not union.is_ignored("tests", is_dir=True)
+    assert not union.is_ignored("tests/t.py")
+    assert union.is_ignored("__pycache__", is_dir=True)
+    assert not union.is_ignored("scripts/run.py")
+
+
+def test_negated_rule_is_stable_across_runs(src, capsys):
+    skill = make_skill(src, "alpha", {"tests/t.py": "test\n", "scripts/run.py": "print()\n"})
+    (skill / ".skillignore").write_text("!tests/\n", encoding="utf-8")
+    assert run_install("--source", str(src), "--claude") == 0
+    installed = target_root("claude") / "alpha"
+    assert (installed / "tests" / "t.py").is_file()
+    assert not (installed / ".skillignore").exists()
+    capsys.readouterr()
+
+    # --verify 不应把重新包含的文件当作缺失
+    assert run_install("--source", str(src), "--claude", "--verify", "--output", "ndjson") == 0
+    assert _copied_events(capsys) == []
+
+    # --fsck 按索引中的文件清单检查
+    assert run_install("--fsck", "--claude") == 0
+    capsys.readouterr()
+
+    # 增量同步只复制真正变化的文件
+    (skill / "scripts" / "run.py").write_text("print('changed')\n", encoding="utf-8")
+    assert run_install("--source", str(src), "--claude", "--output", "ndjson") == 0
+    (copied,) = _copied_events(capsys)
+    assert (copied["added"], copied["changed"], copied["removed"]) == (0, 1, 0)
+
+
+def test_newly_ignored_files_are_removed(src):
+    skill = make_skill(src, "alpha", {"data/big.ckpt": "weights\n"})
+    assert run_install("--source", str(src), "--claude") == 0
+    assert (target_root("claude") / "alpha" / "data" / "big.ckpt").exists()
+
+    (skill / ".skillignore").write_text("*.ckpt\n", encoding="utf-8")
+    assert run_install("--source", str(src), "--claude") == 0
+    assert not (target_root("claude") / "alpha" / "data" / "big.ckpt").exists()
@@ -0,0 +1,77 @@
+"""--engine asyncio 与线程引擎的结果一致（报告、事件与目标目录）。"""
+from __future__ import annotations
+
+import json
+import os
+
+import pytest
+from conftest import make_skill, run_install, target_root
+
+import fingerprint
+
+
+def _tree(root) -> dict[str, str]:
+    files = {}
+    for dirpath, _, filenames in os.walk(root):
+        for name in filenames:
+            path = os.path.join(dirpath, name)
+            if name.startswith(".bensz-skills-index"):
+                continue
+            with open(path, "rb") as f:
+                files[os.path.relpath(path, root)] = f.read().decode("utf-8", "replace")
+    return files
+
+
+def _normalize(value, home: str):
+    text = json.dumps(value, ensure_ascii=False, sort_keys=True).replace(home, "~")
+    return json.loads(text)
+
+
+def _run(engine: str, src, capsys, *args: str) -> dict:
+    """运行一次安装，返回去除时间戳与 HOME 路径后的事件与报告。"""
+    home = os.environ["HOME"]
+    capsys.readouterr()
+    assert run_install("--source", str(src), "--claude", "--jobs", "4", "--engine", engine,
+                       "--output", "ndjson", *args) == 0
+    events = [json.loads(line) for line in capsys.readouterr().out.splitlines() if line.startswith("{")]
+    for event in events:
+        event.pop("ts", None)
+    summary = next(e for e in events if e["event"] == "summary")
+    manifest = json.loads(open(summary.pop("manifest"), encoding="utf-8").read())["runs"]
+    for run in manifest:
+        run.pop("installed_at", None)
+        run.pop("timings", None)
+    per_skill = sorted(
+        (e for e in events if e["event"] in ("copied", "skipped", "removed")),
+        key=lambda e: json.dumps(e, sort_keys=True),
+    )
+    return _normalize(
+        {"summary": summary, "events": per_skill, "manifest": manifest, "tree": _tree(target_root("claude"))}, home
+    )
+
+
+@pytest.mark.parametrize("sync_mode", ["delta", "full"])
+def test_asyncio_engine_matches_threads(tmp_path, src, capsys, monkeypatch, sync_mode):
+    for i in range(6):
+        make_skill(src, f"skill-{i}", {"scripts/run.py": f"print({i})\n", "templates/t.md": f"# {i}\n"})
+    make_skill(src, "helper", {"a.txt": "a\n"})
+    (src / "helper" / "SKILL.md").write_text("---\nname: helper\ncategory: auxiliary\n---\n", encoding="utf-8")
+
+    results = {}
+    for engine in ("threads", "asyncio"):
+        home = tmp_path / f"home-{engine}"
+        home.mkdir()
+        monkeypatch.setenv("HOME", str(home))
+        monkeypatch.setattr(fingerprint, "_global_stat_caches", {})
+        runs = [_run(engine, src, capsys, "--sync-mode", sync_mode)]
+        runs.append(_run(engine, src, capsys, "--sync-mode", sync_mode))
+        (src / "skill-0" / "scripts" / "run.py").write_text("print('changed')\n", encoding="utf-8")
+        runs.append(_run(engine, src, capsys, "--sync-mode", sync_mode))
+        runs.append(_run(engine, src, capsys, "--sync-mode", sync_mode, "--force"))
+        (src / "skill-0" / "scripts" / "run.py").write_text("print(0)\n", encoding="utf-8")
+        results[engine] = runs
+
+    threads, asyncio_runs = results["threads"], results["asyncio"]
+    assert [r["summary"]["installed"] for r in threads] == [6, 0, 1, 6]
+    for expected, actual in zip(threads, asyncio_runs):
+        assert actual == expected
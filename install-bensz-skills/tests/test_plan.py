@@ -0,0 +1,92 @@
+"""plan / apply：只执行计划中的动作，目标与计划不符时拒绝执行。"""
+from __future__ import annotations
+
+import shutil
+
+import pytest
+from conftest import make_skill, run_install, target_root
+
+import install
+from plan import InstallPlan, PlanError
+
+
+def _plan(tmp_path, *args) -> InstallPlan:
+    out = tmp_path / "plan.json"
+    assert run_install("plan", "--source", *args, "-o", str(out)) == 0
+    return InstallPlan.load(out)
+
+
+def _apply(tmp_path) -> int:
+    return run_install("apply", str(tmp_path / "plan.json"))
+
+
+def test_plan_then_apply(tmp_path, src):
+    make_skill(src, "alpha", {"a.txt": "v1\n"})
+    plan = _plan(tmp_path, str(src), "--claude")
+    (target,) = plan.targets
+    assert [(a.skill, a.action) for a in target.actions] == [("alpha", "install")]
+    assert not (target_root("claude") / "alpha").exists()
+
+    assert _apply(tmp_path) == 0
+    assert (target_root("claude") / "alpha" / "a.txt").read_text(encoding="utf-8") == "v1\n"
+
+
+def test_apply_refuses_when_skipped_target_changed(tmp_path, src):
+    make_skill(src, "alpha", {"a.txt": "v1\n"})
+    make_skill(src, "beta", {"b.txt": "v1\n"})
+    assert run_install("--source", str(src), "--claude") == 0
+    (src / "beta" / "b.txt").write_text("v2\n", encoding="utf-8")
+    plan = _plan(tmp_path, str(src), "--claude")
+    actions = {a.skill: a for a in plan.targets[0].actions}
+    assert actions["alpha"].action == "skip"
+    assert actions["alpha"].dest_digest is not None
+
+    # skip 的技能在生成计划后被改动：整个目标都不执行
+    installed = target_root("claude") / "alpha" / "a.txt"
+    installed.write_text("edited\n", encoding="utf-8")
+    assert _apply(tmp_path) == 1
+    assert installed.read_text(encoding="utf-8") == "edited\n"
+    assert (target_root("claude") / "beta" / "b.txt").read_text(encoding="utf-8") == "v1\n"
+
+    shutil.rmtree(target_root("claude") / "alpha")
+    assert _apply(tmp_path) == 1
+
+
+def test_apply_refuses_when_source_changed(tmp_path, src):
+    skill = make_skill(src, "alpha", {"a.txt": "v1\n"})
+    _plan(tmp_path, str(src), "--claude")
+    (skill / "a.txt").write_text("v2\n", encoding="utf-8")
+    assert _apply(tmp_path) == 1
+    assert not (target_root("claude") / "alpha").exists()
+
+
+def test_apply_prunes_exactly_the_planned_set(tmp_path, src):
+    make_skill(src, "alpha")
+    make_skill(src, "beta")
+    make_skill(src, "gamma")
+    assert run_install("--source", str(src), "--claude") == 0
+    shutil.rmtree(src / "beta")
+    plan = _plan(tmp_path, str(src), "--claude", "--prune")
+    assert plan.targets[0].pruned == ["beta"]
+
+    # 计划生成后又有技能成为遗留：与计划不符，拒绝执行
+    shutil.rmtree(src / "gamma")
+    assert _apply(tmp_path) == 1
+    assert (target_root("claude") / "beta").is_dir()
+
+    make_skill(src, "gamma")
+    assert _apply(tmp_path) == 0
+    assert not (target_root("claude") / "beta").exists()
+    assert (target_root("claude") / "gamma").is_dir()
+
+
+def test_target_lock_recheck_rejects_drift(tmp_path, src):
+    make_skill(src, "alpha")
+    assert run_install("--source", str(src), "--claude") == 0
+    (target,) = _plan(tmp_path, str(src), "--claude").targets
+    assert install._check_planned_target(target, {"alpha"}, []) == {"alpha": "skip"}
+    # 取得目标锁时技能集合或遗留技能已与计划不同
+    with pytest.raises(PlanError):
+        install._check_planned_target(target, {"alpha", "beta"}, [])
+    with pytest.raises(PlanError):
+        install._check_planned_target(target, {"alpha"}, ["old"])
@@ -0,0 +1,87 @@
+"""--prune：只清理安装器安装、且已不在同一来源中的 skill。"""
+from __future__ import annotations
+
+import shutil
+import subprocess
+
+import pytest
+
+from conftest import make_skill, run_install, target_root
+
+from install_index import InstallIndex
+
+
+def _pack(src, out) -> None:
+    assert run_install("--source", str(src), "--pack", str(out)) == 0
+
+
+def test_prune_removes_skill_deleted_from_source(src):
+    make_skill(src, "alpha")
+    make_skill(src, "beta")
+    assert run_install("--source", str(src), "--claude") == 0
+    shutil.rmtree(src / "beta")
+    assert run_install("--source", str(src), "--claude", "--prune") == 0
+    assert (target_root("claude") / "alpha").is_dir()
+    assert not (target_root("claude") / "beta").exists()
+
+
+def test_prune_keeps_skills_from_pack(tmp_path, src):
+    packed = tmp_path / "packed"
+    make_skill(packed, "from-pack")
+    _pack(packed, tmp_path / "skills.skillpack")
+    assert run_install("--from-pack", str(tmp_path / "skills.skillpack"), "--claude") == 0
+    entry = InstallIndex(target_root("claude")).load()["from-pack"]
+    assert entry.origin == f"pack:{tmp_path / 'skills.skillpack'}"
+
+    make_skill(src, "alpha")
+    assert run_install("--source", str(src), "--claude", "--prune") == 0
+    assert (target_root("claude") / "from-pack").is_dir()
+
+
+def test_prune_from_same_pack_removes_dropped_skill(tmp_path):
+    packed = tmp_path / "packed"
+    make_skill(packed, "alpha")
+    make_skill(packed, "beta")
+    pack = tmp_path / "skills.skillpack"
+    _pack(packed, pack)
+    assert run_install("--from-pack", str(pack), "--claude") == 0
+
+    shutil.rmtree(packed / "beta")
+    _pack(packed, pack)
+    assert run_install("--from-pack", str(pack), "--claude", "--prune") == 0
+    assert (target_root("claude") / "alpha").is_dir()
+    assert not (target_root("claude") / "beta").exists()
+
+
+@pytest.mark.skipif(shutil.which("git") is None, reason="需要 git")
+def test_prune_keeps_skills_from_git(tmp_path, src):
+    repo = tmp_path / "repo"
+    make_skill(repo, "from-git")
+    git = ["git", "-C", str(repo), "-c", "user.name=t", "-c", "user.email=t@example.com"]
+    subprocess.run([*git, "init", "-q"], check=True)
+    subprocess.run([*git, "add", "-A"], check=True)
+    subprocess.run([*git, "commit", "-qm", "init"], check=True)
+    assert run_install("--from-git", f"{repo}@HEAD", "--claude") == 0
+    assert InstallIndex(target_root("claude")).load()["from-git"].origin == f"git:{repo}@HEAD"
+
+    make_skill(src, "alpha")
+    assert run_install("--source", str(src), "--claude", "--prune") == 0
+    assert (target_root("claude") / "from-git").is_dir()
+
+
+def test_prune_keeps_legacy_pack_records_without_origin(tmp_path, src):
+    packed = tmp_path / "packed"
+    make_skill(packed, "from-pack")
+    _pack(packed, tmp_path / "skills.skillpack")
+    assert run_install("--from-pack", str(tmp_path / "skills.skillpack"), "--claude") == 0
+
+    # 升级前写入的记录没有 origin，只有并不存在的虚拟源目录
+    index = InstallIndex(target_root("claude"))
+    entry = index.load()["from-pack"]
+    entry.origin = ""
+    index.record([entry])
+    index.close()
+
+    make_skill(src, "alpha")
+    assert run_install("--source", str(src), "--claude", "--prune") == 0
+    assert (target_root("claude") / "from-pack").is_dir()
@@ -0,0 +1,23 @@
+"""多个源目录与同名 skill。"""
+from __future__ import annotations
+
+import pytest
+from conftest import make_skill, run_install, target_root
+
+
+def test_same_name_within_one_source_is_an_error(src):
+    make_skill(src, "group-a/alpha", {"a.txt": "a\n"})
+    make_skill(src, "group-b/alpha", {"a.txt": "b\n"})
+    with pytest.raises(SystemExit) as exc:
+        run_install("--source", str(src), "--claude")
+    assert str(src / "group-a" / "alpha") in str(exc.value)
+    assert str(src / "group-b" / "alpha") in str(exc.value)
+    assert not (target_root("claude") / "alpha").exists()
+
+
+def test_same_name_across_sources_follows_priority(tmp_path, src):
+    make_skill(src, "alpha", {"a.txt": "first\n"})
+    other = tmp_path / "other"
+    make_skill(other, "alpha", {"a.txt": "second\n"})
+    assert run_install("--source", f"{src},{other}", "--claude") == 0
+    assert (target_root("claude") / "alpha" / "a.txt").read_text(encoding="utf-8") == "first\n"
@@ -0,0 +1,77 @@
+"""增量同步：diff_trees / apply_sync 与安装时的逐文件同步。"""
+from __future__ import annotations
+
+import os
+
+from conftest import make_skill, run_install, target_root
+
+from fingerprint import StatCache, fingerprint_tree
+from sync import apply_sync, diff_trees
+
+
+def _write(root, files: dict[str, str]) -> None:
+    for rel, content in files.items():
+        path = root / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content, encoding="utf-8")
+
+
+def _fingerprint(root, tmp_path):
+    return fingerprint_tree(root, StatCache(tmp_path / "cache.json"))
+
+
+def test_diff_trees_classifies_added_changed_removed(tmp_path):
+    src, dest = tmp_path / "src", tmp_path / "dest"
+    _write(src, {"same.txt": "s\n", "changed.txt": "new\n", "dir/added.txt": "a\n"})
+    _write(dest, {"same.txt": "s\n", "changed.txt": "old\n", "gone/removed.txt": "r\n"})
+    plan = diff_trees(_fingerprint(src, tmp_path), _fingerprint(dest, tmp_path))
+    assert plan.to_dict() == {"added": ["dir/added.txt"], "changed": ["changed.txt"], "removed": ["gone/removed.txt"]}
+    assert diff_trees(_fingerprint(src, tmp_path), _fingerprint(src, tmp_path)).is_empty
+
+
+def test_apply_sync_handles_file_dir_swaps_and_empty_parents(tmp_path):
+    src, dest = tmp_path / "src", tmp_path / "dest"
+    _write(src, {"x/inner.txt": "now a dir\n", "y": "now a file\n", "keep.txt": "k\n"})
+    _write(dest, {"x": "was a file\n", "y/inner.txt": "was a dir\n", "keep.txt": "k\n", "old/deep/f.txt": "f\n"})
+    src_fp = _fingerprint(src, tmp_path)
+    plan = diff_trees(src_fp, _fingerprint(dest, tmp_path))
+    apply_sync(plan, src, dest, src_fp)
+
+    assert (dest / "x" / "inner.txt").read_text(encoding="utf-8") == "now a dir\n"
+    assert (dest / "y").read_text(encoding="utf-8") == "now a file\n"
+    # 因文件移除而变空的上级目录一并删除
+    assert not (dest / "old").exists()
+    assert diff_trees(src_fp, _fingerprint(dest, tmp_path)).is_empty
+
+
+def test_install_only_touches_changed_files(src):
+    skill = make_skill(src, "alpha", {"keep.txt": "k\n", "edit.txt": "v1\n", "drop.txt": "d\n"})
+    assert run_install("--source", str(src), "--claude") == 0
+    installed = target_root("claude") / "alpha"
+    before = os.stat(installed / "keep.txt")
+
+    (skill / "edit.txt").write_text("v2\n", encoding="utf-8")
+    (skill / "drop.txt").unlink()
+    (skill / "new.txt").write_text("n\n", encoding="utf-8")
+    assert run_install("--source", str(src), "--claude") == 0
+
+    after = os.stat(installed / "keep.txt")
+    assert (after.st_ino, after.st_mtime_ns) == (before.st_ino, before.st_mtime_ns)
+    assert (installed / "edit.txt").read_text(encoding="utf-8") == "v2\n"
+    assert (installed / "new.txt").read_text(encoding="utf-8") == "n\n"
+    assert not (installed / "drop.txt").exists()
+
+
+def test_files_newly_ignored_are_deleted_from_target(src):
+    skill = make_skill(src, "alpha", {"keep.txt": "k\n", "cache/blob.bin": "b\n", "notes.log": "l\n"})
+    assert run_install("--source", str(src), "--claude") == 0
+    installed = target_root("claude") / "alpha"
+    assert (installed / "cache" / "blob.bin").exists()
+    before = os.stat(installed / "keep.txt")
+
+    (skill / ".skillignore").write_text("cache/\n*.log\n", encoding="utf-8")
+    assert run_install("--source", str(src), "--claude") == 0
+    assert not (installed / "cache").exists()
+    assert not (installed / "notes.log").exists()
+    after = os.stat(installed / "keep.txt")
+    assert (after.st_ino, after.st_mtime_ns) == (before.st_ino, before.st_mtime_ns)
@@ -0,0 +1,65 @@
+"""目标目录的跨进程锁。"""
+from __future__ import annotations
+
+import pytest
+
+from conftest import make_skill, run_install, target_root
+
+from generations import GenerationManager
+from install_index import InstallIndex
+from targetlock import TargetLock, TargetLockTimeout
+
+
+def test_lock_is_exclusive_and_records_holder(tmp_path):
+    with TargetLock(tmp_path) as held:
+        assert held.holder_pid() is not None
+        other = TargetLock(tmp_path, timeout=0.1)
+        with pytest.raises(TargetLockTimeout):
+            other.acquire()
+        assert other.waited
+    # 释放后清空 pid，其他进程可以立即获取
+    assert TargetLock(tmp_path).holder_pid() is None
+    with TargetLock(tmp_path, timeout=0):
+        pass
+
+
+def test_install_waits_for_lock_and_times_out(src):
+    make_skill(src, "alpha")
+    root = target_root("claude")
+    root.mkdir(parents=True)
+    with TargetLock(root):
+        assert run_install("--source", str(src), "--claude", "--lock-timeout", "0.1") == 1
+    assert not (root / "alpha").exists()
+    assert run_install("--source", str(src), "--claude", "--lock-timeout", "0.1") == 0
+
+
+def test_rollback_takes_target_lock(src):
+    skill = make_skill(src, "alpha", {"a.txt": "v1\n"})
+    assert run_install("--source", str(src), "--claude", "--generations") == 0
+    (skill / "a.txt").write_text("v2\n", encoding="utf-8")
+    assert run_install("--source", str(src), "--claude", "--generations") == 0
+
+    root = target_root("claude")
+    generations = GenerationManager(root)
+    current = generations.current()
+    recorded = InstallIndex(root).load()["alpha"].hash
+
+    with TargetLock(root):
+        assert run_install("--claude", "--rollback", "--lock-timeout", "0.1") == 1
+    # 超时时既不切换软链接，也不改写索引
+    assert generations.current() == current
+    assert InstallIndex(root).load()["alpha"].hash == recorded
+    assert (root / "alpha" / "a.txt").read_text(encoding="utf-8") == "v2\n"
+
+    assert run_install("--claude", "--rollback", "--lock-timeout", "0.1") == 0
+    assert generations.current() < current
+    assert (root / "alpha" / "a.txt").read_text(encoding="utf-8") == "v1\n"
+    assert InstallIndex(root).load()["alpha"].hash != recorded
+    assert run_install("--fsck", "--claude") == 0
+
+
+def test_fsck_waits_for_lock(src):
+    make_skill(src, "alpha")
+    assert run_install("--source", str(src), "--claude") == 0
+    with TargetLock(target_root("claude")):
+        assert run_install("--fsck", "--claude", "--lock-timeout", "0.1") == 1
@@ -0,0 +1,26 @@
+"""--timings：阶段与逐 skill 步骤的划分。"""
+from __future__ import annotations
+
+import json
+
+from conftest import make_skill, run_install
+
+
+def _summary_timings(capsys) -> dict:
+    events = [json.loads(line) for line in capsys.readouterr().out.splitlines() if line.startswith("{")]
+    return next(e for e in events if e["event"] == "summary")["timings"]
+
+
+def test_timings_separate_classification_hash_and_copy(src, capsys):
+    make_skill(src, "alpha", {"a.txt": "a\n"})
+    capsys.readouterr()
+    assert run_install("--source", str(src), "--claude", "--timings", "--output", "ndjson") == 0
+    timings = _summary_timings(capsys)
+    assert {"discovery", "classification", "install", "manifest"} <= set(timings["phases"])
+    (skill,) = timings["skills"]
+    assert {"hash", "copy", "total"} <= set(skill)
+
+    # 未变化时不复制
+    assert run_install("--source", str(src), "--claude", "--timings", "--output", "ndjson") == 0
+    (skill,) = _summary_timings(capsys)["skills"]
+    assert "hash" in skill and "copy" not in skill
@@ -0,0 +1,47 @@
+"""--verify：只修复有漂移的已安装文件。"""
+from __future__ import annotations
+
+from conftest import make_skill, run_install, target_root
+
+
+def test_verify_repairs_modified_file(src):
+    make_skill(src, "alpha", {"scripts/run.py": "print('alpha')\n"})
+    assert run_install("--source", str(src), "--claude") == 0
+
+    installed = target_root("claude") / "alpha" / "scripts" / "run.py"
+    installed.write_text("edited\n", encoding="utf-8")
+    assert run_install("--source", str(src), "--claude", "--verify") == 0
+    assert installed.read_text(encoding="utf-8") == "print('alpha')\n"
+
+
+def test_verify_hardlink_repairs_shared_object(src):
+    make_skill(src, "alpha", {"scripts/run.py": "print('alpha')\n"})
+    assert run_install("--source", str(src), "--copy-mode", "hardlink") == 0
+
+    claude_file = target_root("claude") / "alpha" / "scripts" / "run.py"
+    codex_file = target_root("codex") / "alpha" / "scripts" / "run.py"
+    assert claude_file.stat().st_ino == codex_file.stat().st_ino
+
+    # 原地修改（root 不受只读权限限制）：对象与另一个目标一起被改动
+    claude_file.chmod(0o644)
+    with open(claude_file, "a", encoding="utf-8") as f:
+        f.write("corrupt\n")
+    assert codex_file.read_text(encoding="utf-8").endswith("corrupt\n")
+
+    assert run_install("--source", str(src), "--copy-mode", "hardlink", "--verify") == 0
+    assert claude_file.read_text(encoding="utf-8") == "print('alpha')\n"
+    assert codex_file.read_text(encoding="utf-8") == "print('alpha')\n"
+    assert run_install("--fsck") == 0
+
+
+def test_store_rewrites_corrupted_object_on_reinstall(src):
+    make_skill(src, "alpha", {"scripts/run.py": "print('alpha')\n"})
+    assert run_install("--source", str(src), "--claude", "--copy-mode", "hardlink") == 0
+
+    installed = target_root("claude") / "alpha" / "scripts" / "run.py"
+    installed.chmod(0o644)
+    with open(installed, "a", encoding="utf-8") as f:
+        f.write("corrupt\n")
+
+    assert run_install("--source", str(src), "--claude", "--copy-mode", "hardlink", "--force") == 0
+    assert installed.read_text(encoding="utf-8") == "print('alpha')\n"